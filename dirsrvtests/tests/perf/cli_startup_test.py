@@ -0,0 +1,90 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+# Startup benchmark of the CLI tools. Each tool is run under
+# "python3 -X importtime" twice: once in a way that imports the modules of
+# every subcommand, as the tools always did before, and once in a way that
+# only imports what is needed. For dsconf, dsidm and dsctl that is --help
+# against a single subcommand. dscreate imports the instance module only
+# to run an action, so that is an action against --help. None of the runs
+# need an instance, the tools stop before connecting to one.
+
+import os
+import re
+import sys
+import logging
+import subprocess
+import pytest
+from lib389.paths import Paths
+
+log = logging.getLogger(__name__)
+
+ds_paths = Paths()
+
+# (tool, arguments of the eager run, arguments of the lazy run)
+TOOLS = [
+    ('dsconf', ['--help'], ['localhost', 'backend']),
+    ('dsidm', ['--help'], ['localhost', 'user']),
+    ('dsctl', ['--help'], ['localhost', 'tls']),
+    ('dscreate', ['create-template'], ['--help']),
+]
+IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|')
+
+
+def _import_time(tool, args):
+    """Run a tool under -X importtime
+
+    :returns: The total import time in microseconds and the number of modules imported
+    """
+    path = os.path.join(ds_paths.sbin_dir, tool)
+    result = subprocess.run([sys.executable, '-X', 'importtime', path] + args,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            encoding='utf-8')
+    total = 0
+    modules = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            total += int(match.group(1))
+            modules += 1
+    return total, modules
+
+
+@pytest.mark.parametrize('tool,eager_args,lazy_args', TOOLS)
+def test_cli_import_time(tool, eager_args, lazy_args):
+    """Check a CLI tool only imports the modules of the subcommand used
+
+    :id: 4c3a7d1e-2f5b-4b1c-9a7e-6d3f1e0b8c52
+    :parametrized: yes
+    :setup: None
+    :steps:
+        1. Run the tool so it imports every subcommand under -X importtime
+        2. Run the tool so it imports only what it needs under -X importtime
+        3. Compare the total import times
+    :expectedresults:
+        1. Success
+        2. Success
+        3. The second run imports fewer modules, in less time
+    """
+    eager_time, eager_modules = _import_time(tool, eager_args)
+    lazy_time, lazy_modules = _import_time(tool, lazy_args)
+
+    log.info('{}: "{}" imports {} modules in {:.1f}ms, "{}" imports {} modules in {:.1f}ms'.format(
+             tool, ' '.join(eager_args), eager_modules, eager_time / 1000,
+             ' '.join(lazy_args), lazy_modules, lazy_time / 1000))
+    assert eager_modules > 0
+    assert lazy_modules < eager_modules
+    assert lazy_time <= eager_time
+
+
+if __name__ == '__main__':
+    # Run isolated
+    # -s for DEBUG mode
+    CURRENT_FILE = os.path.realpath(__file__)
+    pytest.main("-s %s" % CURRENT_FILE)
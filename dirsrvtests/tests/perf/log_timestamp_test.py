@@ -0,0 +1,107 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+# Micro benchmark of the log timestamp parser. The fixed layout parser is
+# compared against the regex and dateutil path it replaced.
+
+import os
+import re
+import time
+import logging
+import pytest
+from dateutil.parser import parse as dt_parse
+from lib389.dirsrv_log import DirsrvAccessLog, MONTH_LOOKUP
+
+log = logging.getLogger(__name__)
+
+LINES = int(os.environ.get('PERF_TIMESTAMP_LINES', '100000'))
+MIN_SPEEDUP = float(os.environ.get('PERF_TIMESTAMP_MIN_SPEEDUP', '10'))
+
+PROG_TIMESTAMP = re.compile(r'\[(?P<day>\d*)\/(?P<month>\w*)\/(?P<year>\d*):(?P<hour>\d*):(?P<minute>\d*):(?P<second>\d*)(\.(?P<nanosecond>\d*))?\s(?P<tz>[\+\-]\d*)')   # noqa
+
+
+class FakeInstance(object):
+    def __init__(self):
+        self.verbose = False
+        self.log = log
+        self.ds_paths = None
+
+
+def dateutil_parse_timestamp(ts):
+    """The regex and dateutil parser that was replaced, with its month and
+    time separator bugs fixed so the results can be compared
+    """
+    timedata = PROG_TIMESTAMP.match(ts).groupdict()
+    dt_str = '{YEAR}-{MONTH}-{DAY} {HOUR}:{MINUTE}:{SECOND} {TZ}'.format(
+        YEAR=timedata['year'],
+        MONTH=MONTH_LOOKUP[timedata['month']],
+        DAY=timedata['day'],
+        HOUR=timedata['hour'],
+        MINUTE=timedata['minute'],
+        SECOND=timedata['second'],
+        TZ=timedata['tz'],
+        )
+    dt = dt_parse(dt_str)
+    if timedata['nanosecond']:
+        dt = dt.replace(microsecond=int(int(timedata['nanosecond']) / 1000))
+    return dt
+
+
+def _timestamps():
+    months = list(MONTH_LOOKUP.keys())
+    return ['[{:02d}/{}/2020:{:02d}:{:02d}:{:02d}.{:09d} +0200]'.format(
+            i % 28 + 1, months[i % 12], i % 24, i % 60, (i * 7) % 60, i * 997 % 1000000000)
+            for i in range(LINES)]
+
+
+def test_parse_timestamp_speedup():
+    """Check the fixed layout timestamp parser is much faster than dateutil
+
+    :id: 7f3f4f8e-9d0e-4e43-9b62-0a2fe4b1f6a3
+    :setup: None
+    :steps:
+        1. Parse the same timestamps with dateutil, parse_timestamp and parse_timestamps
+        2. Compare the results
+        3. Compare the timings
+    :expectedresults:
+        1. Success
+        2. All the parsers agree
+        3. parse_timestamp is at least PERF_TIMESTAMP_MIN_SPEEDUP times faster
+    """
+    access_log = DirsrvAccessLog(FakeInstance())
+    timestamps = _timestamps()
+
+    start = time.perf_counter()
+    expected = [dateutil_parse_timestamp(ts) for ts in timestamps]
+    dateutil_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = [access_log.parse_timestamp(ts) for ts in timestamps]
+    fast_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    epoch_ns = access_log.parse_timestamps(timestamps)
+    batch_time = time.perf_counter() - start
+
+    assert result == expected
+    assert [ns // 1000 for ns in epoch_ns] == \
+        [int(dt.timestamp()) * 1000000 + dt.microsecond for dt in expected]
+
+    log.info('{} timestamps: dateutil {:.3f}s, parse_timestamp {:.3f}s ({:.1f}x), '
+             'parse_timestamps {:.3f}s ({:.1f}x)'.format(
+             LINES, dateutil_time, fast_time, dateutil_time / fast_time,
+             batch_time, dateutil_time / batch_time))
+    assert dateutil_time / fast_time >= MIN_SPEEDUP
+
+
+if __name__ == '__main__':
+    # Run isolated
+    # -s for DEBUG mode
+    CURRENT_FILE = os.path.realpath(__file__)
+    pytest.main("-s %s" % CURRENT_FILE)
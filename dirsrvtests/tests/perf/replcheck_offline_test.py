@@ -0,0 +1,109 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+# Benchmark of the ds-replcheck offline mode. Two LDIF exports of increasing
+# size are generated with a known set of differences, and the time taken
+# per entry is compared between the sizes. The comparison must scale
+# linearly, so the time per entry should stay roughly flat.
+
+import os
+import time
+import logging
+import subprocess
+import pytest
+from lib389._constants import DEFAULT_SUFFIX
+from lib389.paths import Paths
+
+log = logging.getLogger(__name__)
+
+RUV_DN = 'nsuniqueid=ffffffff-ffffffff-ffffffff-ffffffff,{}'.format(DEFAULT_SUFFIX)
+SIZES = [int(s) for s in os.environ.get('PERF_REPLCHECK_SIZES', '10000,40000,160000').split(',')]
+# Allowed growth of the time per entry between the smallest and largest run.
+MAX_SCALING = float(os.environ.get('PERF_REPLCHECK_MAX_SCALING', '3.0'))
+
+
+def _write_ldif(path, count, replica):
+    """Write a db2ldif -r style export. The replica differs from the master
+    by one missing entry in 100, one modified entry in 250 and a newer RUV.
+    """
+    maxcsn = '5e000010000000010000' if replica else '5e000000000000010000'
+    with open(path, 'w') as f:
+        f.write('version: 1\n\n')
+        f.write('dn: {}\nobjectClass: top\nobjectClass: domain\n'
+                'dc: example\nnsUniqueId: 00000000-00000000-00000000-00000001\n'
+                'createTimestamp: 20200101000000Z\n\n'.format(DEFAULT_SUFFIX))
+        f.write('dn: {}\nobjectClass: top\nobjectClass: nsTombstone\n'
+                'nsUniqueId: ffffffff-ffffffff-ffffffff-ffffffff\n'
+                'nsds50ruv: {{replicageneration}} 5e000000000000010000\n'
+                'nsds50ruv: {{replica 1 ldap://localhost:389}} 5e000000000000010000 {}\n\n'.format(RUV_DN, maxcsn))
+        for i in range(count):
+            if replica and i % 100 == 0:
+                continue
+            desc = 'description {}'.format(i)
+            if replica and i % 250 == 1:
+                desc = 'changed {}'.format(i)
+            f.write('dn: uid=user{:08d},ou=people,{}\n'.format(i, DEFAULT_SUFFIX))
+            f.write('objectClass;vucsn-5e000001000000010000: top\n'
+                    'objectClass;vucsn-5e000001000000010000: inetOrgPerson\n')
+            f.write('uid;vucsn-5e000001000000010000;mdcsn-5e000001000000010000: user{:08d}\n'.format(i))
+            f.write('cn;vucsn-5e000001000000010000: user {}\n'.format(i))
+            f.write('sn;vucsn-5e000001000000010000: {}\n'.format(i))
+            f.write('description;vucsn-5e000002000000010000: {}\n'.format(desc))
+            f.write('nsUniqueId: {:08x}-00000000-00000000-00000000\n'.format(i))
+            f.write('createTimestamp: 20200101000000Z\n')
+            f.write('modifyTimestamp: 20200101000000Z\n\n')
+
+
+def test_replcheck_offline_scaling(tmpdir):
+    """Check the offline mode of ds-replcheck scales linearly with the size
+    of the LDIF files
+
+    :id: 1f0c5a5e-6a2c-4a73-8d64-5a0b9c6b2d0e
+    :setup: Generated master and replica LDIF files, no instance
+    :steps:
+        1. Generate master and replica LDIF files of increasing size
+        2. Run ds-replcheck offline on each pair and time it
+        3. Compare the time per entry of the smallest and largest run
+    :expectedresults:
+        1. Success
+        2. Success, and the missing entries are reported
+        3. The time per entry grows by less than PERF_REPLCHECK_MAX_SCALING
+    """
+    ds_replcheck_path = os.path.join(Paths().bin_dir, 'ds-replcheck')
+
+    per_entry = []
+    for count in SIZES:
+        master = os.path.join(str(tmpdir), 'master_{}.ldif'.format(count))
+        replica = os.path.join(str(tmpdir), 'replica_{}.ldif'.format(count))
+        _write_ldif(master, count, False)
+        _write_ldif(replica, count, True)
+
+        tool_cmd = [ds_replcheck_path, 'offline', '-b', DEFAULT_SUFFIX,
+                    '-m', master, '-r', replica, '--rid', '1']
+        start = time.perf_counter()
+        result = subprocess.check_output(tool_cmd, encoding='utf-8')
+        elapsed = time.perf_counter() - start
+        assert 'uid=user00000000,ou=people,{}'.format(DEFAULT_SUFFIX).lower() in result.lower()
+
+        per_entry.append(elapsed / count)
+        log.info('ds-replcheck offline, {} entries: {:.3f}s ({:.2f}us/entry)'.format(
+                 count, elapsed, elapsed / count * 1000000))
+        os.remove(master)
+        os.remove(replica)
+
+    scaling = per_entry[-1] / per_entry[0]
+    log.info('time per entry grew by {:.2f} between {} and {} entries'.format(scaling, SIZES[0], SIZES[-1]))
+    assert scaling < MAX_SCALING
+
+
+if __name__ == '__main__':
+    # Run isolated
+    # -s for DEBUG mode
+    CURRENT_FILE = os.path.realpath(__file__)
+    pytest.main("-s %s" % CURRENT_FILE)
@@ -23,7 +23,7 @@ from lib389.idm.group import Groups
 from lib389.idm.user import nsUserAccounts
 from lib389.backend import Backends
 
-from lib389.ldclt import Ldclt
+from lib389.loadgen import LoadGenerator, SearchLoad, BindLoad
 import time
 
 # We want to write a CSV such as:
@@ -39,6 +39,8 @@ USER_MAX = 6000
 
 TARGET_HOST = os.environ.get('PERF_TARGET_HOST', 'localhost')
 TARGET_PORT = os.environ.get('PERF_TARGET_PORT', '389')
+RESULTS_DIR = os.environ.get('PERF_RESULTS_DIR', '/tmp')
+LOAD_DURATION = int(os.environ.get('PERF_LOAD_DURATION', '30'))
 
 def assert_data_present(inst):
     # Do we have the backend marker?
@@ -69,25 +71,24 @@ def assert_data_present(inst):
 
     # Add 40,000 groups
     groups = Groups(inst, DEFAULT_SUFFIX)
-    for i in range(1,GROUP_MAX):
-        rdn = 'group_{0:07d}'.format(i)
-        groups.create(properties={
-            'cn': rdn,
-        })
+    results = groups.create_many([{'cn': 'group_{0:07d}'.format(i)} for i in range(1, GROUP_MAX)])
+    assert all(r.ok for r in results)
 
     # Add 60,000 users
     users = nsUserAccounts(inst, DEFAULT_SUFFIX)
-    for i in range(1,USER_MAX):
+    def user_properties(i):
         rdn = 'user_{0:07d}'.format(i)
-        users.create(properties={
+        return {
             'uid': rdn,
             'cn': rdn,
             'displayName': rdn,
-            'uidNumber' : '%s' % i,
-            'gidNumber' : '%s' % i,
-            'homeDirectory' : '/home/%s' % rdn,
+            'uidNumber': '%s' % i,
+            'gidNumber': '%s' % i,
+            'homeDirectory': '/home/%s' % rdn,
             'userPassword': rdn,
-        })
+        }
+    results = users.create_many([user_properties(i) for i in range(1, USER_MAX)])
+    assert all(r.ok for r in results)
 
     # Add the marker
     d.replace('description', TEST_MARKER)
@@ -122,9 +123,22 @@ def _do_search_performance(inst, thread_count):
     time.sleep(1)
     inst.config.set('nsslapd-threadnumber', str(thread_count))
     inst.restart()
-    ld = Ldclt(inst)
-    out = ld.search_loadtest(DEFAULT_SUFFIX, "(uid=user_XXXXXXX)", min=1, max=USER_MAX)
-    return out
+    gen = LoadGenerator(inst, [
+        SearchLoad(DEFAULT_SUFFIX, "(uid=user_{0:07d})", attrlist=['cn', 'uid', 'ou'],
+                   low=1, high=USER_MAX - 1, weight=9),
+        BindLoad("uid=user_{0:07d},ou=people," + DEFAULT_SUFFIX, "user_{0:07d}",
+                 low=1, high=USER_MAX - 1, weight=1),
+    ], reqcert=ldap.OPT_X_TLS_NEVER)
+    result = gen.run(duration=LOAD_DURATION)
+    name = os.path.join(RESULTS_DIR, 'search_performance_t%s' % thread_count)
+    result.write_json(name + '.json')
+    result.write_csv(name + '.csv', timeline_path=name + '_timeline.csv')
+    summary = result.summary()
+    for (op, stats) in summary.items():
+        print("%s: %s/sec p50 %sms p95 %sms p99 %sms max %sms, %s errors" % (
+              op, stats['rate'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms'],
+              stats['max_ms'], stats['errors']))
+    return summary
 
 # Need a check here
 def test_user_search_performance():
@@ -146,6 +160,9 @@ def test_user_search_performance():
     r6 = _do_search_performance(inst, 16)
     # print("category,t1,t4,t6,t8,t12,t16")
     # print("search,%s,%s,%s,%s,%s,%s" % (r1, r2, r3, r4, r5, r6))
+    for r in (r1, r6):
+        assert r['search']['count'] > 0
+        assert r['search']['errors'] == 0
 
 def test_group_search_performance():
     pass
@@ -11,6 +11,7 @@ import subprocess
 import pytest
 
 from lib389.cli_ctl.dbgen import *
+from lib389.dbgen import dbgen_users, dbgen_ldif2db
 from lib389.cos import CosClassicDefinitions, CosPointerDefinitions, CosIndirectDefinitions, CosTemplates
 from lib389.idm.account import Accounts
 from lib389.idm.group import Groups
@@ -781,6 +782,52 @@ def test_dsconf_dbgen_nested_ldif(topology_st, set_log_file_and_ldif):
     assert len(accounts.filter('(ou=*)')) > count_ou
 
 
+@pytest.mark.skipif(ds_is_older("1.4.3"), reason="Not implemented")
+def test_dbgen_users_sharded(topology_st, set_log_file_and_ldif):
+    """Test that the sharded user generation is reproducible, and can be
+    imported without an LDIF file
+
+        :id: 5e0b3c6a-2f4e-4d8b-9a71-0c8e6d1f4b27
+        :setup: Standalone instance
+        :steps:
+             1. Generate a users ldif with a seed, with one and with four processes
+             2. Check the ldifs are the same, with the parents before their children
+             3. Stream the generated users to an offline import
+             4. Check the users were imported
+        :expectedresults:
+             1. Success
+             2. Success
+             3. Success
+             4. Success
+        """
+
+    standalone = topology_st.standalone
+    number = 25000
+
+    log.info('Generate the same ldif with one and four processes')
+    assert dbgen_users(standalone, number, ldif_file, DEFAULT_SUFFIX, seed=42, jobs=1) == number + 8
+    with open(ldif_file) as f:
+        content = f.read()
+    dbgen_users(standalone, number, ldif_file, DEFAULT_SUFFIX, seed=42, jobs=4)
+    with open(ldif_file) as f:
+        assert f.read() == content
+
+    dns = [line[4:].lower() for line in content.splitlines() if line.startswith('dn: ')]
+    seen = set()
+    for dn in dns[1:]:
+        assert dn.split(',', 1)[1] in seen | {DEFAULT_SUFFIX.lower()}
+        seen.add(dn)
+
+    log.info('Stream the users to an offline import')
+    standalone.stop()
+    assert dbgen_ldif2db(standalone, DEFAULT_BENAME,
+                         lambda ldif: dbgen_users(standalone, number, ldif, DEFAULT_SUFFIX, seed=42, jobs=4))
+    standalone.start()
+
+    accounts = Accounts(standalone, DEFAULT_SUFFIX)
+    assert len(accounts.filter('(objectclass=inetorgperson)')) == number
+
+
 if __name__ == '__main__':
     # Run isolated
     # -s for DEBUG mode
@@ -166,11 +166,21 @@ def test_dsconf_replication_monitor(topology_m2, set_log_file):
     args.connections = connections
     args.aliases = None
     args.json = False
+    args.workers = 8
+    args.timeout = None
 
     log.info('Run replication monitor with connections option')
     get_repl_monitor_info(m1, DEFAULT_SUFFIX, log, args)
     check_value_in_log_and_reset(content_list, connection_content)
 
+    log.info('Run replication monitor with a single worker and a timeout')
+    args.workers = 1
+    args.timeout = 30
+    get_repl_monitor_info(m1, DEFAULT_SUFFIX, log, args)
+    check_value_in_log_and_reset(content_list, connection_content)
+    args.workers = 8
+    args.timeout = None
+
     log.info('Run replication monitor with aliases option')
     args.aliases = aliases
     get_repl_monitor_info(m1, DEFAULT_SUFFIX, log, args)
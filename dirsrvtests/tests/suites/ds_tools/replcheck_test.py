@@ -141,6 +141,12 @@ def replcheck_cmd_list(topo_tls_ldapi):
                          [ds_replcheck_path, 'online', '-b', DEFAULT_SUFFIX, '-D', DN_DM, '-w', PW_DM, '-l', '1',
                           '-m', 'ldapi://%2fvar%2frun%2fslapd-{}.socket'.format(m1.serverid), '--conflict',
                           '-r', 'ldapi://%2fvar%2frun%2fslapd-{}.socket'.format(m2.serverid)],
+                         [ds_replcheck_path, 'online', '-b', DEFAULT_SUFFIX, '-D', DN_DM, '-w', PW_DM, '-l', '1',
+                          '-m', 'ldap://{}:{}'.format(m1.host, m1.port), '--conflicts', '-j', '4',
+                          '-r', 'ldap://{}:{}'.format(m2.host, m2.port)],
+                         [ds_replcheck_path, 'online', '-b', DEFAULT_SUFFIX, '-D', DN_DM, '-w', PW_DM, '-l', '1',
+                          '-m', 'ldap://{}:{}'.format(m1.host, m1.port), '--conflicts', '-j', '2',
+                          '--shard-by', 'uniqueid', '-r', 'ldap://{}:{}'.format(m2.host, m2.port)],
                          [ds_replcheck_path, 'offline', '-b', DEFAULT_SUFFIX, '--conflicts', '--rid', '1',
                           '-m', '/tmp/export_{}.ldif'.format(m1.serverid),
                           '-r', '/tmp/export_{}.ldif'.format(m2.serverid)]]
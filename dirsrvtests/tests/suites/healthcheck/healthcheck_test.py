@@ -7,6 +7,7 @@
 # --- END COPYRIGHT BLOCK ---
 #
 
+import json
 import pytest
 import os
 from lib389.backend import Backends
@@ -404,6 +405,49 @@ def test_healthcheck_backend_missing_mapping_tree(topology_st):
     run_healthcheck_and_flush_log(topology_st, standalone, JSON_OUTPUT, json=True)
 
 
+@pytest.mark.skipif(ds_is_older("1.4.1"), reason="Not implemented")
+def test_healthcheck_timings(topology_st):
+    """Check that HealthCheck reports the wall time of each check, run in parallel
+
+    :id: 3f3c8b2e-5a7d-4c61-9e0f-2b8d6a4c1e57
+    :setup: Standalone instance
+    :steps:
+        1. Create DS instance
+        2. Use HealthCheck with --json and --timings options, on two workers
+        3. Use HealthCheck with --timings option
+    :expectedresults:
+        1. Success
+        2. The report and the timings of the checks are in the JSON output,
+           in the order of the checks
+        3. The timings are shown after the report
+    """
+
+    standalone = topology_st.standalone
+    checks = ['config:hr_timestamp', 'backends:userroot:search', 'dseldif:nsstate', 'logs:notes']
+    args = FakeArgs()
+    args.instance = standalone.serverid
+    args.verbose = standalone.verbose
+    args.list_errors = False
+    args.list_checks = False
+    args.check = checks
+    args.dry_run = False
+    args.json = True
+    args.timings = True
+    args.jobs = 2
+    args.timeout = 60
+
+    health_check_run(standalone, topology_st.logcap.log, args)
+    output = [json.loads(r.getMessage()) for r in topology_st.logcap.outputs if '"timings"' in r.getMessage()][0]
+    assert output['report'] == []
+    assert [t['check'] for t in output['timings']] == checks
+    assert all(t['status'] == 'ok' and t['time'] >= 0 for t in output['timings'])
+    topology_st.logcap.flush()
+
+    args.json = False
+    run_healthcheck_and_flush_log(topology_st, standalone, searched_list=['Check timings (slowest first):', CMD_OUTPUT],
+                                  check=checks)
+
+
 @pytest.mark.ds50873
 @pytest.mark.bz1796343
 @pytest.mark.skipif(ds_is_older("1.4.1"), reason="Not implemented")
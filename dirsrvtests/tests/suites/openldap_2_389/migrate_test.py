@@ -8,16 +8,20 @@
 #
 import pytest
 import os
+import logging
 from lib389.topologies import topology_st
 from lib389.password_plugins import PBKDF2Plugin
 from lib389.utils import ds_is_older
 from lib389.migrate.openldap.config import olConfig
 from lib389.migrate.openldap.config import olOverlayType
-from lib389.migrate.plan import Migration
+from lib389.migrate.plan import Migration, ImportTransformer
+from lib389.migrate.ldif import LdifMetadata, ldif_chunks, transform_ldif
 # from lib389.migrate.plan import *
 
 pytestmark = pytest.mark.tier1
 
+log = logging.getLogger(__name__)
+
 DATADIR1 = os.path.join(os.path.dirname(__file__), '../../data/openldap_2_389/1/')
 
 @pytest.mark.skipif(ds_is_older('1.4.3'), reason="Not implemented")
@@ -120,6 +124,45 @@ def test_migrate_openldap_slapdd_skip_elements(topology_st):
     # Check the schema that SHOULDNT be there.
 
 
+@pytest.mark.skipif(ds_is_older('1.4.3'), reason="Not implemented")
+@pytest.mark.parametrize('chunk_size', [1, 4096])
+def test_transform_ldif_parallel(tmp_path, chunk_size):
+    """Test the ldif transformed in chunks by worker processes is the same
+    as the ldif transformed in a single pass.
+
+    :id: 3f0c2b4e-7a61-4c1d-8e2f-5b9a6d4c1e70
+    :parametrized: yes
+    :setup: Data directory with an openldap ldif.
+    :steps:
+        1. Read the suffix of the ldif
+        2. Transform the ldif in a single pass
+        3. Transform the ldif in chunks with two processes
+
+    :expectedresults:
+        1. Only the first entry is read, and it is the suffix
+        2. Success
+        3. The output is the same
+    """
+
+    ldif_path = os.path.join(DATADIR1, 'example_com.slapcat.ldif')
+    meta = LdifMetadata([ldif_path], log)
+    assert meta.get_suffixes() == {'dc=example,dc=com': ldif_path}
+
+    serial_path = str(tmp_path / 'serial.ldif')
+    with open(ldif_path, 'r') as f_import:
+        with open(serial_path, 'w') as f_outport:
+            ImportTransformer(f_import, f_outport).parse()
+
+    parallel_path = str(tmp_path / 'parallel.ldif')
+    chunks = ldif_chunks(ldif_path, chunk_size)
+    assert sum(length for (offset, length) in chunks) == os.path.getsize(ldif_path)
+    transform_ldif(ldif_path, parallel_path, ImportTransformer, jobs=2, chunk_size=chunk_size)
+
+    with open(serial_path, 'r') as f_serial:
+        with open(parallel_path, 'r') as f_parallel:
+            assert f_serial.read() == f_parallel.read()
+
+
 
 
 
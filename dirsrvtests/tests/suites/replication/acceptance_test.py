@@ -15,6 +15,7 @@ from lib389.topologies import topology_m4 as topo_m4
 from lib389.topologies import topology_m2 as topo_m2
 from . import get_repl_entries
 from lib389.idm.user import UserAccount
+from lib389.idm.group import Groups
 from lib389.replica import ReplicationManager
 from lib389._constants import *
 
@@ -501,6 +502,36 @@ def test_warining_for_invalid_replica(topo_m4):
     log.info('Check the error log for the error')
     assert topo_m4.ms["master1"].ds_error_log.match('.*nsds5ReplicaBackoffMax.*10.*invalid.*')
 
+
+def test_replication_convergence(topo_m4):
+    """Check the convergence of a full mesh, and its latency per edge
+
+    :id: 0b6b5d0e-6f4a-4d9c-8a0b-2e1f7c3d9a41
+    :setup: MMR with four masters
+    :steps:
+        1. Wait for the convergence of all the masters
+        2. Check the latency of every edge is reported
+        3. Wait again, so the probes of the first run are replaced
+    :expectedresults:
+        1. Success
+        2. There is a latency for each of the 12 edges
+        3. Each master holds one probe per master
+    """
+    masters = list(topo_m4.ms.values())
+    repl = ReplicationManager(DEFAULT_SUFFIX)
+    latencies = repl.test_replication_topology(masters)
+    for (supplier, target), latency in sorted(latencies.items()):
+        log.info('{} -> {}: {}ms'.format(supplier, target, latency))
+    assert len(latencies) == len(masters) * (len(masters) - 1)
+    assert all(latency is not None and latency >= 0 for latency in latencies.values())
+
+    repl.wait_for_convergence(masters)
+    for m in masters:
+        group = Groups(m, basedn=DEFAULT_SUFFIX, rdn=None).get('replication_managers')
+        probes = [v for v in group.get_attr_vals_utf8('description') if v.startswith('convergence probe')]
+        assert len(probes) == len(masters)
+
+
 @pytest.mark.skipif(ds_is_older('1.4.4'), reason="Not implemented")
 def test_csngen_task(topo_m2):
     """Test csn generator test
@@ -57,6 +57,8 @@ from lib389._constants import *
 from lib389.properties import *
 from lib389._entry import Entry
 from lib389._ldifconn import LDIFConn
+from lib389._attr_cache import AttrCache
+from lib389._conn_pool import ConnectionPool
 from lib389.tools import DirSrvTools
 from lib389.utils import (
     ds_is_older,
@@ -404,6 +406,15 @@ class DirSrv(SimpleLDAPObject, object):
 
         self.confdir = None
 
+        # Attribute values read through this connection. Inactive until
+        # enabled, see lib389._attr_cache.
+        self.attr_cache = AttrCache()
+        # Connections to other servers, such as the consumers of the
+        # replication agreements, see lib389._conn_pool.
+        self.conn_pool = ConnectionPool(self)
+        # The arguments of the last open(), see open_clone()
+        self._open_args = None
+
         # We can't assume the paths state yet ...
         self.ds_paths = Paths(instance=self, local=False)
         # Set the default systemd status. This MAY be overidden in the setup utils
@@ -909,7 +920,7 @@ class DirSrv(SimpleLDAPObject, object):
         self.state = DIRSRV_STATE_ALLOCATED
 
     def open(self, uri=None, saslmethod=None, sasltoken=None, certdir=None, starttls=False, connOnly=False, reqcert=ldap.OPT_X_TLS_HARD,
-                usercert=None, userkey=None):
+                usercert=None, userkey=None, timeout=None):
         '''
             It opens a ldap bound connection to dirsrv so that online
             administrative tasks are possible.  It binds with the binddn
@@ -922,6 +933,7 @@ class DirSrv(SimpleLDAPObject, object):
             @param saslmethod - None, or GSSAPI
             @param sasltoken - The ldap.sasl token type to bind with.
             @param certdir - Certificate directory for TLS
+            @param timeout - Network and operation timeout in seconds, None to wait forever
             @return None
 
             @raise LDAPError
@@ -930,6 +942,8 @@ class DirSrv(SimpleLDAPObject, object):
         # Force our state offline to prevent paths from trying to search
         # cn=config while we startup.
         self.state = DIRSRV_STATE_OFFLINE
+        # The server may have been reconfigured while we were away.
+        self.ds_paths.refresh()
 
         if not uri:
             uri = self.toLDAPURL()
@@ -940,10 +954,18 @@ class DirSrv(SimpleLDAPObject, object):
         else:
             super(DirSrv, self).__init__(uri, trace_level=TRACE_LEVEL)
 
+        if timeout is not None:
+            self.set_option(ldap.OPT_NETWORK_TIMEOUT, timeout)
+            self.set_option(ldap.OPT_TIMEOUT, timeout)
+
         if certdir is None and self.isLocal:
             certdir = self.get_cert_dir()
             self.log.debug("Using dirsrv ca certificate %s", certdir)
 
+        self._open_args = {'uri': uri, 'saslmethod': saslmethod, 'sasltoken': sasltoken, 'certdir': certdir,
+                           'starttls': starttls, 'reqcert': reqcert, 'usercert': usercert, 'userkey': userkey,
+                           'timeout': timeout}
+
         if certdir is not None:
             """
             We have a certificate directory, so lets start up TLS negotiations
@@ -1034,6 +1056,26 @@ class DirSrv(SimpleLDAPObject, object):
         # Now that we're online, some of our methods may try to query the version online.
         self.__add_brookers__()
 
+    def open_clone(self):
+        """Open another connection to the server, the same way as this one was
+        opened: the same URI, TLS settings and bind, whether simple, SASL or
+        LDAPI autobind. The new connection is only bound, see connOnly of open().
+
+        :returns: A new bound DirSrv
+        :raises: ValueError - if this connection can't be reproduced
+        """
+        if self._open_args is None:
+            raise ValueError("The connection was not opened with open(), it can't be reproduced")
+        if self._open_args['sasltoken'] is not None:
+            raise ValueError("A connection bound with a SASL token can't be reproduced")
+        conn = self.clone({SER_ROOT_DN: self.binddn, SER_ROOT_PW: self.bindpw})
+        # The clone has to autobind over LDAPI as this connection did
+        conn.ldapi_enabled = self.ldapi_enabled
+        conn.ldapi_socket = self.ldapi_socket
+        conn.ldapi_autobind = getattr(self, 'ldapi_autobind', 'off')
+        conn.open(connOnly=True, **self._open_args)
+        return conn
+
     def close(self):
         '''
             It closes connection to dirsrv. Online administrative tasks are no
@@ -1051,6 +1093,8 @@ class DirSrv(SimpleLDAPObject, object):
             # Don't raise an error. Just move the state and return
             self.unbind_s(escapehatch='i am sure')
 
+        self.attr_cache.clear()
+        self.conn_pool.close()
         self.state = DIRSRV_STATE_OFFLINE
 
     def start(self, timeout=120, post_open=True):
@@ -2623,13 +2667,14 @@ class DirSrv(SimpleLDAPObject, object):
     # server is stopped)
     #
     def ldif2db(self, bename, suffixes, excludeSuffixes, encrypt,
-                import_file, import_cl=False):
+                import_file, import_cl=False, stdin=None):
         """
         @param bename - The backend name of the database to import
         @param suffixes - List/tuple of suffixes to import
         @param excludeSuffixes - List/tuple of suffixes to exclude from import
         @param encrypt - Perform attribute encryption
-        @param input_file - File to import: file
+        @param input_file - File to import: file, or "-" to read stdin
+        @param stdin - The file object to read when import_file is "-"
         @return - True if import succeeded
         """
         DirSrvTools.lib389User(user=DEFAULT_USER)
@@ -2643,7 +2688,7 @@ class DirSrv(SimpleLDAPObject, object):
             self.log.error("ldif2db: backend name or suffix missing")
             return False
 
-        if not os.path.isfile(import_file):
+        if import_file != '-' and not os.path.isfile(import_file):
             self.log.error("ldif2db: Can't find file: %s", import_file)
             return False
 
@@ -2671,7 +2716,7 @@ class DirSrv(SimpleLDAPObject, object):
             cmd.append('-R')
 
         try:
-            result = subprocess.check_output(cmd, encoding='utf-8')
+            result = subprocess.check_output(cmd, encoding='utf-8', stdin=stdin)
         except subprocess.CalledProcessError as e:
             self.log.debug("Command: %s failed with the return code %s and the error %s",
                            format_cmd_list(cmd), e.returncode, e.output)
@@ -0,0 +1,199 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+
+"""
+A bounded, time limited cache of attribute values read through a DirSrv
+connection. DSLdapObject consults it (when it is active) before issuing a
+base search for an attribute, and invalidates the entries of a DN whenever
+it writes to that DN.
+
+The cache is inactive by default, as lib389 can not see writes made by other
+connections. Use it for read heavy, short lived runs such as healthchecks:
+
+    with inst.attr_cache.active():
+        ...
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_ATTR_CACHE_SIZE = 4096
+DEFAULT_ATTR_CACHE_TTL = 30
+
+
+def _controls_key(controls):
+    """Build a hashable key for a list of request controls.
+
+    :returns: A tuple, or None if the controls can not be keyed
+    """
+    if not controls:
+        return ()
+    key = []
+    for c in controls:
+        try:
+            key.append((c.controlType, c.criticality, c.encodeControlValue()))
+        except Exception:
+            return None
+    return tuple(key)
+
+
+class AttrCache(object):
+    """An LRU cache of (dn, attr, filter, controls) -> values with a ttl.
+
+    :param maxsize: The maximum number of attribute values to hold
+    :type maxsize: int
+    :param ttl: How long in seconds a value may be served from the cache
+    :type ttl: int
+    """
+
+    def __init__(self, maxsize=DEFAULT_ATTR_CACHE_SIZE, ttl=DEFAULT_ATTR_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._enabled = False
+        self._bypass = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        """True if reads may be served from the cache"""
+        return self._enabled and self._bypass == 0
+
+    def enable(self, ttl=None):
+        """Start caching reads. Values already held are kept.
+
+        :param ttl: Override the ttl of the cache
+        :type ttl: int
+        """
+        if ttl is not None:
+            self.ttl = ttl
+        self._enabled = True
+
+    def disable(self):
+        """Stop caching reads and drop all cached values"""
+        self._enabled = False
+        self.clear()
+
+    @contextmanager
+    def active(self, ttl=None):
+        """Cache reads for the duration of the with block. The cache is
+        cleared on exit, unless it was already enabled on entry, and the
+        ttl it had on entry is restored.
+        """
+        was_enabled = self._enabled
+        old_ttl = self.ttl
+        self.enable(ttl)
+        try:
+            yield self
+        finally:
+            self.ttl = old_ttl
+            if not was_enabled:
+                self.disable()
+
+    @contextmanager
+    def bypass(self):
+        """Send all reads to the server for the duration of the with block"""
+        with self._lock:
+            self._bypass += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._bypass -= 1
+
+    def _key(self, dn, attr, filterstr, serverctrls, clientctrls):
+        sctrls = _controls_key(serverctrls)
+        cctrls = _controls_key(clientctrls)
+        if sctrls is None or cctrls is None:
+            return None
+        return (dn.lower(), attr.lower(), filterstr, sctrls, cctrls)
+
+    def get(self, dn, attr, filterstr, serverctrls=None, clientctrls=None):
+        """Get the cached values of an attribute
+
+        :returns: A list of values, or None on a miss
+        """
+        if not self.enabled or attr in ('*', '+'):
+            return None
+        key = self._key(dn, attr, filterstr, serverctrls, clientctrls)
+        if key is None:
+            return None
+        with self._lock:
+            item = self._data.get(key, None)
+            if item is not None:
+                (expires, values) = item
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return list(values)
+                del self._data[key]
+            self.misses += 1
+        return None
+
+    def put(self, dn, attr, filterstr, values, serverctrls=None, clientctrls=None):
+        """Store the values of an attribute, as returned by the server"""
+        if not self.enabled or attr in ('*', '+'):
+            return
+        key = self._key(dn, attr, filterstr, serverctrls, clientctrls)
+        if key is None:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, list(values))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, dn, subtree=False):
+        """Drop all cached values of a dn, and optionally of the entries below it
+
+        :param dn: The DN that was written to
+        :type dn: str
+        :param subtree: Also invalidate the children of dn
+        :type subtree: bool
+        """
+        if dn is None:
+            return
+        ldn = dn.lower()
+        with self._lock:
+            if len(self._data) == 0:
+                return
+            for key in list(self._data.keys()):
+                if key[0] == ldn or (subtree and key[0].endswith(',' + ldn)):
+                    del self._data[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        """Drop all cached values"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Get the cache statistics
+
+        :returns: dict
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': (float(self.hits) / lookups) if lookups > 0 else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
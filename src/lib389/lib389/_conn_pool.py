@@ -0,0 +1,197 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+
+"""
+A pool of bound connections from a DirSrv to other servers, keyed by
+(host, port, protocol, binddn). The replication agreements use the pool of
+their supplier to reach their consumers, so a status refresh opens one
+connection per consumer rather than a few per agreement.
+
+    with inst.conn_pool.connection(host, port, protocol, binddn, bindpw) as conn:
+        conn.search_s(...)
+
+Connections idle for longer than the idle timeout are closed, and the ones
+idle for longer than the check interval are checked with a whoami before
+they are handed out again. The pool is closed with its DirSrv.
+"""
+
+import ldap
+import threading
+import time
+from contextlib import contextmanager
+from lib389._constants import args_instance
+from lib389.properties import SER_HOST, SER_PORT, SER_SECURE_PORT, SER_ROOT_DN, SER_ROOT_PW
+
+# The maximum number of connections in use at once for one key
+DEFAULT_POOL_SIZE = 4
+# Idle connections are closed after this many seconds
+DEFAULT_POOL_IDLE_TIMEOUT = 60
+# Idle connections are checked before reuse after this many seconds
+DEFAULT_POOL_CHECK_INTERVAL = 5
+
+
+class ConnectionPool(object):
+    """A pool of connections to other servers, shared by the users of a DirSrv.
+
+    :param instance: The instance that owns the pool
+    :type instance: lib389.DirSrv
+    :param size: The maximum number of connections in use at once for one key
+    :type size: int
+    :param idle_timeout: Close the connections idle for this many seconds
+    :type idle_timeout: int
+    :param check_interval: Check the connections idle for this many seconds before reuse
+    :type check_interval: int
+    :param timeout: The network and operation timeout of new connections, None to wait forever
+    :type timeout: float
+    """
+
+    def __init__(self, instance, size=DEFAULT_POOL_SIZE, idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+                 check_interval=DEFAULT_POOL_CHECK_INTERVAL, timeout=None):
+        self._instance = instance
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.timeout = timeout
+        # key -> list of (last used, bindpw, connection), most recently used last
+        self._idle = {}
+        # key -> semaphore limiting the connections in use
+        self._slots = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def _key(self, host, port, protocol, binddn):
+        return (host.lower(), int(port), (protocol or 'ldap').lower(), binddn)
+
+    def _connect(self, host, port, protocol, binddn, bindpw):
+        # Imported here, as lib389 imports this module
+        from lib389 import DirSrv
+
+        conn = DirSrv(verbose=self._instance.verbose)
+        # args_instance is shared by the whole process, only change a copy
+        args_standalone = args_instance.copy()
+        args_standalone[SER_HOST] = host
+        if protocol == "ssl" or protocol == "ldaps":
+            args_standalone[SER_SECURE_PORT] = int(port)
+        else:
+            args_standalone[SER_PORT] = int(port)
+        args_standalone[SER_ROOT_DN] = binddn
+        args_standalone[SER_ROOT_PW] = bindpw
+        conn.allocate(args_standalone)
+        conn.open(timeout=self.timeout)
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except ldap.LDAPError:
+            pass
+        with self._lock:
+            self.discarded += 1
+
+    def _evict(self, now):
+        """Take the expired idle connections out of the pool
+
+        :returns: The list of connections to close
+        """
+        expired = []
+        for key, idle in self._idle.items():
+            while idle and now - idle[0][0] > self.idle_timeout:
+                expired.append(idle.pop(0)[2])
+        return expired
+
+    def _checkout(self, key, bindpw):
+        """Get an idle connection of a key, or None"""
+        now = time.monotonic()
+        with self._lock:
+            expired = self._evict(now)
+            idle = self._idle.get(key, [])
+            item = idle.pop() if idle else None
+        for conn in expired:
+            self._close(conn)
+        if item is None:
+            return None
+        (last_used, idle_bindpw, conn) = item
+        if idle_bindpw != bindpw:
+            # Don't hand out a connection bound with another password
+            self._close(conn)
+            return None
+        if now - last_used > self.check_interval:
+            try:
+                conn.whoami_s()
+            except ldap.LDAPError:
+                self._close(conn)
+                return None
+        with self._lock:
+            self.reused += 1
+        return conn
+
+    @contextmanager
+    def connection(self, host, port, protocol, binddn, bindpw):
+        """Borrow a bound connection for the duration of the with block.
+        If all the connections of the key are in use, wait for one.
+
+        :param host: The host name
+        :type host: str
+        :param port: The port
+        :type port: int
+        :param protocol: The transport: ldap, ldaps, ssl or tls
+        :type protocol: str
+        :param binddn: The DN to bind as
+        :type binddn: str
+        :param bindpw: The password of the bind DN
+        :type bindpw: str
+        :raises: ldap.LDAPError - if a new connection could not be opened
+        """
+        key = self._key(host, port, protocol, binddn)
+        with self._lock:
+            slots = self._slots.get(key)
+            if slots is None:
+                slots = self._slots[key] = threading.BoundedSemaphore(self.size)
+        with slots:
+            conn = self._checkout(key, bindpw)
+            if conn is None:
+                conn = self._connect(host, port, protocol, binddn, bindpw)
+            try:
+                yield conn
+            except (ldap.SERVER_DOWN, ldap.CONNECT_ERROR, ldap.TIMEOUT):
+                # The connection is unusable
+                self._close(conn)
+                raise
+            except BaseException:
+                self._checkin(key, bindpw, conn)
+                raise
+            self._checkin(key, bindpw, conn)
+
+    def _checkin(self, key, bindpw, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append((time.monotonic(), bindpw, conn))
+
+    def close(self):
+        """Close all the idle connections"""
+        with self._lock:
+            conns = [item[2] for idle in self._idle.values() for item in idle]
+            self._idle.clear()
+        for conn in conns:
+            self._close(conn)
+
+    def stats(self):
+        """Get the pool statistics
+
+        :returns: dict
+        """
+        with self._lock:
+            return {
+                'idle': sum(len(idle) for idle in self._idle.values()),
+                'opened': self.opened,
+                'reused': self.reused,
+                'discarded': self.discarded,
+            }
@@ -10,11 +10,17 @@
 import ldap
 import ldap.dn
 from ldap import filter as ldap_filter
+from ldap.controls import SimplePagedResultsControl
+from ldap.controls.readentry import PostReadControl
+from ldap.controls.sss import SSSRequestControl
+from ldap.controls.vlv import VLVRequestControl, VLVResponseControl
 import logging
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from lib389._entry import Entry
-from lib389._constants import DIRSRV_STATE_ONLINE
+from lib389._constants import DIRSRV_STATE_ONLINE, DN_LDBM
 from lib389._mapped_object_lint import DSLint, DSLints
 from lib389.utils import (
         ensure_bytes, ensure_str, ensure_int, ensure_list_bytes, ensure_list_str,
@@ -66,6 +72,181 @@ def _gen_filter(attrtypes, values, extra=None):
     return filt
 
 
+# The number of operations in flight on each connection of a bulk write
+DEFAULT_BULK_WINDOW = 64
+# The number of entries per page of iter_list and iter_filter
+DEFAULT_PAGE_SIZE = 500
+
+
+def _mods_to_modlist(mods):
+    """Check a list of mods as taken by apply_mods, and convert it to a
+    python-ldap modlist.
+
+    :param mods: [(action, key, value),] or [(ldap.MOD_DELETE, key),]
+    :type mods: list of tuples
+    :raises: ValueError - if a provided mod op is invalid
+    :returns: The modlist
+    """
+
+    mod_list = []
+    for mod in mods:
+        if len(mod) < 2:
+            # Error
+            raise ValueError('Not enough arguments in the mod op')
+        elif len(mod) == 2:  # no action
+            # This hack exists because the original lib389 Entry type
+            # does odd things.
+            action, key = mod
+            if action != ldap.MOD_DELETE:
+                raise ValueError('Only MOD_DELETE takes two arguments %s' % mod)
+            value = None
+            # Just add the raw mod, because we don't have a value
+            mod_list.append((action, key, value))
+        elif len(mod) == 3:
+            action, key, value = mod
+            if action != ldap.MOD_REPLACE and \
+               action != ldap.MOD_ADD and \
+               action != ldap.MOD_DELETE:
+                raise ValueError('Invalid mod action(%s)' % str(action))
+            if isinstance(value, list):
+                value = ensure_list_bytes(value)
+            else:
+                value = [ensure_bytes(value)]
+            mod_list.append((action, key, value))
+        else:
+            # Error too many items
+            raise ValueError('Too many arguments in the mod op')
+    return mod_list
+
+
+class BulkResult(object):
+    """The result of one operation of a bulk write, see
+    DSLdapObjects.create_many and apply_many.
+
+    :param obj: The object the operation was for
+    :type obj: DSLdapObject
+    :param error: The error of the operation, None if it succeeded
+    :type error: ldap.LDAPError
+    :param entry: The entry as read after the operation, if post_read was requested
+    :type entry: lib389._entry.Entry
+    """
+
+    def __init__(self, obj, error=None, entry=None):
+        self.obj = obj
+        self.error = error
+        self.entry = entry
+
+    @property
+    def ok(self):
+        """True if the operation succeeded"""
+        return self.error is None
+
+    def __repr__(self):
+        return '<BulkResult %s %s>' % (self.obj._dn, 'ok' if self.ok else self.error.__class__.__name__)
+
+
+def _bulk_write(instance, ops, window=DEFAULT_BULK_WINDOW, connections=1, post_read=None):
+    """Send adds and modifies asynchronously, with up to window of them in
+    flight on each connection, and collect their results.
+
+    With more than one connection, the operations are spread over the
+    connection of the instance and new ones opened the same way, see
+    DirSrv.open_clone(). If that is not possible, the connection of the
+    instance is used alone. The order of the operations is then only kept on
+    each connection, so an entry must not depend on another one of the same
+    bulk write.
+
+    :param instance: The instance to write to
+    :type instance: lib389.DirSrv
+    :param ops: The operations, (object, 'add_ext' or 'modify_ext', dn, modlist),
+                or (object, error) for the ones that failed before being sent
+    :type ops: list of tuples
+    :param window: The number of operations in flight on each connection
+    :type window: int
+    :param connections: The number of connections
+    :type connections: int
+    :param post_read: The attributes to read back with the post read control, or None
+    :type post_read: list of str
+    :returns: The list of BulkResult, in the order of ops
+    """
+
+    results = [None] * len(ops)
+    todo = iter(enumerate(ops))
+    lock = threading.Lock()
+    resp_ctrl_classes = {}
+    if post_read is not None:
+        resp_ctrl_classes[PostReadControl.controlType] = PostReadControl
+
+    def next_op():
+        with lock:
+            return next(todo, None)
+
+    def send(conn, obj, op, dn, modlist):
+        serverctrls = list(obj._server_controls or [])
+        if post_read is not None:
+            serverctrls.append(PostReadControl(criticality=True, attrList=post_read))
+        return getattr(conn, op)(dn, modlist, serverctrls=serverctrls, clientctrls=obj._client_controls)
+
+    def run(conn):
+        # msgid -> index of the operation
+        pending = {}
+        while True:
+            while len(pending) < window:
+                item = next_op()
+                if item is None:
+                    break
+                (idx, op) = item
+                if len(op) == 2:
+                    results[idx] = BulkResult(op[0], error=op[1])
+                    continue
+                try:
+                    pending[send(conn, *op)] = idx
+                except ldap.LDAPError as e:
+                    results[idx] = BulkResult(op[0], error=e)
+            if not pending:
+                return
+
+            error = None
+            ctrls = []
+            try:
+                (_, _, msgid, ctrls) = conn.result4(ldap.RES_ANY, all=1, resp_ctrl_classes=resp_ctrl_classes)
+            except ldap.LDAPError as e:
+                # The errors of an operation carry its msgid, the others are
+                # the errors of the connection.
+                msgid = e.args[0].get('msgid') if e.args and isinstance(e.args[0], dict) else None
+                if msgid not in pending:
+                    raise
+                error = e
+            idx = pending.pop(msgid)
+            entry = None
+            for ctrl in ctrls:
+                if isinstance(ctrl, PostReadControl):
+                    entry = Entry((ctrl.dn, ctrl.entry))
+            results[idx] = BulkResult(ops[idx][0], error=error, entry=entry)
+
+    conns = []
+    try:
+        if connections > 1:
+            try:
+                for i in range(connections - 1):
+                    conns.append(instance.open_clone())
+            except ValueError as e:
+                instance.log.debug("Using a single connection for the bulk write: %s" % e)
+        if not conns:
+            run(instance)
+            return results
+
+        # The instance connection does its share of the work
+        with ThreadPoolExecutor(max_workers=len(conns) + 1) as executor:
+            for future in [executor.submit(run, conn) for conn in [instance] + conns]:
+                future.result()
+    finally:
+        # Also close the clones already opened when opening another one fails
+        for conn in conns:
+            conn.close()
+    return results
+
+
 class DSLogging(object):
     """The benefit of this is automatic name detection, and correct application
     of level and verbosity to the object.
@@ -111,6 +292,10 @@ class DSLdapObject(DSLogging, DSLint):
         self._server_controls = None
         self._client_controls = None
         self._object_filter = '(objectClass=*)'
+        # A read-through snapshot of the entry, attached by DSLdapObjects.list()
+        # and filter() when called with an attrlist. See _hydrate.
+        self._entry_snapshot = None
+        self._entry_snapshot_attrs = None
 
     def __unicode__(self):
         val = self._dn
@@ -132,6 +317,52 @@ class DSLdapObject(DSLogging, DSLint):
                                            serverctrls=self._server_controls, clientctrls=self._client_controls,
                                            escapehatch='i am sure')[0]
 
+    def _hydrate(self, entry, attrlist):
+        """Attach a snapshot of the entry as returned by a search. Reads of
+        the attributes in attrlist are then served from the snapshot, rather
+        than from the server, until the next write or refresh().
+
+        :param entry: The entry returned by the search
+        :type entry: lib389._entry.Entry
+        :param attrlist: The attributes that were requested in the search
+        :type attrlist: list of str
+        """
+
+        self._entry_snapshot = entry
+        self._entry_snapshot_attrs = set([ensure_str(a).lower() for a in attrlist])
+
+    def refresh(self, subtree=False):
+        """Discard the entry snapshot (if any) and the values of this entry
+        held in the connection attribute cache, so that following reads are
+        made against the server.
+
+        :param subtree: Also invalidate cached values of the entries below this one
+        :type subtree: bool
+        """
+
+        self._entry_snapshot = None
+        self._entry_snapshot_attrs = None
+        cache = getattr(self._instance, 'attr_cache', None)
+        if cache is not None:
+            cache.invalidate(self._dn, subtree=subtree)
+        # Paths memoizes some cn=config values while online.
+        ds_paths = getattr(self._instance, 'ds_paths', None)
+        if ds_paths is not None and self._dn is not None:
+            ds_paths.refresh(self._dn)
+
+    def _snapshot_covers(self, key):
+        """Check if the entry snapshot can authoritatively answer for key"""
+
+        if self._entry_snapshot is None:
+            return False
+        if self._entry_snapshot.hasAttr(key):
+            # The server always returns all values of a returned attribute.
+            return True
+        attrs = self._entry_snapshot_attrs
+        # An absent attribute is only known to be absent if it was asked for
+        # by name, or if both user (*) and operational (+) attributes were.
+        return ensure_str(key).lower() in attrs or ('*' in attrs and '+' in attrs)
+
     def exists(self):
         """Check if the entry exists
 
@@ -244,10 +475,9 @@ class DSLdapObject(DSLogging, DSLint):
             raise ValueError("Invalid state. Cannot get presence on instance that is not ONLINE")
         self._log.debug("%s present(%r) %s" % (self._dn, attr, value))
 
-        self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter, attrlist=[attr, ],
-                                        serverctrls=self._server_controls, clientctrls=self._client_controls,
-                                        escapehatch='i am sure')[0]
-        values = self.get_attr_vals_bytes(attr)
+        # This raises NO_SUCH_OBJECT if the entry is missing, so the server
+        # is asked rather than the entry snapshot or the attribute cache.
+        values = ensure_list_bytes(self._read_attrs([attr], cached=False)[attr])
         self._log.debug("%s contains %s" % (self._dn, values))
 
         if value is None:
@@ -299,6 +529,7 @@ class DSLdapObject(DSLogging, DSLint):
             else:
                 value = [ensure_bytes(arg[1])]
             mods.append((ldap.MOD_REPLACE, ensure_str(arg[0]), value))
+        self.refresh()
         return self._instance.modify_ext_s(self._dn, mods, serverctrls=self._server_controls,
                                            clientctrls=self._client_controls, escapehatch='i am sure')
 
@@ -443,6 +674,7 @@ class DSLdapObject(DSLogging, DSLint):
         elif value is not None:
             value = [ensure_bytes(value)]
 
+        self.refresh()
         return self._instance.modify_ext_s(self._dn, [(action, key, value)],
                                            serverctrls=self._server_controls, clientctrls=self._client_controls,
                                            escapehatch='i am sure')
@@ -455,34 +687,8 @@ class DSLdapObject(DSLogging, DSLint):
         :raises: ValueError - if a provided mod op is invalid
         """
 
-        mod_list = []
-        for mod in mods:
-            if len(mod) < 2:
-                # Error
-                raise ValueError('Not enough arguments in the mod op')
-            elif len(mod) == 2:  # no action
-                # This hack exists because the original lib389 Entry type
-                # does odd things.
-                action, key = mod
-                if action != ldap.MOD_DELETE:
-                    raise ValueError('Only MOD_DELETE takes two arguments %s' % mod)
-                value = None
-                # Just add the raw mod, because we don't have a value
-                mod_list.append((action, key, value))
-            elif len(mod) == 3:
-                action, key, value = mod
-                if action != ldap.MOD_REPLACE and \
-                   action != ldap.MOD_ADD and \
-                   action != ldap.MOD_DELETE:
-                    raise ValueError('Invalid mod action(%s)' % str(action))
-                if isinstance(value, list):
-                    value = ensure_list_bytes(value)
-                else:
-                    value = [ensure_bytes(value)]
-                mod_list.append((action, key, value))
-            else:
-                # Error too many items
-                raise ValueError('Too many arguments in the mod op')
+        mod_list = _mods_to_modlist(mods)
+        self.refresh()
         return self._instance.modify_ext_s(self._dn, mod_list, serverctrls=self._server_controls, clientctrls=self._client_controls, escapehatch='i am sure')
 
     def _unsafe_compare_attribute(self, other):
@@ -568,6 +774,14 @@ class DSLdapObject(DSLogging, DSLint):
 
         return compare_attrs_dict
 
+    def _get_all_attrs_entry(self):
+        if self._entry_snapshot is not None and \
+           set(['*', '+']).issubset(self._entry_snapshot_attrs):
+            return self._entry_snapshot
+        return self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                           attrlist=["*", "+"], serverctrls=self._server_controls,
+                                           clientctrls=self._client_controls, escapehatch='i am sure')[0]
+
     def get_all_attrs(self, use_json=False):
         """Get a dictionary having all the attributes of the entry
 
@@ -579,9 +793,7 @@ class DSLdapObject(DSLogging, DSLint):
             raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
         else:
             # retrieving real(*) and operational attributes(+)
-            attrs_entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                      attrlist=["*", "+"], serverctrls=self._server_controls,
-                                                      clientctrls=self._client_controls, escapehatch='i am sure')[0]
+            attrs_entry = self._get_all_attrs_entry()
             # getting dict from 'entry' object
             attrs_dict = attrs_entry.data
             # Should we normalise the attr names here to lower()?
@@ -599,33 +811,62 @@ class DSLdapObject(DSLogging, DSLint):
             raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
         else:
             # retrieving real(*) and operational attributes(+)
-            attrs_entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                      attrlist=["*", "+"], serverctrls=self._server_controls,
-                                                      clientctrls=self._client_controls, escapehatch='i am sure')[0]
+            attrs_entry = self._get_all_attrs_entry()
             # getting dict from 'entry' object
             r = {}
             for (k, vo) in attrs_entry.data.items():
                 r[k] = ensure_list_str(vo)
             return r
 
+    def _read_attrs(self, keys, cached=True):
+        """Get the values of keys, from the entry snapshot, then the connection
+        attribute cache, and finally from the server for whatever is left.
+
+        :param cached: False to read all the keys from the server
+        :returns: dict of key: list of values
+        """
+        keys = list(keys)
+        if cached and all([self._snapshot_covers(k) for k in keys]):
+            self._log.debug("%s snapshot hit (%r)" % (self._dn, keys))
+            return self._entry_snapshot.getValuesSet(keys)
+
+        result = {}
+        missing = []
+        cache = getattr(self._instance, 'attr_cache', None)
+        for k in keys:
+            vals = None
+            if cache is not None and cached:
+                vals = cache.get(self._dn, k, self._object_filter,
+                                 self._server_controls, self._client_controls)
+            if vals is None:
+                missing.append(k)
+            else:
+                result[k] = vals
+        if len(missing) > 0:
+            # It would be good to prevent the entry code intercepting this ....
+            # We have to do this in this method, because else we ignore the scope base.
+            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                                attrlist=missing, serverctrls=self._server_controls,
+                                                clientctrls=self._client_controls, escapehatch='i am sure')[0]
+            for k in missing:
+                result[k] = entry.getValues(k)
+                if cache is not None:
+                    cache.put(self._dn, k, self._object_filter, result[k],
+                              self._server_controls, self._client_controls)
+        return result
+
     def get_attrs_vals(self, keys, use_json=False):
         self._log.debug("%s get_attrs_vals(%r)" % (self._dn, keys))
         if self._instance.state != DIRSRV_STATE_ONLINE:
             raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
         else:
-            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                attrlist=keys, serverctrls=self._server_controls,
-                                                clientctrls=self._client_controls, escapehatch='i am sure')[0]
-            return entry.getValuesSet(keys)
+            return self._read_attrs(keys)
 
     def get_attrs_vals_utf8(self, keys, use_json=False):
         self._log.debug("%s get_attrs_vals_utf8(%r)" % (self._dn, keys))
         if self._instance.state != DIRSRV_STATE_ONLINE:
             raise ValueError("Invalid state. Cannot get properties on instance that is not ONLINE")
-        entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter, attrlist=keys,
-                                            serverctrls=self._server_controls, clientctrls=self._client_controls,
-                                            escapehatch='i am sure')[0]
-        vset = entry.getValuesSet(keys)
+        vset = self._read_attrs(keys)
         r = {}
         for (k, vo) in vset.items():
             r[k] = ensure_list_str(vo)
@@ -639,12 +880,7 @@ class DSLdapObject(DSLogging, DSLint):
             # In the future, I plan to add a mode where if local == true, we
             # can use get on dse.ldif to get values offline.
         else:
-            # It would be good to prevent the entry code intercepting this ....
-            # We have to do this in this method, because else we ignore the scope base.
-            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                attrlist=[key], serverctrls=self._server_controls,
-                                                clientctrls=self._client_controls, escapehatch='i am sure')[0]
-            vals = entry.getValues(key)
+            vals = self._read_attrs([key])[key]
             if use_json:
                 result = {key: []}
                 for val in vals:
@@ -661,10 +897,10 @@ class DSLdapObject(DSLogging, DSLint):
             # In the future, I plan to add a mode where if local == true, we
             # can use get on dse.ldif to get values offline.
         else:
-            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
-                                                attrlist=[key], serverctrls=self._server_controls,
-                                                clientctrls=self._client_controls, escapehatch='i am sure')[0]
-            return entry.getValue(key)
+            vals = self._read_attrs([key])[key]
+            if len(vals) == 0:
+                return None
+            return vals[0]
 
     def get_attr_val_bytes(self, key, use_json=False):
         """Get a single attribute value from the entry in bytes type
@@ -792,6 +1028,7 @@ class DSLdapObject(DSLogging, DSLint):
         if self._protected:
             return
 
+        self.refresh(subtree=True)
         self._instance.rename_s(self._dn, new_rdn, newsuperior,
                                 serverctrls=self._server_controls, clientctrls=self._client_controls,
                                 delold=deloldrdn, escapehatch='i am sure')
@@ -803,6 +1040,7 @@ class DSLdapObject(DSLogging, DSLint):
             # Replace the rdn
             old_dn_parts[0] = new_rdn
             self._dn = ",".join(old_dn_parts)
+        self.refresh(subtree=True)
         assert self.exists()
 
         # assert we actually got the change right ....
@@ -814,6 +1052,7 @@ class DSLdapObject(DSLogging, DSLint):
 
         self._log.debug("%s delete" % (self._dn))
         if not self._protected:
+            self.refresh(subtree=recursive)
             # Is there a way to mark this as offline and kill it
             if recursive:
                 filterstr = "(|(objectclass=*)(objectclass=ldapsubentry))"
@@ -914,6 +1153,7 @@ class DSLdapObject(DSLogging, DSLint):
         self._log.debug('Validated dn {}'.format(dn))
 
         exists = False
+        self.refresh()
 
         if ensure:
             # If we are running in stateful ensure mode, we need to check if the object exists, and
@@ -956,6 +1196,20 @@ class DSLdapObject(DSLogging, DSLint):
             raise AssertionError("Impossible State Reached in _create")
         return self
 
+    def _add_op(self, rdn, properties, basedn):
+        """Validate a create request as _create does, and build the add
+        operation of a bulk write. See DSLdapObjects.create_many.
+
+        :returns: ('add_ext', dn, modlist)
+        """
+        assert(len(self._create_objectclasses) > 0)
+        (dn, valid_props) = self._validate(rdn, properties, ensure_str(basedn))
+        e = Entry(dn)
+        e.update({'objectclass': ensure_list_bytes(self._create_objectclasses)})
+        e.update(valid_props)
+        self._dn = dn
+        return ('add_ext', dn, e.toTupleList())
+
     def create(self, rdn=None, properties=None, basedn=None):
         """Add a new entry
 
@@ -1032,10 +1286,163 @@ class DSLdapObjects(DSLogging, DSLints):
         # functions with very little work on the behalf of the overloader
         return self._childobject(instance=self._instance, dn=dn)
 
-    def list(self):
+    def _search_attrlist(self, attrlist=None):
+        if attrlist is None:
+            return self._list_attrlist
+        return self._list_attrlist + [a for a in attrlist if a not in self._list_attrlist]
+
+    def _results_to_instances(self, results, attrlist=None):
+        insts = []
+        for r in results:
+            inst = self._entry_to_instance(dn=r.dn, entry=r)
+            if attrlist is not None:
+                inst._hydrate(r, self._search_attrlist(attrlist))
+            insts.append(inst)
+        return insts
+
+    def _find_vlv_index(self, filterstr, scope, sort):
+        """Check if a VLV index serves a search of our base DN, sorted by sort
+
+        :returns: True if there is one
+        """
+
+        sort = ' '.join(sort).lower()
+        try:
+            searches = self._instance.search_ext_s(DN_LDBM, ldap.SCOPE_SUBTREE, '(objectClass=vlvSearch)',
+                                                   attrlist=['vlvBase', 'vlvScope', 'vlvFilter'],
+                                                   escapehatch='i am sure')
+        except ldap.LDAPError:
+            return False
+        for search in searches:
+            if ldap.dn.str2dn(ensure_str(search.getValue('vlvBase')).lower()) != ldap.dn.str2dn(self._basedn.lower()) or \
+               ensure_int(search.getValue('vlvScope')) != scope or \
+               ensure_str(search.getValue('vlvFilter')).replace(' ', '').lower() != filterstr.replace(' ', '').lower():
+                continue
+            indexes = self._instance.search_ext_s(search.dn, ldap.SCOPE_ONELEVEL, '(objectClass=vlvIndex)',
+                                                  attrlist=['vlvSort'], escapehatch='i am sure')
+            if any(ensure_str(index.getValue('vlvSort')).lower() == sort for index in indexes):
+                return True
+        return False
+
+    def _search_page(self, filterstr, scope, attrlist, ctrls):
+        """Run one search with the paging controls
+
+        :returns: The results and the response controls
+        """
+
+        msgid = self._instance.search_ext(self._basedn, scope, filterstr, attrlist=attrlist,
+                                          serverctrls=list(self._server_controls or []) + ctrls,
+                                          clientctrls=self._client_controls)
+        (_, rdata, _, rctrls) = self._instance.result3(msgid, resp_ctrl_classes={
+            SimplePagedResultsControl.controlType: SimplePagedResultsControl,
+            VLVResponseControl.controlType: VLVResponseControl,
+        })
+        # Skip the references
+        return ([Entry(r) for r in rdata if r[0] is not None], rctrls)
+
+    def _iter_vlv(self, filterstr, scope, attrlist, page_size, sort):
+        # Read the sorted results through a VLV index, a window at a time
+        sss = SSSRequestControl(criticality=True, ordering_rules=sort)
+        offset = 1
+        count = 0
+        while True:
+            vlv = VLVRequestControl(criticality=True, before_count=0, after_count=page_size - 1,
+                                    offset=offset, content_count=count)
+            (results, rctrls) = self._search_page(filterstr, scope, attrlist, [sss, vlv])
+            responses = [c for c in rctrls if c.controlType == VLVResponseControl.controlType]
+            if not responses or responses[0].result != 0:
+                raise ldap.UNWILLING_TO_PERFORM('The VLV search failed')
+            count = responses[0].content_count
+            yield results
+            offset += page_size
+            if not results or offset > count:
+                return
+
+    def _iter_paged(self, filterstr, scope, attrlist, page_size, sort):
+        # Read the results with the simple paged results control, a page at a time
+        paging = SimplePagedResultsControl(True, size=page_size, cookie='')
+        ctrls = [paging]
+        if sort is not None:
+            # Without a VLV index the server sorts all the candidates
+            ctrls.append(SSSRequestControl(criticality=False, ordering_rules=sort))
+        try:
+            while True:
+                (results, rctrls) = self._search_page(filterstr, scope, attrlist, ctrls)
+                cookies = [c.cookie for c in rctrls if c.controlType == SimplePagedResultsControl.controlType]
+                paging.cookie = cookies[0] if cookies else ''
+                yield results
+                if not paging.cookie:
+                    return
+        finally:
+            if paging.cookie:
+                # The iteration was stopped early, release the paged search
+                paging.size = 0
+                try:
+                    self._search_page(filterstr, scope, attrlist, ctrls)
+                except ldap.LDAPError:
+                    pass
+
+    def _iter_search(self, filterstr, scope, attrlist, page_size, sort):
+        """Search one page at a time, and yield the objects of each page as
+        it arrives. With a sort order, use a VLV index if one matches the
+        search, or else let the server sort the paged search.
+        """
+
+        if isinstance(sort, str):
+            sort = [sort]
+        search_attrlist = self._search_attrlist(attrlist)
+        pages = None
+        if sort is not None and self._find_vlv_index(filterstr, scope, sort):
+            pages = self._iter_vlv(filterstr, scope, search_attrlist, page_size, sort)
+            try:
+                first = next(pages)
+            except (StopIteration, ldap.NO_SUCH_OBJECT):
+                return
+            except (ldap.UNWILLING_TO_PERFORM, ldap.UNAVAILABLE_CRITICAL_EXTENSION,
+                    ldap.VLV_ERROR, ldap.SORT_CONTROL_MISSING) as e:
+                self._log.debug('VLV search failed, using a paged search: %s' % e)
+                pages = None
+            else:
+                yield from self._results_to_instances(first, attrlist)
+        if pages is None:
+            pages = self._iter_paged(filterstr, scope, search_attrlist, page_size, sort)
+        try:
+            for results in pages:
+                yield from self._results_to_instances(results, attrlist)
+        except ldap.NO_SUCH_OBJECT:
+            # There are no objects to select from
+            return
+
+    def iter_list(self, attrlist=None, page_size=DEFAULT_PAGE_SIZE, sort=None):
+        """Iterate over the children entries, as list() does, but fetch them a page at a
+        time, so memory use does not grow with the number of entries and the size limit
+        does not apply. The objects of each page are yielded as soon as it arrives.
+
+        :param attrlist: Attributes to fetch with the entries, as in list()
+        :type attrlist: list of str
+        :param page_size: The number of entries per page
+        :type page_size: int
+        :param sort: An attribute or a list of attributes to sort by, "-attr" to reverse.
+                     A matching VLV index is used if there is one.
+        :type sort: str or list of str
+        :returns: A generator of children entries
+        """
+
+        filterstr = self._get_objectclass_filter()
+        self._log.debug('iter_list filter = %s' % filterstr)
+        return self._iter_search(filterstr, self._scope, attrlist, page_size, sort)
+
+    def list(self, attrlist=None):
         """Get a list of children entries (DSLdapObject, Replica, etc.) using a base DN
         and objectClasses of our object (DSLdapObjects, Replicas, etc.)
 
+        If attrlist is given, those attributes are fetched in the same search,
+        and the returned objects answer reads of them from that snapshot
+        until they are written to or refresh() is called. ['*', '+'] snapshots
+        the whole entry.
+
+        :param attrlist: Attributes to fetch with the entries
+        :type attrlist: list of str
         :returns: A list of children entries
         """
 
@@ -1049,12 +1456,12 @@ class DSLdapObjects(DSLogging, DSLints):
                 base=self._basedn,
                 scope=self._scope,
                 filterstr=filterstr,
-                attrlist=self._list_attrlist,
+                attrlist=self._search_attrlist(attrlist),
                 serverctrls=self._server_controls, clientctrls=self._client_controls,
                 escapehatch='i am sure'
             )
             # def __init__(self, instance, dn=None):
-            insts = [self._entry_to_instance(dn=r.dn, entry=r) for r in results]
+            insts = self._results_to_instances(results, attrlist)
         except ldap.NO_SUCH_OBJECT:
             # There are no objects to select from, se we return an empty array
             insts = []
@@ -1190,7 +1597,108 @@ class DSLdapObjects(DSLogging, DSLints):
         # Now actually commit the creation req
         return co.ensure_state(rdn, properties, self._basedn)
 
-    def filter(self, search, scope=None):
+    def create_many(self, entries, window=DEFAULT_BULK_WINDOW, connections=1, post_read=None):
+        """Create many objects under base DN of our entry. The adds are sent
+        asynchronously, with up to window of them in flight on each connection,
+        rather than waiting for each of them in turn.
+
+        The entries are validated as in create(), but a type that overrides
+        create() with extra steps is created without them. An error does not
+        stop the other adds: check the result of each entry.
+
+        :param entries: The properties of the new entries, or (rdn, properties) tuples
+        :type entries: list
+        :param window: The number of adds in flight on each connection
+        :type window: int
+        :param connections: The number of connections to spread the adds over, see DirSrv.open_clone().
+                            The entries must then not depend on one another.
+        :type connections: int
+        :param post_read: Attributes to read back from the new entries with the post read control
+        :type post_read: list of str
+        :returns: A list of BulkResult, in the order of entries
+        """
+
+        ops = []
+        for item in entries:
+            if isinstance(item, tuple):
+                (rdn, properties) = item
+            else:
+                (rdn, properties) = (None, item)
+            co = self._entry_to_instance(dn=None, entry=None)
+            # Make the rdn naming attr available
+            self._rdn_attribute = co._rdn_attribute
+            try:
+                (rdn, properties) = self._validate(rdn, properties)
+                ops.append((co,) + co._add_op(rdn, properties, self._basedn))
+            except ldap.LDAPError as e:
+                ops.append((co, e))
+        return _bulk_write(self._instance, ops, window, connections, post_read)
+
+    def apply_many(self, changes, window=DEFAULT_BULK_WINDOW, connections=1, post_read=None):
+        """Modify many entries, as with apply_mods. The modifies are sent
+        asynchronously, with up to window of them in flight on each connection.
+        An error does not stop the other modifies: check the result of each entry.
+
+        :param changes: (dn or object, mods) tuples, mods as taken by apply_mods
+        :type changes: list
+        :param window: The number of modifies in flight on each connection
+        :type window: int
+        :param connections: The number of connections to spread the modifies over, see DirSrv.open_clone().
+                            The changes of one entry may then be applied out of order.
+        :type connections: int
+        :param post_read: Attributes to read back from the entries with the post read control
+        :type post_read: list of str
+        :returns: A list of BulkResult, in the order of changes
+        """
+
+        ops = []
+        for (obj, mods) in changes:
+            if not isinstance(obj, DSLdapObject):
+                obj = self._entry_to_instance(dn=ensure_str(obj))
+            # Invalid mods raise before anything is sent
+            mod_list = _mods_to_modlist(mods)
+            obj.refresh()
+            ops.append((obj, 'modify_ext', obj._dn, mod_list))
+        return _bulk_write(self._instance, ops, window, connections, post_read)
+
+    def iter_filter(self, search, scope=None, attrlist=None, page_size=DEFAULT_PAGE_SIZE, sort=None):
+        """Iterate over the children entries matching an additional filter, as
+        filter() does, but fetch them a page at a time. See iter_list.
+
+        :param search: An additional filter to apply, or None
+        :type search: str
+        :param scope: The search scope, defaults to the scope of the object
+        :type scope: int
+        :param attrlist: Attributes to fetch with the entries, as in list()
+        :type attrlist: list of str
+        :param page_size: The number of entries per page
+        :type page_size: int
+        :param sort: An attribute or a list of attributes to sort by, as in iter_list
+        :type sort: str or list of str
+        :returns: A generator of children entries
+        """
+
+        if search:
+            search_filter = _gen_and([self._get_objectclass_filter(), search])
+        else:
+            search_filter = self._get_objectclass_filter()
+        if scope is None:
+            scope = self._scope
+        self._log.debug(f'iter_filter filter = {search_filter} with scope {scope}')
+        return self._iter_search(search_filter, scope, attrlist, page_size, sort)
+
+    def filter(self, search, scope=None, attrlist=None):
+        """Get a list of children entries matching an additional filter.
+
+        :param search: An additional filter to apply, or None
+        :type search: str
+        :param scope: The search scope, defaults to the scope of the object
+        :type scope: int
+        :param attrlist: Attributes to fetch with the entries, as in list()
+        :type attrlist: list of str
+        :returns: A list of children entries
+        """
+
         # This will yield and & filter for objectClass with as many terms as needed.
         if search:
             search_filter = _gen_and([self._get_objectclass_filter(), search])
@@ -1204,11 +1712,11 @@ class DSLdapObjects(DSLogging, DSLints):
                 base=self._basedn,
                 scope=scope,
                 filterstr=search_filter,
-                attrlist=self._list_attrlist,
+                attrlist=self._search_attrlist(attrlist),
                 serverctrls=self._server_controls, clientctrls=self._client_controls
             )
             # def __init__(self, instance, dn=None):
-            insts = [self._entry_to_instance(dn=r.dn, entry=r) for r in results]
+            insts = self._results_to_instances(results, attrlist)
         except ldap.NO_SUCH_OBJECT:
             # There are no objects to select from, se we return an empty array
             insts = []
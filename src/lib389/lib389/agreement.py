@@ -12,6 +12,7 @@ import time
 import six
 import json
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from lib389._constants import *
 from lib389.properties import *
 from lib389._entry import FormatDict
@@ -143,74 +144,79 @@ class Agreement(DSLdapObject):
         :type bindpw: str
         :returns: CSN string if found, otherwise "Unavailable" is returned
         """
+        consumer = self._get_consumer(binddn, bindpw)
+        suffix = self.get_attr_val_utf8(REPL_ROOT)
+
+        # Get the replica id from supplier to compare to the consumer's rid
+        from lib389.replica import Replicas
+        replicas = Replicas(self._instance)
+        replica = replicas.get(suffix)
+        rid = replica.get_attr_val_utf8(REPL_ID)
+
+        return self._read_consumer_maxcsn(consumer, suffix, rid)
+
+    def _get_consumer(self, binddn=None, bindpw=None):
+        """Get the details needed to connect to the consumer
+        :returns: tuple(host, port, protocol, binddn, bindpw)
+        """
         host = self.get_attr_val_utf8(AGMT_HOST)
         port = self.get_attr_val_utf8(AGMT_PORT)
-        suffix = self.get_attr_val_utf8(REPL_ROOT)
         protocol = self.get_attr_val_utf8('nsds5replicatransportinfo').lower()
 
-        result_msg = "Unavailable"
-
         # If we are using LDAPI we need to provide the credentials, otherwise
         # use the existing credentials
         if binddn is None:
             binddn = self._instance.binddn
         if bindpw is None:
             bindpw = self._instance.bindpw
+        return (host, port, protocol, binddn, bindpw)
+
+    def _read_consumer_maxcsn(self, consumer, suffix, rid):
+        """Read the maxcsn of a replica id from the database RUV entry of the
+        consumer. It only uses the connection pool of the instance, so it
+        can run in several threads at once.
+        :param consumer: The consumer details, see _get_consumer()
+        :type consumer: tuple
+        :returns: CSN string if found, otherwise "Unavailable" is returned
+        """
+        (host, port, protocol, binddn, bindpw) = consumer
+        result_msg = "Unavailable"
 
-        # Get the replica id from supplier to compare to the consumer's rid
-        from lib389.replica import Replicas
-        replicas = Replicas(self._instance)
-        replica = replicas.get(suffix)
-        rid = replica.get_attr_val_utf8(REPL_ID)
-
-        # Open a connection to the consumer
-        consumer = DirSrv(verbose=self._instance.verbose)
-        args_instance[SER_HOST] = host
-        if protocol == "ssl" or protocol == "ldaps":
-            args_instance[SER_SECURE_PORT] = int(port)
-        else:
-            args_instance[SER_PORT] = int(port)
-        args_instance[SER_ROOT_DN] = binddn
-        args_instance[SER_ROOT_PW] = bindpw
-        args_standalone = args_instance.copy()
-        consumer.allocate(args_standalone)
-        try:
-            consumer.open()
-        except ldap.INVALID_CREDENTIALS as e:
-            raise(e)
-        except ldap.LDAPError as e:
-            self._log.debug('Connection to consumer ({}:{}) failed, error: {}'.format(host, port, e))
-            return result_msg
-
-        # Search for the tombstone RUV entry
+        # Borrow a connection to the consumer from the pool of the supplier
         try:
-            entry = consumer.search_s(suffix, ldap.SCOPE_SUBTREE,
+            with self._instance.conn_pool.connection(host, port, protocol, binddn, bindpw) as conn:
+                # Search for the tombstone RUV entry
+                entry = conn.search_s(suffix, ldap.SCOPE_SUBTREE,
                                       REPLICA_RUV_FILTER, ['nsds50ruv'])
-            if not entry:
-                self._log.debug("Failed to retrieve database RUV entry from consumer")
-            else:
-                elements = ensure_list_str(entry[0].getValues('nsds50ruv'))
-                for ruv in elements:
-                    if ('replica %s ' % rid) in ruv:
-                        ruv_parts = ruv.split()
-                        if len(ruv_parts) == 5:
-                            result_msg = ruv_parts[4]
-                        break
         except ldap.INVALID_CREDENTIALS as e:
             raise(e)
         except ldap.LDAPError as e:
             self._log.debug('Failed to search for the suffix ' +
-                                     '({}) consumer ({}:{}) failed, error: {}'.format(
-                                         suffix, host, port, e))
-        consumer.close()
+                            '({}) consumer ({}:{}) failed, error: {}'.format(
+                                suffix, host, port, e))
+            return result_msg
+
+        if not entry:
+            self._log.debug("Failed to retrieve database RUV entry from consumer")
+        else:
+            elements = ensure_list_str(entry[0].getValues('nsds50ruv'))
+            for ruv in elements:
+                if ('replica %s ' % rid) in ruv:
+                    ruv_parts = ruv.split()
+                    if len(ruv_parts) == 5:
+                        result_msg = ruv_parts[4]
+                    break
         return result_msg
 
-    def get_agmt_status(self, binddn=None, bindpw=None, return_json=False):
+    def get_agmt_status(self, binddn=None, bindpw=None, return_json=False, consumer_maxcsn=None):
         """Return the status message
         :param binddn: Specifies a specific bind DN to use when contacting the remote consumer
         :type binddn: str
         :param bindpw: Password for the bind DN
         :type bindpw: str
+        :param consumer_maxcsn: The consumer maxcsn if it was already read,
+                                see Agreements.get_consumer_maxcsns()
+        :type consumer_maxcsn: str
         :returns: A status message about the replication agreement
         """
         con_maxcsn = "Unknown"
@@ -219,7 +225,10 @@ class Agreement(DSLdapObject):
             agmt_status = json.loads(self.get_attr_val_utf8_l(AGMT_UPDATE_STATUS_JSON))
             if agmt_maxcsn is not None:
                 try:
-                    con_maxcsn = self.get_consumer_maxcsn(binddn=binddn, bindpw=bindpw)
+                    if consumer_maxcsn is None:
+                        con_maxcsn = self.get_consumer_maxcsn(binddn=binddn, bindpw=bindpw)
+                    else:
+                        con_maxcsn = consumer_maxcsn
                     if con_maxcsn:
                         if agmt_maxcsn == con_maxcsn:
                             if return_json:
@@ -263,7 +272,7 @@ class Agreement(DSLdapObject):
         except ldap.LDAPError as e:
             raise ValueError(str(e))
 
-    def get_lag_time(self, suffix, agmt_name, binddn=None, bindpw=None):
+    def get_lag_time(self, suffix, agmt_name, binddn=None, bindpw=None, consumer_maxcsn=None):
         """Get the lag time between the supplier and the consumer
         :param suffix: The replication suffix
         :type suffix: str
@@ -273,13 +282,19 @@ class Agreement(DSLdapObject):
         :type binddn: str
         :param bindpw: Password for the bind DN
         :type bindpw: str
+        :param consumer_maxcsn: The consumer maxcsn if it was already read,
+                                see Agreements.get_consumer_maxcsns()
+        :type consumer_maxcsn: str
         :returns: A time-formated string of the the replication lag (HH:MM:SS).
         :raises: ValueError - if unable to get consumer's maxcsn
         """
 
         try:
             agmt_maxcsn = self.get_agmt_maxcsn()
-            con_maxcsn = self.get_consumer_maxcsn(binddn=binddn, bindpw=bindpw)
+            if consumer_maxcsn is None:
+                con_maxcsn = self.get_consumer_maxcsn(binddn=binddn, bindpw=bindpw)
+            else:
+                con_maxcsn = consumer_maxcsn
         except ldap.LDAPError as e:
             raise ValueError("Unable to get lag time: " + str(e))
 
@@ -306,7 +321,8 @@ class Agreement(DSLdapObject):
         # Return a nice formated timestamp
         return "{:0>8}".format(str(lag))
 
-    def status(self, winsync=False, just_status=False, use_json=False, binddn=None, bindpw=None):
+    def status(self, winsync=False, just_status=False, use_json=False, binddn=None, bindpw=None,
+               consumer_maxcsn=None):
         """Get the status of a replication agreement
         :param winsync: Specifies if the the agreement is a winsync replication agreement
         :type winsync: boolean
@@ -318,6 +334,9 @@ class Agreement(DSLdapObject):
         :type binddn: str
         :param bindpw: Password for the bind DN
         :type bindpw: str
+        :param consumer_maxcsn: The consumer maxcsn if it was already read,
+                                see Agreements.get_consumer_maxcsns()
+        :type consumer_maxcsn: str
         :returns: A status message
         :raises: ValueError - if failing to get agmt status
         """
@@ -330,7 +349,8 @@ class Agreement(DSLdapObject):
         # need to provide a DN and password.
         if not winsync:
             try:
-                status = self.get_agmt_status(binddn=binddn, bindpw=bindpw)
+                status = self.get_agmt_status(binddn=binddn, bindpw=bindpw,
+                                              consumer_maxcsn=consumer_maxcsn)
             except ldap.INVALID_CREDENTIALS as e:
                 raise(e)
             except ValueError as e:
@@ -344,7 +364,8 @@ class Agreement(DSLdapObject):
             # Get the lag time
             suffix = ensure_str(status_attrs_dict['nsds5replicaroot'][0])
             agmt_name = ensure_str(status_attrs_dict['cn'][0])
-            lag_time = self.get_lag_time(suffix, agmt_name, binddn=binddn, bindpw=bindpw)
+            lag_time = self.get_lag_time(suffix, agmt_name, binddn=binddn, bindpw=bindpw,
+                                         consumer_maxcsn=consumer_maxcsn)
         else:
             lag_time = "Not available for Winsync agreements"
             status = "Not available for Winsync agreements"
@@ -530,6 +551,56 @@ class Agreements(DSLdapObjects):
             raise ldap.UNWILLING_TO_PERFORM("Refusing to create agreement in %s" % DN_MAPPING_TREE)
         return super(Agreements, self)._validate(rdn, properties)
 
+    def get_consumer_maxcsns(self, binddn=None, bindpw=None, agmts=None, workers=8):
+        """Get the maxcsn of the consumers of many agreements at once. The
+        database RUV entry of each consumer and suffix is read once, and
+        the consumers are queried in parallel through the connection pool
+        of the instance.
+
+        :param binddn: Specifies a specific bind DN to use when contacting the remote consumers
+        :type binddn: str
+        :param bindpw: Password for the bind DN
+        :type bindpw: str
+        :param agmts: The agreements, all the agreements of this set by default
+        :type agmts: list of Agreement
+        :param workers: The number of consumers queried at the same time
+        :type workers: int
+        :returns: A dict of agreement DN to the consumer maxcsn, as returned by
+                  Agreement.get_consumer_maxcsn(). The agreements whose consumer
+                  could not be read because of an error are left out.
+        """
+        from lib389.replica import Replicas
+        if agmts is None:
+            agmts = self.list()
+
+        rids = {}
+        # (host, port, protocol, binddn, suffix) -> arguments of the RUV lookup
+        lookups = {}
+        agmt_lookups = {}
+        for agmt in agmts:
+            consumer = agmt._get_consumer(binddn, bindpw)
+            suffix = agmt.get_attr_val_utf8(REPL_ROOT)
+            if suffix.lower() not in rids:
+                replica = Replicas(self._instance).get(suffix)
+                rids[suffix.lower()] = replica.get_attr_val_utf8(REPL_ID)
+            key = (consumer[0].lower(), consumer[1], consumer[2], consumer[3], suffix.lower())
+            if key not in lookups:
+                lookups[key] = (agmt, consumer, suffix, rids[suffix.lower()])
+            agmt_lookups[agmt.dn] = key
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {key: executor.submit(agmt._read_consumer_maxcsn, consumer, suffix, rid)
+                       for key, (agmt, consumer, suffix, rid) in lookups.items()}
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except ldap.LDAPError as e:
+                    self._log.debug('Failed to get the maxcsn of consumer ({}:{}), error: {}'.format(
+                                    key[0], key[1], e))
+
+        return {dn: results[key] for dn, key in agmt_lookups.items() if key in results}
+
 
 class AgreementLegacy(object):
     """An object that helps to work with agreement entry
@@ -8,7 +8,9 @@
 # --- END COPYRIGHT BLOCK ---
 
 import ast
+import importlib
 import logging
+import os
 import sys
 import json
 import ldap
@@ -142,14 +144,21 @@ def connect_instance(dsrc_inst, verbose, args):
     # overlay cli args into the map ...)
     dsargs[SER_ROOT_DN] = dsrc_inst['binddn']
 
+    return open_instance(dsrc_inst, verbose)
+
+
+def open_instance(dsrc_inst, verbose, timeout=None):
+    """Open a connection with the settings resolved by connect_instance, so
+    a tool can open more connections without prompting again
+    """
     ds = DirSrv(verbose=verbose)
-    ds.allocate(dsargs)
+    ds.allocate(dsrc_inst['args'])
     ds.open(saslmethod=dsrc_inst['saslmech'],
             certdir=dsrc_inst['tls_cacertdir'],
             reqcert=dsrc_inst['tls_reqcert'],
             usercert=dsrc_inst['tls_cert'],
             userkey=dsrc_inst['tls_key'],
-            starttls=dsrc_inst['starttls'], connOnly=True)
+            starttls=dsrc_inst['starttls'], connOnly=True, timeout=timeout)
     if ds.serverid is not None and ds.serverid.startswith("slapd-"):
         ds.serverid = ds.serverid.replace("slapd-", "", 1)
     return ds
@@ -177,26 +186,35 @@ def _format_status(log, mtype, json=False):
                 log.info('{}: {}'.format(k, vi))
 
 
-def _generic_list(inst, basedn, log, manager_class, args=None):
+def _generic_list(inst, basedn, log, manager_class, args=None, display=print):
     mc = manager_class(inst, basedn)
-    ol = mc.list()
-    if len(ol) == 0:
-        if args and args.json:
+    # Fetch the naming attribute with the listing, so that displaying each
+    # object doesn't cost another search.
+    rdn_attr = mc._entry_to_instance(dn=None, entry=None)._rdn_attribute
+    if rdn_attr is not None:
+        ol = mc.iter_list(attrlist=[rdn_attr])
+    else:
+        ol = mc.iter_list()
+    # Print the objects page by page as they arrive. The json document is
+    # written out as it goes, in the same format as json.dumps(indent=4).
+    json_output = args and args.json
+    count = 0
+    for o in ol:
+        o_str = o.__unicode__()
+        if json_output:
+            prefix = '{\n    "type": "list",\n    "items": [\n' if count == 0 else ',\n'
+            sys.stdout.write(prefix + '        ' + json.dumps(o_str))
+            sys.stdout.flush()
+        else:
+            display(o_str)
+        count += 1
+    if count == 0:
+        if json_output:
             print(json.dumps({"type": "list", "items": []}, indent=4))
         else:
             log.info("No objects to display")
-    elif len(ol) > 0:
-        # We might sort this in the future
-        if args and args.json:
-            json_result = {"type": "list", "items": []}
-        for o in ol:
-            o_str = o.__unicode__()
-            if args and args.json:
-                json_result['items'].append(o_str)
-            else:
-                print(o_str)
-        if args and args.json:
-            print(json.dumps(json_result, indent=4))
+    elif json_output:
+        print('\n    ]\n}')
 
 
 # Display these entries better!
@@ -404,6 +422,80 @@ class FakeArgs(object):
         return len(self.__dict__.keys())
 
 
+class LazySubcommands(object):
+    """Register the subcommands of a CLI tool without importing the modules
+    that implement them.
+
+    Each module is declared with the names of the top level subcommands that
+    its create_parser() adds. Only the modules of the subcommands named on the
+    command line are imported and build their parsers, the other names get an
+    empty parser so they still show up in the usage. When no subcommand is
+    named, or help is requested, every module is loaded so the help and
+    the completion of the subcommand names are complete.
+
+    :param subparsers: The subparsers of the tool
+    :type subparsers: argparse._SubParsersAction
+    :param package: The package of the modules
+    :type package: str
+    :param modules: A list of (module, [subcommand names]) or
+                    (module, [subcommand names], create function name),
+                    in the order of the usage
+    :type modules: list
+    """
+
+    def __init__(self, subparsers, package, modules):
+        self._subparsers = subparsers
+        self._package = package
+        self._modules = [(m[0], m[1], m[2] if len(m) > 2 else 'create_parser') for m in modules]
+        self.loaded = []
+
+    def _get_words(self, argv):
+        if argv is not None:
+            return argv
+        if '_ARGCOMPLETE' in os.environ:
+            # argcomplete gives the line being completed instead of argv
+            comp_line = os.environ.get('COMP_LINE', '')
+            comp_point = int(os.environ.get('COMP_POINT', len(comp_line)))
+            return comp_line[:comp_point].split()[1:]
+        return sys.argv[1:]
+
+    def load(self, argv=None):
+        """Build the parsers of the subcommands named in the arguments
+
+        :param argv: The command line arguments, sys.argv (or the line
+                     being completed by argcomplete) by default
+        :type argv: list of str
+        :returns: The list of the modules that were imported
+        """
+        words = set(self._get_words(argv))
+        all_names = set().union(*[names for _, names, _ in self._modules])
+        load_all = words.isdisjoint(all_names) or not words.isdisjoint(('-h', '--help'))
+        for module, names, create in self._modules:
+            if load_all or not words.isdisjoint(names):
+                mod = importlib.import_module(f'{self._package}.{module}')
+                getattr(mod, create)(self._subparsers)
+                self.loaded.append(module)
+            else:
+                for name in names:
+                    self._subparsers.add_parser(name)
+        return self.loaded
+
+
+def lazy_func(module, name):
+    """Get a parser func that imports its module only when it is called
+
+    :param module: The module of the function
+    :type module: str
+    :param name: The name of the function
+    :type name: str
+    :returns: function
+    """
+
+    def func(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+    return func
+
+
 def setup_script_logger(name, verbose=False):
     """Reset the python logging system for STDOUT, and attach a new
     console logger with cli expected formatting.
@@ -8,6 +8,25 @@
 import ldap
 from lib389 import ensure_list_str
 
+# The top level subcommands of dsconf that the create_parser() of each module
+# adds, in the usage order. The modules are only imported when one of their
+# subcommands is used, see lib389.cli_base.LazySubcommands.
+SUBCOMMANDS = [
+    ('backend', ['backend']),
+    ('backup', ['backup']),
+    ('chaining', ['chaining']),
+    ('config', ['config']),
+    ('directory_manager', ['directory_manager'], 'create_parsers'),
+    ('monitor', ['monitor']),
+    ('plugin', ['plugin']),
+    ('pwpolicy', ['pwpolicy', 'localpwp']),
+    ('replication', ['replication', 'repl-agmt', 'repl-winsync-agmt', 'repl-tasks']),
+    ('saslmappings', ['sasl']),
+    ('security', ['security']),
+    ('schema', ['schema']),
+    ('conflicts', ['repl-conflict']),
+]
+
 
 def _args_to_attrs(args, arg_to_attr):
     attrs = {}
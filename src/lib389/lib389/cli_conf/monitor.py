@@ -91,6 +91,14 @@ def disk_monitor(inst, basedn, log, args):
 def db_monitor(inst, basedn, log, args):
     """Report on all the database statistics
     """
+    # The backend config entries are read several times while building
+    # the report, so serve the repeated reads from the attribute cache.
+    with inst.attr_cache.active():
+        _db_monitor(inst, basedn, log, args)
+    log.debug("Attribute cache: {}".format(inst.attr_cache.stats()))
+
+
+def _db_monitor(inst, basedn, log, args):
     ldbm_monitor = MonitorLDBM(inst)
     backends_obj = Backends(inst)
     backend_objs = []
@@ -410,7 +410,8 @@ def get_repl_monitor_info(inst, basedn, log, args):
                 "bindpw": bindpw}
 
     repl_monitor = ReplicationMonitor(inst)
-    report_dict = repl_monitor.generate_report(get_credentials, args.json)
+    report_dict = repl_monitor.generate_report(get_credentials, args.json,
+                                               workers=args.workers, timeout=args.timeout)
     report_items = []
 
     for instance, report_data in report_dict.items():
@@ -1137,14 +1138,18 @@ def dump_cl(inst, basedn, log, args):
                                             output_file=args.output_file,
                                             csn_only=args.csn_only,
                                             preserve_ldif_done=args.preserve_ldif_done,
-                                            decode=args.decode)
+                                            decode=args.decode,
+                                            min_csn=args.min_csn,
+                                            max_csn=args.max_csn,
+                                            rids=args.rid)
     else:
         # Modify an existing LDIF file
         try:
             assert os.path.exists(args.changelog_ldif)
         except AssertionError:
             raise FileNotFoundError(f"File {args.changelog_ldif} was not found")
-        cl_ldif = ChangelogLDIF(args.changelog_ldif, output_file=args.output_file)
+        cl_ldif = ChangelogLDIF(args.changelog_ldif, output_file=args.output_file,
+                                min_csn=args.min_csn, max_csn=args.max_csn, rids=args.rid)
         if args.csn_only:
             cl_ldif.grep_csn()
         else:
@@ -1309,6 +1314,13 @@ def create_parser(subparsers):
     repl_export_cl.add_argument('-o', '--output-file', required=True, help="Path name for the final result.")
     repl_export_cl.add_argument('-r', '--replica-root', required=True,
                                 help="Specify replica root whose changelog you want to export.")
+    repl_export_cl.add_argument('--min-csn',
+                                help="Only keep the changes with this CSN or a higher one.  The CSN of a point in time "
+                                     "is its number of seconds since the epoch in 8 hexadecimal digits, followed by 12 zeros.")
+    repl_export_cl.add_argument('--max-csn',
+                                help="Only keep the changes with this CSN or a lower one.")
+    repl_export_cl.add_argument('--rid', type=int, action='append',
+                                help="Only keep the changes of this replica ID.  This option can be repeated.")
 
     repl_def_export_cl = export_subcommands.add_parser('default', help='Export the replication changelog to the server\'s default LDIF directory.')
     repl_def_export_cl.set_defaults(func=dump_def_cl)
@@ -1361,6 +1373,10 @@ def create_parser(subparsers):
     repl_monitor_parser.add_argument('-a', '--aliases', nargs="*",
                                      help="If a host:port is assigned an alias, then the alias instead of "
                                           "host:port will be displayed in the output. The format: alias=host:port")
+    repl_monitor_parser.add_argument('--workers', type=int, default=8,
+                                     help="The number of instances of the topology queried at the same time (default 8)")
+    repl_monitor_parser.add_argument('--timeout', type=float,
+                                     help="The number of seconds to wait for each instance before reporting it as unavailable")
 #
     ############################################
     # Replication Agmts
@@ -6,3 +6,14 @@
 # See LICENSE for details.
 # --- END COPYRIGHT BLOCK ---
 
+# The top level subcommands of dsctl that the create_parser() of each module
+# adds, in the usage order. The modules are only imported when one of their
+# subcommands is used, see lib389.cli_base.LazySubcommands.
+SUBCOMMANDS = [
+    ('instance', ['restart', 'start', 'stop', 'status', 'remove']),
+    ('dbtasks', ['db2index', 'db2bak', 'db2ldif', 'dbverify', 'bak2db', 'ldif2db', 'backups', 'ldifs']),
+    ('tls', ['tls']),
+    ('health', ['healthcheck']),
+    ('nsstate', ['get-nsstate']),
+    ('dbgen', ['ldifgen']),
+]
@@ -16,6 +16,8 @@ from lib389.dbgen import (
     dbgen_nested_ldif,
 )
 from lib389.utils import is_a_dn
+import random
+import time
 
 DEFAULT_LDIF = "/tmp/ldifgen.ldif"
 USERS_LDIF_NAME = "/users.ldif"
@@ -63,6 +65,19 @@ def display_args(log, args):
     log.info("\nWriting LDIF ...")
 
 
+def set_seed(args):
+    # Pick a seed before display_args shows it, so the same LDIF can be generated again
+    if getattr(args, 'seed', None) is None:
+        args.seed = random.randrange(2 ** 32)
+
+
+def display_rate(log, count, start):
+    # Display the generation rate
+    elapsed = time.monotonic() - start
+    rate = count / elapsed if elapsed > 0 else count
+    log.info(f"Generated {count} entries in {elapsed:.2f} seconds ({rate:.0f} entries/s)")
+
+
 def validate_ldif_file(ldif_file, log=None):
     """
     Check if the LDIF file exists.  If interactive then return some error
@@ -191,8 +206,12 @@ def dbgen_create_users(inst, log, args):
         args.ldif_file = adjust_ldif_name(inst, args.ldif_file)
         validate_ldif_file(args.ldif_file)
 
+    set_seed(args)
     display_args(log, args)
-    dbgen_users(inst, args.number, args.ldif_file, args.suffix, generic=args.generic, parent=args.parent, startIdx=args.start_idx, rdnCN=False, pseudol10n=args.localize)
+    start = time.monotonic()
+    count = dbgen_users(inst, args.number, args.ldif_file, args.suffix, generic=args.generic, parent=args.parent, startIdx=args.start_idx,
+                        rdnCN=False, pseudol10n=args.localize, seed=args.seed, jobs=getattr(args, 'jobs', None))
+    display_rate(log, count, start)
     log.info(f"Successfully created LDIF file: {args.ldif_file}")
 
 
@@ -245,8 +264,11 @@ def dbgen_create_groups(inst, log, args):
         "membershipAttr": args.member_attr,
     }
 
+    set_seed(args)
     display_args(log, args)
-    dbgen_groups(inst, args.ldif_file, props)
+    start = time.monotonic()
+    count = dbgen_groups(inst, args.ldif_file, props, seed=args.seed, jobs=getattr(args, 'jobs', None))
+    display_rate(log, count, start)
     log.info(f"Successfully created LDIF file: {args.ldif_file}")
 
 
@@ -462,8 +484,11 @@ def dbgen_create_mods(inst, log, args):
         "modAttrs": args.mod_attrs
     }
 
+    set_seed(args)
     display_args(log, args)
-    dbgen_mod_load(args.ldif_file, props)
+    start = time.monotonic()
+    count = dbgen_mod_load(args.ldif_file, props, seed=args.seed, jobs=getattr(args, 'jobs', None))
+    display_rate(log, count, start)
     log.info(f"Successfully created LDIF file: {args.ldif_file}")
 
 
@@ -495,8 +520,11 @@ def dbgen_create_nested(inst, log, args):
         "suffix": args.suffix,
     }
 
+    set_seed(args)
     display_args(log, args)
-    node_count = dbgen_nested_ldif(inst, args.ldif_file, props)
+    start = time.monotonic()
+    node_count = dbgen_nested_ldif(inst, args.ldif_file, props, seed=args.seed, jobs=getattr(args, 'jobs', None))
+    display_rate(log, props['numUsers'], start)
     log.info(f"Successfully created nested LDIF file ({args.ldif_file}) containing {node_count} nodes/subtrees")
 
 
@@ -514,6 +542,8 @@ def create_parser(subparsers):
     dbgen_users_parser.add_argument('--start-idx', default=0, help="For generic LDIF's you can choose the starting index for the user entries.  The default is \"0\".")
     dbgen_users_parser.add_argument('--rdn-cn', action='store_true', help="Use the attribute \"cn\" as the RDN attribute in the DN instead of \"uid\"")
     dbgen_users_parser.add_argument('--localize', action='store_true', help="Localize the LDIF data")
+    dbgen_users_parser.add_argument('--seed', type=int, help="The random seed.  The same seed and options generate the same LDIF.  Default is a random seed.")
+    dbgen_users_parser.add_argument('--jobs', type=int, help="The number of processes generating the entries.  Default is the number of CPUs.")
     dbgen_users_parser.add_argument('--ldif-file', default="users.ldif", help=f"The LDIF file name.  Default location is the server's LDIF directory using the name 'users.ldif'")
 
     # Create static groups
@@ -527,6 +557,8 @@ def create_parser(subparsers):
     dbgen_groups_parser.add_argument('--create-members', action='store_true', help="Create the member user entries.")
     dbgen_groups_parser.add_argument('--member-parent', help="The entry DN that the members should be created under.  The default is the suffix entry.")
     dbgen_groups_parser.add_argument('--member-attr', default="uniquemember", help="The membership attribute to use in the group.  Default is \"uniquemember\".")
+    dbgen_groups_parser.add_argument('--seed', type=int, help="The random seed.  The same seed and options generate the same LDIF.  Default is a random seed.")
+    dbgen_groups_parser.add_argument('--jobs', type=int, help="The number of processes generating the entries.  Default is the number of CPUs.")
     dbgen_groups_parser.add_argument('--ldif-file', default=DEFAULT_LDIF, help=f"The LDIF file name.  Default is \"{DEFAULT_LDIF}\"")
 
     # Create a COS definition
@@ -576,6 +608,8 @@ def create_parser(subparsers):
     dbgen_mod_load_parser.add_argument('--mod-users', default=100, help="The number of entries to modify.")
     dbgen_mod_load_parser.add_argument('--mod-attrs', nargs="*", default=['description'], help="List of attributes the script will randomly choose from when modifying an entry.  The default is \"description\".")
     dbgen_mod_load_parser.add_argument('--randomize', action='store_true', help="Randomly perform the specified add, mod, delete, and modrdn operations")
+    dbgen_mod_load_parser.add_argument('--seed', type=int, help="The random seed.  The same seed and options generate the same LDIF.  Default is a random seed.")
+    dbgen_mod_load_parser.add_argument('--jobs', type=int, help="The number of processes generating the entries.  Default is the number of CPUs.")
     dbgen_mod_load_parser.add_argument('--ldif-file', default=DEFAULT_LDIF, help=f"The LDIF file name.  Default is \"{DEFAULT_LDIF}\"")
 
     # Create a heavily nested LDIF
@@ -584,4 +618,6 @@ def create_parser(subparsers):
     dbgen_nested_parser.add_argument('--num-users', help="The total number of user entries to create in the entire LDIF (does not include the container entries).")
     dbgen_nested_parser.add_argument('--node-limit', help="The total number of user entries to create under each node/subtree")
     dbgen_nested_parser.add_argument('--suffix', help="The suffix DN for the LDIF")
+    dbgen_nested_parser.add_argument('--seed', type=int, help="The random seed.  The same seed and options generate the same LDIF.  Default is a random seed.")
+    dbgen_nested_parser.add_argument('--jobs', type=int, help="The number of processes generating the entries.  Default is the number of CPUs.")
     dbgen_nested_parser.add_argument('--ldif-file', default="nested-users.ldif",  help=f"The LDIF file name.  Default location is the server's LDIF directory using the name 'users.ldif'")
@@ -8,9 +8,12 @@
 
 import json
 import re
+import threading
+import time
+from collections import deque
 from lib389._mapped_object import DSLdapObjects
 from lib389._mapped_object_lint import DSLint
-from lib389.cli_base import connect_instance, disconnect_instance
+from lib389.cli_base import connect_instance, disconnect_instance, open_instance
 from lib389.cli_base.dsrc import dsrc_to_ldap, dsrc_arg_concat
 from lib389.backend import Backends
 from lib389.config import Encryption, Config
@@ -40,6 +43,9 @@ CHECK_OBJECTS = [
     DirsrvAccessLog,
 ]
 
+# The checks run at once, each worker has its own connection
+DEFAULT_HEALTHCHECK_JOBS = 4
+
 
 def _format_check_output(log, result, idx):
     log.info(f"\n\n[{idx}] DS Lint Error: {result['dsle']}")
@@ -89,24 +95,175 @@ def _print_checks(inst, log, specs: Iterable[str]) -> None:
     for o, s in _list_checks(inst, specs):
         log.info(f'{o.lint_uid()}:{s[0]}')
 
-def _run(inst, log, args, checks):
+def _run_check(o, spec):
+    """Run one check, and return its results, error and wall time"""
+    start = time.monotonic()
+    try:
+        results = list(o.lint(spec) or [])
+        error = None
+    except Exception as e:
+        results = []
+        error = e
+    return (results, error, time.monotonic() - start)
+
+
+class _CheckWorker(threading.Thread):
+    """A worker of the healthcheck pool, running checks on its own connection.
+    It is a daemon, so a check that outlives its timeout can not hold up
+    the end of the healthcheck.
+    """
+
+    def __init__(self, pool):
+        super(_CheckWorker, self).__init__(daemon=True)
+        self.pool = pool
+        self.retired = False
+
+    def run(self):
+        pool = self.pool
+        try:
+            conn = pool.connect()
+        except Exception as e:
+            pool.log.debug(f"Healthcheck worker failed to connect: {e}")
+            with pool.cond:
+                pool.workers.remove(self)
+                pool.cond.notify_all()
+            return
+        try:
+            # The workers share the attribute cache of the main connection
+            conn.attr_cache = pool.inst.attr_cache
+            targets = dict(_list_targets(conn))
+            while True:
+                with pool.cond:
+                    if self.retired or not pool.todo:
+                        break
+                    i = pool.todo.popleft()
+                    pool.started[i] = (time.monotonic(), self)
+                (o, s) = pool.checks[i]
+                result = _run_check(targets[o.lint_uid()], s[0])
+                with pool.cond:
+                    if self.retired:
+                        # Too late, the check was reported as timed out
+                        break
+                    pool.done[i] = result
+                    pool.cond.notify_all()
+        finally:
+            with pool.cond:
+                if self in pool.workers:
+                    pool.workers.remove(self)
+                pool.cond.notify_all()
+            disconnect_instance(conn)
+
+
+class _CheckPool(object):
+    """Run the checks on a bounded pool of workers. A check that runs for
+    longer than the timeout is reported as timed out, and its worker is
+    replaced so the pool keeps its size.
+    """
+
+    def __init__(self, inst, log, checks, connect, jobs, timeout):
+        self.inst = inst
+        self.log = log
+        self.checks = checks
+        self.connect = connect
+        self.jobs = jobs
+        self.timeout = timeout
+        self.cond = threading.Condition()
+        self.todo = deque(range(len(checks)))
+        self.started = {}
+        self.done = {}
+        self.workers = []
+
+    def _spawn(self):
+        worker = _CheckWorker(self)
+        self.workers.append(worker)
+        worker.start()
+
+    def run(self):
+        """Run the checks, and return their results in the order of the checks"""
+        with self.cond:
+            for i in range(min(self.jobs, len(self.checks))):
+                self._spawn()
+            while len(self.done) < len(self.checks):
+                if not self.workers:
+                    # No worker could connect, run the rest here
+                    while self.todo:
+                        i = self.todo.popleft()
+                        self.done[i] = _run_check(self.checks[i][0], self.checks[i][1][0])
+                    break
+                wait = None
+                if self.timeout is not None:
+                    now = time.monotonic()
+                    for (i, (start, worker)) in list(self.started.items()):
+                        if i in self.done:
+                            continue
+                        if now - start >= self.timeout:
+                            self.done[i] = ([], TimeoutError(f"timed out after {self.timeout} seconds"), now - start)
+                            worker.retired = True
+                            self.workers.remove(worker)
+                            if self.todo:
+                                self._spawn()
+                        else:
+                            remaining = self.timeout - (now - start)
+                            wait = remaining if wait is None else min(wait, remaining)
+                if len(self.done) < len(self.checks):
+                    self.cond.wait(wait)
+        return [self.done[i] for i in range(len(self.checks))]
+
+
+def _run_checks(inst, log, checks, connect=None, jobs=1, timeout=None):
+    """Run the checks, on a pool of workers if connect is set and jobs is
+    more than one, or if a timeout is set.
+
+    :returns: A list of (results, error, wall time) in the order of the checks
+    """
+    checks = list(checks)
+    if connect is None or (jobs <= 1 and timeout is None):
+        return [_run_check(o, s[0]) for (o, s) in checks]
+    return _CheckPool(inst, log, checks, connect, max(1, jobs), timeout).run()
+
+
+def _run(inst, log, args, checks, connect=None):
     if not args.json:
         log.info("Beginning lint report, this could take a while ...")
 
+    jobs = getattr(args, 'jobs', None) or DEFAULT_HEALTHCHECK_JOBS
+    timeout = getattr(args, 'timeout', None)
+    checks = list(checks)
     report = []
-    for o, s in checks:
+    timings = []
+    # Many checks read the same config entries, so cache the reads for the
+    # duration of the run. The healthcheck is read-only.
+    with inst.attr_cache.active():
         if not args.json:
-            log.info(f"Checking {o.lint_uid()}:{s[0]} ...")
-        try:
-            report += o.lint(s[0]) or []
-        except:
-            continue
+            for o, s in checks:
+                log.info(f"Checking {o.lint_uid()}:{s[0]} ...")
+        outcomes = _run_checks(inst, log, checks, connect, jobs, timeout)
+        for ((o, s), (results, error, wall)) in zip(checks, outcomes):
+            timing = {'check': f'{o.lint_uid()}:{s[0]}', 'time': round(wall, 3),
+                      'status': 'ok', 'issues': len(results)}
+            if isinstance(error, TimeoutError):
+                timing['status'] = 'timeout'
+                if not args.json:
+                    log.info(f"Check {timing['check']} {error}")
+            elif error is not None:
+                timing['status'] = 'error'
+                timing['error'] = str(error)
+                log.debug(f"Check {timing['check']} failed: {error}")
+            timings.append(timing)
+            report += results
+        log.debug(f"Attribute cache: {inst.attr_cache.stats()}")
 
     if not args.json:
         log.info("Healthcheck complete.")
+        if getattr(args, 'timings', False):
+            log.info("\nCheck timings (slowest first):")
+            for timing in sorted(timings, key=lambda t: t['time'], reverse=True):
+                log.info(f"  {timing['time']:8.3f}s  {timing['status']:<8} {timing['check']}")
 
     count = len(report)
-    if count == 0:
+    if args.json and getattr(args, 'timings', False):
+        log.info(json.dumps({'report': report, 'timings': timings}, indent=4))
+    elif count == 0:
         if not args.json:
             log.info("No issues found.")
         else:
@@ -154,7 +311,9 @@ def health_check_run(inst, log, args):
         _print_checks(inst, log, checks)
         return
 
-    _run(inst, log, args, _list_checks(inst, checks))
+    timeout = getattr(args, 'timeout', None)
+    _run(inst, log, args, _list_checks(inst, checks),
+         connect=lambda: open_instance(dsrc_inst, args.verbose, timeout=timeout))
 
     disconnect_instance(inst)
 
@@ -172,3 +331,11 @@ def create_parser(subparsers):
     run_healthcheck_parser.add_argument('--check', nargs='+', default=None,
                                         help='Areas to check. These can be obtained by --list-checks. Every element on the left of the colon (:)'
                                              ' may be replaced by an asterisk if multiple options on the right are available.')
+    run_healthcheck_parser.add_argument('--jobs', type=int, default=DEFAULT_HEALTHCHECK_JOBS,
+                                        help='The number of checks to run at once, each on its own connection '
+                                             '(default: %(default)s)')
+    run_healthcheck_parser.add_argument('--timeout', type=int, default=None,
+                                        help='Report the checks that run for longer than this many seconds as timed out')
+    run_healthcheck_parser.add_argument('--timings', action='store_true',
+                                        help='Show how long each check took. With --json, the output becomes an object '
+                                             'with the "report" and the "timings" of the checks')
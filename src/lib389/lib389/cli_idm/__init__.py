@@ -9,7 +9,21 @@
 
 import ldap
 from getpass import getpass
-import json
+from lib389.cli_base import _generic_list as _base_generic_list
+
+# The top level subcommands of dsidm that the create_parser() of each module
+# adds, in the usage order. The modules are only imported when one of their
+# subcommands is used, see lib389.cli_base.LazySubcommands.
+SUBCOMMANDS = [
+    ('account', ['account']),
+    ('group', ['group']),
+    ('initialise', ['initialise']),
+    ('organizationalunit', ['organizationalunit']),
+    ('posixgroup', ['posixgroup']),
+    ('user', ['user']),
+    ('client_config', ['client_config']),
+    ('role', ['role']),
+]
 
 
 def _get_arg(args, msg=None):
@@ -63,25 +77,8 @@ def _warn(data, msg=None):
 
 
 def _generic_list(inst, basedn, log, manager_class, args=None):
-    mc = manager_class(inst, basedn)
-    ol = mc.list()
-    if len(ol) == 0:
-        if args and args.json:
-            print(json.dumps({"type": "list", "items": []}, indent=4))
-        else:
-            log.info("No objects to display")
-    elif len(ol) > 0:
-        # We might sort this in the future
-        if args and args.json:
-            json_result = {"type": "list", "items": []}
-        for o in ol:
-            o_str = o.__unicode__()
-            if args and args.json:
-                json_result['items'].append(o_str)
-            else:
-                log.info(o_str)
-        if args and args.json:
-            print(json.dumps(json_result, indent=4))
+    # dsidm has always written the listed objects to the log
+    _base_generic_list(inst, basedn, log, manager_class, args, display=log.info)
 
 
 # Display these entries better!
@@ -9,6 +9,7 @@
 
 import ldap
 import math
+import json
 from datetime import datetime
 from lib389.idm.account import Account, Accounts, AccountState
 from lib389.cli_base import (
@@ -63,6 +64,21 @@ def _print_entry_status(status, dn, log):
     log.info(f'Entry State: {status["state"].describe(status["role_dn"])}\n')
 
 
+def _entry_status_json(status, dn):
+    # One line of the NDJSON output of subtree-status
+    params = {}
+    for name, value in status["params"].items():
+        if "Time" in name and value is not None:
+            value = int(math.fabs(value))
+        elif "Date" in name and value is not None:
+            value = value.strftime('%Y%m%d%H%M%SZ')
+        params[name] = value
+    return json.dumps({"dn": dn, "state": status["state"].name.lower(),
+                       "description": status["state"].describe(status["role_dn"]),
+                       "role_dn": status["role_dn"], "params": params,
+                       "calc_time": int(status["calc_time"])})
+
+
 def entry_status(inst, basedn, log, args):
     dn = _get_dn_arg(args.dn, msg="Enter dn to check")
     accounts = Accounts(inst, basedn)
@@ -84,12 +100,12 @@ def subtree_status(inst, basedn, log, args):
         datetime_inactive_time = datetime.strptime(args.become_inactive_on, '%Y-%m-%dT%H:%M:%S')
         epoch_inactive_time = datetime.timestamp(datetime_inactive_time)
 
-    account_list = Accounts(inst, basedn).filter(filter, scope)
-    if not account_list:
-        raise ValueError(f"No entries were found under {basedn}")
-
-    for entry in account_list:
-        status = entry.status()
+    # The policy and role settings are read once, and the accounts are
+    # evaluated page by page as they arrive. In json mode, each entry is
+    # printed as one json document per line.
+    found = False
+    for (entry, status) in Accounts(inst, basedn).iter_status(filter, scope):
+        found = True
         state = status["state"]
         params = status["params"]
         if args.inactive_only and state == AccountState.ACTIVATED:
@@ -98,7 +114,12 @@ def subtree_status(inst, basedn, log, args):
             if epoch_inactive_time is None or params["Time Until Inactive"] is None or \
                epoch_inactive_time <= (params["Time Until Inactive"] + status["calc_time"]):
                 continue
-        _print_entry_status(status, entry.dn, log)
+        if args.json:
+            print(_entry_status_json(status, entry.dn), flush=True)
+        else:
+            _print_entry_status(status, entry.dn, log)
+    if not found:
+        raise ValueError(f"No entries were found under {basedn}")
 
 
 def lock(inst, basedn, log, args):
@@ -177,7 +198,7 @@ like modify, locking and unlocking. To create an account, see "user" subcommand
     status_parser.add_argument('dn', nargs='?', help='The single entry dn to check')
     status_parser.add_argument('-V', '--details', action='store_true', help="Print more account policy details about the entry")
 
-    status_parser = subcommands.add_parser('subtree-status', help='status of a subtree')
+    status_parser = subcommands.add_parser('subtree-status', help='status of a subtree. With --json, each entry is printed as one json document per line')
     status_parser.set_defaults(func=subtree_status)
     status_parser.add_argument('basedn', help="Search base for finding entries")
     status_parser.add_argument('-V', '--details', action='store_true', help="Print more account policy details about the entries")
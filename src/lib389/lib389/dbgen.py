@@ -9,12 +9,19 @@
 # Replacement of the dbgen.pl utility
 
 from lib389.utils import (ensure_str, pseudolocalize)
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 import random
 import os
 import pwd
 import grp
+import io
+import threading
 
-global node_count
+# The number of entries generated by one worker task. The shards only depend
+# on this and the seed, so the output does not depend on the number of workers.
+DBGEN_SHARD_SIZE = 10000
 
 DBGEN_POSITIONS = [
 "Accountant",
@@ -138,6 +145,124 @@ def finalize_ldif_file(instance, ldif_file):
         os.chown(ldif_file, uid, gid)
 
 
+@contextmanager
+def _ldif_output(instance, ldif_file):
+    """Open the LDIF file for writing, or use it as is if it is already a
+    file object, e.g. a pipe to an import.
+    """
+    if hasattr(ldif_file, 'write'):
+        yield ldif_file
+        return
+    with open(ldif_file, 'w') as LDIF:
+        yield LDIF
+    if instance is not None:
+        finalize_ldif_file(instance, ldif_file)
+
+
+def _get_seed(seed):
+    # Without a seed, draw one: the output is still random, but each shard
+    # generator must use the same one.
+    if seed is None:
+        return random.randrange(2 ** 32)
+    return seed
+
+
+def _shard_rng(seed, *shard):
+    """Get the random generator of a shard, seeded with the run seed and the
+    shard key. String seeds are hashed with sha512, so this is stable across
+    processes and python runs.
+    """
+    return random.Random(':'.join(str(k) for k in (seed,) + shard))
+
+
+def _shard_ranges(start, stop, size=DBGEN_SHARD_SIZE):
+    # Split the range of entry indexes [start, stop) in shards
+    return [(i, min(i + size, stop)) for i in range(start, stop, size)]
+
+
+def _write_shards(LDIF, shards, jobs=None):
+    """Generate the shards in worker processes, and write them in order.
+    Each shard is a (function, args) pair, and the function returns the
+    tuple (ldif text, number of entries).
+
+    :param LDIF: The file to write to
+    :type LDIF: file
+    :param shards: The shards to generate
+    :type shards: list
+    :param jobs: The number of worker processes, defaults to the number of CPUs
+    :type jobs: int
+    :returns: The number of entries written
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    count = 0
+
+    if jobs == 1 or len(shards) <= 1:
+        for (func, args) in shards:
+            (text, entries) = func(*args)
+            LDIF.write(text)
+            count += entries
+        return count
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # Keep a bounded number of shards in flight, and write them in
+        # submission order so the parents stay before their children.
+        todo = iter(shards)
+        pending = deque()
+        for (func, args) in todo:
+            pending.append(executor.submit(func, *args))
+            if len(pending) >= jobs * 2:
+                break
+        while pending:
+            (text, entries) = pending.popleft().result()
+            shard = next(todo, None)
+            if shard is not None:
+                pending.append(executor.submit(shard[0], *shard[1]))
+            LDIF.write(text)
+            count += entries
+    return count
+
+
+def dbgen_ldif2db(instance, bename, generate):
+    """Import a generated LDIF offline, streaming it to ldif2db through a
+    pipe rather than a file. The server must be stopped.
+
+        dbgen_ldif2db(inst, 'userRoot',
+                      lambda ldif: dbgen_users(inst, 1000000, ldif, DEFAULT_SUFFIX, seed=1))
+
+    :param instance: The instance to import to
+    :type instance: lib389.DirSrv
+    :param bename: The backend name
+    :type bename: str
+    :param generate: A function writing the LDIF to the file object it is given
+    :type generate: callable
+    :returns: True if the import succeeded
+    """
+    (rfd, wfd) = os.pipe()
+    errors = []
+
+    def producer():
+        try:
+            with open(wfd, 'w') as LDIF:
+                generate(LDIF)
+        except BrokenPipeError:
+            # The import stopped reading, it reports its own failure
+            pass
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    try:
+        with open(rfd, 'r') as f_import:
+            result = instance.ldif2db(bename, None, None, False, '-', stdin=f_import)
+    finally:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return result
+
+
 def get_index(idx, numUsers):
     # Get ldclt style entry "0" padded index number
     zeroLen = len(str(numUsers)) - len(str(idx))
@@ -175,23 +300,23 @@ aci: (target=ldap:///{suffix})(targetattr=*)(version 3.0; acl "Anonymous Access"
 """
 
 
-def randomPick(values):
+def randomPick(values, rng=random):
     # Return a randomly selected value from the provided list of values
     val_count = len(values)
     val_count -= 1
-    idx = random.randint(0, val_count)
+    idx = rng.randint(0, val_count)
     return values[idx].lstrip()
 
 
-def write_generic_user(LDIF, index, number, parent, name="user", changetype="", pseudol10n=False):
+def write_generic_user(LDIF, index, number, parent, name="user", changetype="", pseudol10n=False, rng=random):
     uid_val = name + get_index(index, number)
-    ou = random.choice(DBGEN_OUS)
+    ou = rng.choice(DBGEN_OUS)
     first = uid_val
     last = uid_val[::-1]  # reverse name
     cn = f"{first} {last}"
     initials = "%s. %s" % (first[0], last[0])
-    l = random.choice(DBGEN_LOCATIONS)
-    title = "%s %s" % (random.choice(DBGEN_TITLE_LEVELS), random.choice(DBGEN_POSITIONS))
+    l = rng.choice(DBGEN_LOCATIONS)
+    title = "%s %s" % (rng.choice(DBGEN_TITLE_LEVELS), rng.choice(DBGEN_POSITIONS))
     if pseudol10n:
         ou = pseudolocalize(ou)
         first = pseudolocalize(first)
@@ -216,9 +341,85 @@ def write_generic_user(LDIF, index, number, parent, name="user", changetype="",
     ))
     return dn
 
-def dbgen_users(instance, number, ldif_file, suffix, generic=False, entry_name="user", parent=None, startIdx=0, rdnCN=False, pseudol10n=False):
+def _generic_users_shard(seed, key, start, stop, number, parent, name, changetype):
+    # Generate the generic users of indexes [start, stop)
+    rng = _shard_rng(seed, *key)
+    LDIF = io.StringIO()
+    for idx in range(start, stop):
+        write_generic_user(LDIF, idx, number, parent, name=name, changetype=changetype, rng=rng)
+    return (LDIF.getvalue(), stop - start)
+
+
+def _users_shard(seed, start, stop, props):
+    # Generate the users of indexes [start, stop) for dbgen_users
+    rng = _shard_rng(seed, start)
+    choice = rng.choice
+    givennames = props['givennames']
+    familynames = props['familynames']
+    number = props['number']
+    suffix = props['suffix']
+    pseudol10n = props['pseudol10n']
+    LDIF = io.StringIO()
+    for i in range(start, stop):
+        # Pick a random ou
+        ou = choice(DBGEN_OUS)
+        first = choice(givennames)
+        last = choice(familynames)
+        if props['generic']:
+            i += props['startIdx']
+            name = props['entry_name'] + get_index(i, number)
+            uid = name
+            cn = name
+        else:
+            uid = "%s%s%s" % (first[0], last, i)
+            cn = f"{first} {last}"
+        initials = "%s. %s" % (first[0], last[0])
+        l = choice(DBGEN_LOCATIONS)
+        title = "%s %s" % (choice(DBGEN_TITLE_LEVELS), choice(DBGEN_POSITIONS))
+        if pseudol10n:
+            ou = pseudolocalize(ou)
+            first = pseudolocalize(first)
+            last = pseudolocalize(last)
+            initials = pseudolocalize(initials)
+            l = pseudolocalize(l)
+            title = pseudolocalize(title)
+
+        parent = props['parent']
+        if parent is None:
+            parent = f"ou={ou},{suffix}"
+
+        if props['rdnCN']:
+            # Not using "uid" so use "cn" instead
+            dn = f"cn={cn},{parent}"
+        else:
+            dn = f"uid={uid},{parent}"
+
+        LDIF.write(DBGEN_TEMPLATE.format(
+            DN=dn,
+            CHANGETYPE="",
+            UID=uid,
+            UIDNUMBER=i,
+            FIRST=first,
+            LAST=last,
+            CN=cn,
+            INITIALS=initials,
+            OU=ou,
+            LOCATION=l,
+            TITLE=title,
+        ))
+    return (LDIF.getvalue(), stop - start)
+
+
+def dbgen_users(instance, number, ldif_file, suffix, generic=False, entry_name="user", parent=None, startIdx=0, rdnCN=False, pseudol10n=False,
+                seed=None, jobs=None):
     """
-    Generate an LDIF of randomly named entries
+    Generate an LDIF of randomly named entries. The entries are generated in
+    shards by worker processes, and the same seed gives the same LDIF.
+
+    :param ldif_file: The LDIF path, or a file object to write to
+    :param seed: The random seed, a random one if None
+    :param jobs: The number of worker processes, defaults to the number of CPUs
+    :returns: The number of entries written
     """
     familyname_file = os.path.join(instance.ds_paths.data_dir, 'dirsrv/data/dbgen-FamilyNames')
     givename_file = os.path.join(instance.ds_paths.data_dir, 'dirsrv/data/dbgen-GivenNames')
@@ -229,71 +430,74 @@ def dbgen_users(instance, number, ldif_file, suffix, generic=False, entry_name="
     with open(givename_file, 'r') as f:
         givennames = [n.strip() for n in f]
 
-    with open(ldif_file, 'w') as LDIF:
+    seed = _get_seed(seed)
+    props = {
+        'number': number,
+        'suffix': suffix,
+        'generic': generic,
+        'entry_name': entry_name,
+        'parent': parent,
+        'startIdx': int(startIdx),
+        'rdnCN': rdnCN,
+        'pseudol10n': pseudol10n,
+        'givennames': givennames,
+        'familynames': familynames,
+    }
+
+    count = 0
+    with _ldif_output(instance, ldif_file) as LDIF:
         LDIF.write(get_node(suffix))
+        count += 1
         for ou in DBGEN_OUS:
             ou = pseudolocalize(ou) if pseudol10n else ou
             LDIF.write(DBGEN_OU_TEMPLATE.format(SUFFIX=suffix, OU=ou))
+            count += 1
 
         if parent is not None:
             parent_rdn = parent.split(',')[0].split('=')[1]
             if parent_rdn.lower() not in DBGEN_OUS:
                 LDIF.write(get_node(parent))
+                count += 1
 
-        for i in range(1, int(number) + 1):
-            # Pick a random ou
-            ou = random.choice(DBGEN_OUS)
-            first = random.choice(givennames)
-            last = random.choice(familynames)
-            if generic:
-                i += startIdx
-                name = entry_name + get_index(i, number)
-                uid = name
-                cn = name
-            else:
-                first = random.choice(givennames)
-                last = random.choice(familynames)
-                uid = "%s%s%s" % (first[0], last, i)
-                cn = f"{first} {last}"
-            # How do we subscript from a generator?
-            initials = "%s. %s" % (first[0], last[0])
-            l = random.choice(DBGEN_LOCATIONS)
-            title = "%s %s" % (random.choice(DBGEN_TITLE_LEVELS), random.choice(DBGEN_POSITIONS))
-            if pseudol10n:
-                ou = pseudolocalize(ou)
-                first = pseudolocalize(first)
-                last = pseudolocalize(last)
-                initials = pseudolocalize(initials)
-                l = pseudolocalize(l)
-                title = pseudolocalize(title)
-
-            if parent is None:
-                parent = f"ou={ou},{suffix}"
-
-            if rdnCN:
-                # Not using "uid" so use "cn" instead
-                dn = f"cn={cn},{parent}"
-            else:
-                dn = f"uid={uid},{parent}"
-
-            LDIF.write(DBGEN_TEMPLATE.format(
-                DN=dn,
-                CHANGETYPE="",
-                UID=uid,
-                UIDNUMBER=i,
-                FIRST=first,
-                LAST=last,
-                CN=cn,
-                INITIALS=initials,
-                OU=ou,
-                LOCATION=l,
-                TITLE=title,
-            ))
+        shards = [(_users_shard, (seed, start, stop, props))
+                  for (start, stop) in _shard_ranges(1, int(number) + 1)]
+        count += _write_shards(LDIF, shards, jobs)
 
-    finalize_ldif_file(instance, ldif_file)
+    return count
+
+
+def _group_shard(props, idx):
+    # Generate the group entry of index idx for dbgen_groups
+    group_member_list = []
+    for user_idx in range(1, int(props['numMembers']) + 1):
+        if props['createMembers']:
+            name = f"group_entry{idx}-" + get_index(user_idx, props['numMembers'])
+        else:
+            name = "user" + get_index(user_idx, props['numMembers'])
+        group_member_list.append(f"uid={name},{props['memberParent']}")
+
+    if props['number'] == 0:
+        # Only creating one group, do not add the idx to DN
+        group_dn = f"dn: cn={props['name']},{props['parent']}\n"
+        cn = f"cn={props['name']},{props['parent']}"
+    else:
+        group_dn = f"dn: cn={props['name']}-{idx},{props['parent']}\n"
+        cn = f"cn={props['name']}-{idx},{props['parent']}"
+
+    LDIF = io.StringIO()
+    LDIF.write(group_dn)
+    LDIF.write('objectclass: top\n')
+    LDIF.write('objectclass: groupOfUniqueNames\n')
+    LDIF.write('objectclass: groupOfNames\n')
+    LDIF.write('objectclass: inetAdmin\n')
+    LDIF.write(f'cn: {cn}\n')
+    for dn in group_member_list:
+        LDIF.write(f"{props['membershipAttr']}: {dn}\n")
+    LDIF.write('\n')
+    return (LDIF.getvalue(), 1)
 
 
-def dbgen_groups(instance, ldif_file, props):
+def dbgen_groups(instance, ldif_file, props, seed=None, jobs=None):
     """
     Create static group(s) and the member entries
 
@@ -307,14 +511,23 @@ def dbgen_groups(instance, ldif_file, props):
             "memberParent": DN
             "membershipAttr": ATTR
         }
+
+    The member entries are generated in shards by worker processes, see
+    dbgen_users for ldif_file, seed and jobs.
+
+    :returns: The number of entries written
     """
-    with open(ldif_file, 'w') as LDIF:
+    seed = _get_seed(seed)
+    count = 0
+    with _ldif_output(instance, ldif_file) as LDIF:
         # Create the top node
         LDIF.write(get_node(props['suffix']))
+        count += 1
         if props['parent'] is not None:
             if props['parent'] != props['suffix']:
                 # Create the group container
                 LDIF.write(get_node(props['parent']))
+                count += 1
         else:
             props['parent'] = props['suffix']
 
@@ -322,42 +535,22 @@ def dbgen_groups(instance, ldif_file, props):
             if props['memberParent'] != props['suffix'] and props['memberParent'] != props['parent']:
                 # Create the member/user container
                 LDIF.write(get_node(props['memberParent']))
+                count += 1
         else:
             props['memberParent'] = props['suffix']
 
+        # Each group is written after its member entries
+        shards = []
+        num_members = int(props['numMembers'])
         for idx in range(1, int(props['number']) + 1):
-            # Build the member list and create the member entries
-            group_member_list = []
             if props['createMembers']:
-                for user_idx in range(1, int(props['numMembers']) + 1):
-                    dn = write_generic_user(LDIF, user_idx, props['numMembers'], props['memberParent'], name=f"group_entry{idx}-")
-                    group_member_list.append(dn)
-            else:
-                # Not creating the member entries, just build the DN list of members
-                for user_idx in range(1, int(props['numMembers']) + 1):
-                    name = "user" + get_index(user_idx, props['numMembers'])
-                    dn = f"uid={name},{props['memberParent']}"
-                    group_member_list.append(dn)
-
-            if props['number'] == 0:
-                # Only creating one group, do not add the idx to DN
-                group_dn = f"dn: cn={props['name']},{props['parent']}\n"
-                cn = f"cn={props['name']},{props['parent']}"
-            else:
-                group_dn = f"dn: cn={props['name']}-{idx},{props['parent']}\n"
-                cn = f"cn={props['name']}-{idx},{props['parent']}"
-
-            LDIF.write(group_dn)
-            LDIF.write('objectclass: top\n')
-            LDIF.write('objectclass: groupOfUniqueNames\n')
-            LDIF.write('objectclass: groupOfNames\n')
-            LDIF.write('objectclass: inetAdmin\n')
-            LDIF.write(f'cn: {cn}\n')
-            for dn in group_member_list:
-                LDIF.write(f"{props['membershipAttr']}: {dn}\n")
-            LDIF.write('\n')
+                for (start, stop) in _shard_ranges(1, num_members + 1):
+                    shards.append((_generic_users_shard, (seed, ('group', idx, start), start, stop, props['numMembers'],
+                                                          props['memberParent'], f"group_entry{idx}-", "")))
+            shards.append((_group_shard, (props, idx)))
+        count += _write_shards(LDIF, shards, jobs)
 
-    finalize_ldif_file(instance, ldif_file)
+    return count
 
 
 def dbgen_cos_def(instance, ldif_file, props):
@@ -489,7 +682,7 @@ def dbgen_role(instance, ldif_file, props):
     finalize_ldif_file(instance, ldif_file)
 
 
-def dbgen_mod_load(ldif_file, props):
+def dbgen_mod_load(ldif_file, props, seed=None, jobs=None):
     """
     Generate a "load" LDIF file that can be consumed by ldapmodify
 
@@ -506,27 +699,36 @@ def dbgen_mod_load(ldif_file, props):
             "random": True/False,
             "modAttrs": [ATTR, ATTR, ...]
         }
-    """
 
-    entry_dn_list = []  # List used to delete entries at the end of the LDIF
+    The created users are generated in shards by worker processes, see
+    dbgen_users for ldif_file, seed and jobs. The operations that follow
+    depend on each other, and are generated in order.
+
+    :returns: The number of changes written
+    """
+    # The DNs to delete at the end of the LDIF, a dict is an ordered set
+    entry_dn_list = {}
     if props['modAttrs'] is None:
         props['modAttrs'] = ['description', 'title']
+    seed = _get_seed(seed)
+    rng = _shard_rng(seed, 'operations')
+    count = 0
 
-    with open(ldif_file, 'w') as LDIF:
+    with _ldif_output(None, ldif_file) as LDIF:
         if props['createParent']:
             # Create the container entry that the users will be add to
             LDIF.write(get_node(props['parent']))
+            count += 1
 
         # Create entries
+        if props['createUsers']:
+            shards = [(_generic_users_shard, (seed, ('users', start), start, stop, props['numUsers'],
+                                              props['parent'], "user", "\nchangetype: add"))
+                      for (start, stop) in _shard_ranges(1, props['numUsers'] + 1)]
+            count += _write_shards(LDIF, shards, jobs)
         for user_idx in range(1, props['numUsers'] + 1):
-            if props['createUsers']:
-                dn = write_generic_user(
-                    LDIF, user_idx, props['numUsers'], props['parent'],
-                    changetype="\nchangetype: add")
-                entry_dn_list.append(dn)
-            else:
-                dn = f"uid=user{get_index(user_idx, props['numUsers'])},{props['parent']}"
-                entry_dn_list.append(dn)
+            dn = f"uid=user{get_index(user_idx, props['numUsers'])},{props['parent']}"
+            entry_dn_list[dn] = True
 
         # Set the types of operations and how many of them to perform
         addc = int(props['addUsers'])
@@ -534,12 +736,13 @@ def dbgen_mod_load(ldif_file, props):
         modc = int(props['modUsers'])
         mrdnc = int(props['modrdnUsers'])
         total_ops = addc + delc + modc + mrdnc
+        count += total_ops
 
         if props['random']:
             # Mix up the selected operations
             operations = ['add', 'mod', 'modrdn', 'delete']
             while total_ops != 0:
-                op = randomPick(operations)
+                op = randomPick(operations, rng)
                 if op == 'add':
                     if addc == 0:
                         # no more adds to do
@@ -547,16 +750,16 @@ def dbgen_mod_load(ldif_file, props):
                         continue
                     dn = write_generic_user(
                         LDIF, addc, props['addUsers'], props['parent'],
-                        name="addUser", changetype="\nchangetype: add")
-                    entry_dn_list.append(dn)
+                        name="addUser", changetype="\nchangetype: add", rng=rng)
+                    entry_dn_list[dn] = True
                     addc -= 1
                 elif op == 'mod':
                     if modc == 0:
                         # no more mods to do
                         operations.remove('mod')
                         continue
-                    attr = randomPick(props['modAttrs'])
-                    val = (''.join((random.choice(RANDOM_CHARS) for i in range(0, random.randint(10, 30)))))
+                    attr = randomPick(props['modAttrs'], rng)
+                    val = (''.join((rng.choice(RANDOM_CHARS) for i in range(0, rng.randint(10, 30)))))
                     LDIF.write(f"dn: uid=user{get_index(modc, props['numUsers'])},{props['parent']}\n")
                     LDIF.write("changetype: modify\n")
                     LDIF.write(f"replace: {attr}\n")
@@ -574,8 +777,7 @@ def dbgen_mod_load(ldif_file, props):
                     LDIF.write("changetype: delete\n")
                     LDIF.write(" \n")
                     delc -= 1
-                    if dn_val in entry_dn_list:
-                        entry_dn_list.remove(dn_val)
+                    entry_dn_list.pop(dn_val, None)
                 elif op == 'modrdn':
                     if mrdnc == 0:
                         # no more modrdns to do
@@ -590,9 +792,8 @@ def dbgen_mod_load(ldif_file, props):
                     LDIF.write("\n")
                     mrdnc -= 1
                     # Revise the DN list: add the new DN, and remove the old DN
-                    entry_dn_list.append(new_dn_val)
-                    if dn_val in entry_dn_list:
-                        entry_dn_list.remove(dn_val)
+                    entry_dn_list[new_dn_val] = True
+                    entry_dn_list.pop(dn_val, None)
 
                 # Update the total count
                 total_ops -= 1
@@ -604,14 +805,14 @@ def dbgen_mod_load(ldif_file, props):
             while addc != 0:
                 dn = write_generic_user(
                     LDIF, addc, props['addUsers'], props['parent'],
-                    name="addUser", changetype="\nchangetype: add")
+                    name="addUser", changetype="\nchangetype: add", rng=rng)
                 addc -= 1
-                entry_dn_list.append(dn)
+                entry_dn_list[dn] = True
 
             # Mods
             while modc != 0:
-                attr = randomPick(props['modAttrs'])
-                val = (''.join((random.choice(RANDOM_CHARS) for i in range(0, random.randint(10, 30)))))
+                attr = randomPick(props['modAttrs'], rng)
+                val = (''.join((rng.choice(RANDOM_CHARS) for i in range(0, rng.randint(10, 30)))))
                 LDIF.write(f"dn: uid=user{get_index(modc, props['numUsers'])},{props['parent']}\n")
                 LDIF.write("changetype: modify\n")
                 LDIF.write(f"replace: {attr}\n")
@@ -630,9 +831,8 @@ def dbgen_mod_load(ldif_file, props):
                 LDIF.write("\n")
                 mrdnc -= 1
                 # Revise the DN list: add the new DN, and remove the old DN
-                entry_dn_list.append(new_dn_val)
-                if dn_val in entry_dn_list:
-                    entry_dn_list.remove(dn_val)
+                entry_dn_list[new_dn_val] = True
+                entry_dn_list.pop(dn_val, None)
 
             # Deletes
             while delc != 0:
@@ -641,8 +841,7 @@ def dbgen_mod_load(ldif_file, props):
                 LDIF.write("changetype: delete\n")
                 LDIF.write(" \n")
                 delc -= 1
-                if dn_val in entry_dn_list:
-                    entry_dn_list.remove(dn_val)
+                entry_dn_list.pop(dn_val, None)
 
         # Cleanup - delete all known entries
         if props['deleteUsers']:
@@ -650,65 +849,75 @@ def dbgen_mod_load(ldif_file, props):
                 LDIF.write(f"dn: {dn}\n")
                 LDIF.write("changetype: delete\n")
                 LDIF.write(" \n")
+                count += 1
 
+    return count
 
-def build_recursive_nodes(LDIF, dn, node_limit, max_entries):
-    """
-    Recursively create two nodes under each node, continue until there are no
-    more max_entries.
-    """
-    global node_count
-    wrote_node1 = False
-    wrote_node2 = False
-
-    # Create containers for DN1 and DN2
-    dn1 = "ou=1," + dn
-    LDIF.write(f'dn: {dn1}\n')
-    LDIF.write('objectclass: top\n')
-    LDIF.write('objectclass: organizationalUnit\n')
-    LDIF.write('ou: ou=1\n\n')
-
-    dn2 = "ou=2," + dn
-    LDIF.write(f'dn: {dn2}\n')
-    LDIF.write('objectclass: top\n')
-    LDIF.write('objectclass: organizationalUnit\n')
-    LDIF.write('ou: ou=2\n\n')
-
-    # Add entries under each node
-    for entry_idx in range(1, node_limit + 1):
-        write_generic_user(LDIF, entry_idx, node_limit, dn1)
-        max_entries -= 1
-        if not wrote_node1:
-            wrote_node1 = True
-            node_count += 1
-        if max_entries == 0:
-            break
-
-        write_generic_user(LDIF, entry_idx, node_limit, dn2)
-        max_entries -= 1
-        if not wrote_node2:
-            wrote_node2 = True
-            node_count += 1
-        if max_entries == 0:
-            break
-
-    # Are we out of entries
-    if max_entries == 0:
-        return
 
-    # Get the remaining entries to be split between two nodes
-    new_node_max = max_entries // 2
-    if (max_entries % 2) > 0:
-        remainder = 1
-    else:
-        remainder = 0
-
-    # Recursively build child nodes
-    build_recursive_nodes(LDIF, dn1, node_limit, new_node_max)
-    build_recursive_nodes(LDIF, dn2, node_limit, new_node_max + remainder)
+def _nested_nodes(dn, node_limit, max_entries):
+    """
+    Plan the nested tree: create two nodes under each node, with up to
+    node_limit entries each, and split the remaining entries between the
+    subtrees of the two nodes, until there are no more max_entries.
 
+    :returns: The list of (parent DN, number of entries under its two nodes),
+              parents first
+    """
+    nodes = []
+    # Depth first, the subtree of node 1 before the one of node 2
+    stack = [(dn, max_entries)]
+    while stack:
+        (dn, max_entries) = stack.pop()
+        if max_entries <= 0:
+            continue
+        nodes.append((dn, max_entries))
+        remaining = max_entries - 2 * node_limit
+        if remaining <= 0:
+            continue
+        # Get the remaining entries to be split between two nodes
+        new_node_max = remaining // 2
+        stack.append(("ou=2," + dn, new_node_max + remaining % 2))
+        stack.append(("ou=1," + dn, new_node_max))
+    return nodes
+
+
+def _nested_shard(seed, shard, node_limit, nodes):
+    # Generate the two nodes and their entries under each of the parents
+    rng = _shard_rng(seed, shard)
+    LDIF = io.StringIO()
+    count = 0
+    for (dn, max_entries) in nodes:
+        # Create containers for DN1 and DN2
+        dn1 = "ou=1," + dn
+        LDIF.write(f'dn: {dn1}\n')
+        LDIF.write('objectclass: top\n')
+        LDIF.write('objectclass: organizationalUnit\n')
+        LDIF.write('ou: ou=1\n\n')
 
-def dbgen_nested_ldif(instance, ldif_file, props):
+        dn2 = "ou=2," + dn
+        LDIF.write(f'dn: {dn2}\n')
+        LDIF.write('objectclass: top\n')
+        LDIF.write('objectclass: organizationalUnit\n')
+        LDIF.write('ou: ou=2\n\n')
+        count += 2
+
+        # Add entries under each node, alternately
+        for entry_idx in range(1, node_limit + 1):
+            write_generic_user(LDIF, entry_idx, node_limit, dn1, rng=rng)
+            max_entries -= 1
+            count += 1
+            if max_entries == 0:
+                break
+
+            write_generic_user(LDIF, entry_idx, node_limit, dn2, rng=rng)
+            max_entries -= 1
+            count += 1
+            if max_entries == 0:
+                break
+    return (LDIF.getvalue(), count)
+
+
+def dbgen_nested_ldif(instance, ldif_file, props, seed=None, jobs=None):
     """
     Create a deeply nested LDIF
 
@@ -717,17 +926,38 @@ def dbgen_nested_ldif(instance, ldif_file, props):
             'nodeLimit': ####  --> max number of entries to put into each node
             "suffix": DN
         }
+
+    The nodes are generated in shards by worker processes, see dbgen_users
+    for ldif_file, seed and jobs.
+
+    :returns: The number of nodes/subtrees containing entries
     """
 
-    global node_count
-    node_count = 0
-    with open(ldif_file, 'w') as LDIF:
+    seed = _get_seed(seed)
+    node_limit = props['nodeLimit']
+    nodes = _nested_nodes(props['suffix'], node_limit, props['numUsers'])
+    # Both nodes get entries if there are two or more
+    node_count = sum(min(max_entries, 2) for (dn, max_entries) in nodes)
+
+    # Group the parents in shards of about DBGEN_SHARD_SIZE entries
+    shards = []
+    shard_nodes = []
+    shard_entries = 0
+    for node in nodes:
+        shard_nodes.append(node)
+        shard_entries += min(node[1], 2 * node_limit)
+        if shard_entries >= DBGEN_SHARD_SIZE:
+            shards.append((_nested_shard, (seed, len(shards), node_limit, shard_nodes)))
+            shard_nodes = []
+            shard_entries = 0
+    if shard_nodes:
+        shards.append((_nested_shard, (seed, len(shards), node_limit, shard_nodes)))
+
+    with _ldif_output(instance, ldif_file) as LDIF:
         # Create the top suffix
         LDIF.write(get_node(props['suffix']))
 
         # Create all the nodes
-        build_recursive_nodes(LDIF, props['suffix'], props['nodeLimit'], props['numUsers'])
-
-    finalize_ldif_file(instance, ldif_file)
+        _write_shards(LDIF, shards, jobs)
 
     return node_count
@@ -10,11 +10,21 @@
 """
 
 import copy
+import os
+import stat
+import calendar
 import re
 import gzip
-from dateutil.parser import parse as dt_parse
+import hashlib
+import heapq
+import json
+import tempfile
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from datetime import datetime, timedelta, timezone
 from glob import glob
-from lib389.utils import ensure_bytes
 from lib389._mapped_object_lint import DSLint
 from lib389.lint import (
     DSLOGNOTES0001,  # Unindexed search
@@ -33,12 +43,268 @@ MONTH_LOOKUP = {
     'Jun': 6,
     'Jul': 7,
     'Aug': 8,
-    'Oct': 9,
-    'Sep': 10,
+    'Sep': 9,
+    'Oct': 10,
     'Nov': 11,
     'Dec': 12,
 }
 
+# Operations that are answered by a RESULT line.
+REQUEST_ACTIONS = ('SRCH', 'ADD', 'MOD', 'DEL', 'MODRDN', 'CMP', 'BIND', 'EXT')
+# The fields of a RESULT line that are kept.
+RESULT_FIELDS = ('err', 'tag', 'nentries', 'wtime', 'optime', 'etime', 'notes', 'csn')
+# Upper bounds, in seconds, of the etime histogram buckets. One more bucket
+# holds everything slower than the last bound.
+ETIME_BUCKETS = (0.001, 0.01, 0.1, 1, 10, 60)
+# Requests still waiting for their RESULT line. Past this, the oldest are
+# dropped so a log full of abandoned operations can not use up the memory.
+MAX_PENDING_OPS = 100000
+# The most operations detailed for each notes value.
+NOTES_REPORT_LIMIT = 100
+# The value parse_timestamps gives lines without a timestamp.
+TIMESTAMP_MISSING = -1
+# Bump when the layout of the cached CSN indexes changes.
+CSN_INDEX_VERSION = 1
+
+# The timezones of the offsets seen in the logs, there are rarely more than two.
+_TZINFO_CACHE = {}
+# The offsets in seconds, and the epoch seconds of each day, for parse_timestamps.
+_TZOFFSET_CACHE = {}
+_EPOCH_DAY_CACHE = {}
+
+
+def _split_timestamp(ts):
+    """Break up a log timestamp with a fixed layout, with or without the
+    leading bracket:
+
+        [25/May/2016:15:24:27.289341875 -0400]
+        [25/May/2016:15:24:27 -0400]
+
+    @param ts - The timestamp, or a log line starting with it
+    @return - a tuple (year, month, day, hour, minute, second, nanosecond, tz)
+    @raise ValueError, KeyError, IndexError - the layout is not the expected one
+    """
+    i = 1 if ts[0] == '[' else 0
+    if ts[i + 2] != '/' or ts[i + 6] != '/' or ts[i + 11] != ':':
+        raise ValueError("Invalid log timestamp: %s" % ts)
+    nanosecond = 0
+    j = i + 20
+    if ts[j] == '.':
+        k = ts.index(' ', j)
+        nanosecond = int(ts[j + 1:k].ljust(9, '0')[:9])
+        j = k
+    return (int(ts[i + 7:i + 11]), MONTH_LOOKUP[ts[i + 3:i + 6]], int(ts[i:i + 2]),
+            int(ts[i + 12:i + 14]), int(ts[i + 15:i + 17]), int(ts[i + 18:i + 20]),
+            nanosecond, ts[j + 1:j + 6])
+
+
+def _get_tzoffset(tz):
+    """Return the offset in seconds of a +HHMM/-HHMM timezone"""
+    offset = _TZOFFSET_CACHE.get(tz)
+    if offset is None:
+        if tz[0] not in '+-':
+            raise ValueError("Invalid timezone offset: %s" % tz)
+        offset = (int(tz[1:3]) * 3600 + int(tz[3:5]) * 60) * (-1 if tz[0] == '-' else 1)
+        _TZOFFSET_CACHE[tz] = offset
+    return offset
+
+
+def _get_tzinfo(tz):
+    """Return the tzinfo of a +HHMM/-HHMM timezone"""
+    tzinfo = _TZINFO_CACHE.get(tz)
+    if tzinfo is None:
+        tzinfo = _TZINFO_CACHE[tz] = timezone(timedelta(seconds=_get_tzoffset(tz)))
+    return tzinfo
+
+
+# Plain logs are scanned in byte ranges of this size, one per worker task.
+SCAN_CHUNK_SIZE = 64 * 1024 * 1024
+# How much of the end of a log is read to find its last timestamp.
+SCAN_TAIL_SIZE = 64 * 1024
+
+
+def _scan_log(path, offset, length, pattern):
+    """Return the lines of a log matching a pattern. For a plain log, only
+    the lines that start within the byte range are read, so ranges that
+    split a line still see it exactly once. A gzip log is read whole.
+
+    This runs in the worker processes of DirsrvLog.scan_archive.
+
+    @param path - The log path
+    @param offset - The start of the byte range
+    @param length - The length of the byte range
+    @param pattern - A regex pattern, or None to return all the lines
+    @return - A list of lines
+    """
+    prog = re.compile(pattern) if pattern is not None else None
+    results = []
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rt') as lf:
+            for line in lf:
+                if prog is None or prog.match(line):
+                    results.append(line)
+        return results
+
+    end = offset + length
+    with open(path, 'rb') as lf:
+        if offset > 0:
+            # Skip the line that started in the previous range
+            lf.seek(offset - 1)
+            lf.readline()
+        pos = lf.tell()
+        while pos < end:
+            line = lf.readline()
+            if not line:
+                break
+            pos += len(line)
+            line = line.decode('utf-8', errors='replace')
+            if prog is None or prog.match(line):
+                results.append(line)
+    return results
+
+
+class CSNIndex(object):
+    """The first RESULT line of each CSN in an access log, built in a single
+    pass over the log:
+
+        csn -> (nanoseconds since the epoch, conn, op, err)
+
+    The index is cached on disk, keyed by the inode of the log and the size
+    already indexed. update() only reads what was written to the log since,
+    and indexes the log again from the start once it is rotated.
+
+    @param access_log - The DirsrvAccessLog to index
+    @param cache_path - The cache file. If None, one in the run directory of
+                        the instance when it is writable, or else the index
+                        is only kept in memory
+    """
+
+    prog_result = re.compile(r'^\[([^\]]*)\]\sconn=(\d+)\sop=(-?\d+)\sRESULT\serr=(\d+)\s.*?\bcsn=(\w+)')
+
+    def __init__(self, access_log, cache_path=None):
+        self.access_log = access_log
+        self.path = access_log._get_log_path()
+        if cache_path is None:
+            # Not in a shared directory such as /tmp, where anyone could
+            # create or replace the file first
+            run_dir = access_log.dirsrv.ds_paths.run_dir
+            if run_dir and os.path.isdir(run_dir) and os.access(run_dir, os.W_OK):
+                digest = hashlib.sha1(os.path.abspath(self.path).encode()).hexdigest()[:16]
+                cache_path = os.path.join(run_dir, 'lib389-csn-index-%s.json' % digest)
+        self.cache_path = cache_path
+        self.inode = None
+        self.offset = 0
+        self.csns = {}
+        self._load()
+
+    def _load(self):
+        """Read the cached index, if it was built by this version. It is
+        ignored unless it is a regular file of ours that only we can write.
+        """
+        if self.cache_path is None:
+            return
+        try:
+            fd = os.open(self.cache_path, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'r') as f:
+                st = os.fstat(f.fileno())
+                if not stat.S_ISREG(st.st_mode) or st.st_uid != os.geteuid() or st.st_mode & 0o022:
+                    self.access_log.log.debug("Ignoring the CSN index cache %s, it is not safe", self.cache_path)
+                    return
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cache.get('version') != CSN_INDEX_VERSION or cache.get('path') != self.path:
+            return
+        self.inode = tuple(cache['inode'])
+        self.offset = cache['offset']
+        self.csns = {csn: tuple(value) for (csn, value) in cache['csns'].items()}
+
+    def _save(self):
+        """Write the cache atomically, the index is still usable if it fails"""
+        if self.cache_path is None:
+            return
+        try:
+            (fd, tmp_path) = tempfile.mkstemp(dir=os.path.dirname(self.cache_path) or '.')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': CSN_INDEX_VERSION, 'path': self.path, 'inode': self.inode,
+                           'offset': self.offset, 'csns': self.csns}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self.access_log.log.debug("Unable to cache the CSN index of %s: %s", self.path, e)
+
+    def update(self):
+        """Index the lines written to the log since the last update
+
+        @return - The number of CSNs added to the index
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return 0
+        inode = (st.st_dev, st.st_ino)
+        if inode != self.inode or st.st_size < self.offset:
+            # A new log, or the old one was truncated
+            self.inode = inode
+            self.offset = 0
+            self.csns = {}
+        if st.st_size == self.offset:
+            return 0
+
+        timestamps = []
+        found = []
+        with open(self.path, 'rb') as lf:
+            lf.seek(self.offset)
+            for line in lf:
+                if not line.endswith(b'\n'):
+                    # Still being written, index it next time
+                    break
+                self.offset += len(line)
+                if b' csn=' not in line:
+                    continue
+                mres = self.prog_result.match(line.decode('utf-8', errors='replace'))
+                if mres is None:
+                    continue
+                (timestamp, conn, op, err, csn) = mres.groups()
+                if csn in self.csns:
+                    continue
+                timestamps.append(timestamp)
+                found.append((csn, conn, op, int(err)))
+
+        added = 0
+        for (ns, (csn, conn, op, err)) in zip(self.access_log.parse_timestamps(timestamps), found):
+            if csn not in self.csns:
+                self.csns[csn] = (ns, conn, op, err)
+                added += 1
+        if added:
+            # Without new CSNs, the lines read since are just read again
+            # from the cached offset next time
+            self._save()
+        return added
+
+    def get(self, csn):
+        """Return the (nanoseconds since the epoch, conn, op, err) of the first
+        RESULT line of a CSN, or None if the CSN is not in the log
+        """
+        return self.csns.get(csn)
+
+    def get_time(self, csn):
+        """Return the time in seconds since the epoch when a CSN was first
+        logged, or None if the CSN is not in the log
+        """
+        value = self.csns.get(csn)
+        if value is None or value[0] == TIMESTAMP_MISSING:
+            return None
+        return value[0] / 1000000000.0
+
+    def __contains__(self, csn):
+        return csn in self.csns
+
+    def __len__(self):
+        return len(self.csns)
+
 
 class DirsrvLog(DSLint):
     """Class of functions to working with the various DIrectory Server logs
@@ -49,7 +315,7 @@ class DirsrvLog(DSLint):
         """
         self.dirsrv = dirsrv
         self.log = self.dirsrv.log
-        self.prog_timestamp = re.compile(r'\[(?P<day>\d*)\/(?P<month>\w*)\/(?P<year>\d*):(?P<hour>\d*):(?P<minute>\d*):(?P<second>\d*)(.(?P<nanosecond>\d*))+\s(?P<tz>[\+\-]\d*)')   # noqa
+        self.prog_timestamp = re.compile(r'\[(?P<day>\d*)\/(?P<month>\w*)\/(?P<year>\d*):(?P<hour>\d*):(?P<minute>\d*):(?P<second>\d*)(\.(?P<nanosecond>\d*))?\s(?P<tz>[\+\-]\d*)')   # noqa
         self.prog_datetime = re.compile(r'^(?P<timestamp>\[.*\])')
 
     def _get_log_path(self):
@@ -60,24 +326,156 @@ class DirsrvLog(DSLint):
         """Return all the log paths"""
         return glob("%s.*-*" % self._get_log_path()) + [self._get_log_path()]
 
-    def readlines_archive(self):
+    def _get_archive_log_paths(self):
+        """Return all the log paths, oldest first. Rotated logs are named
+        after the time of rotation, so they sort chronologically.
+        """
+        return sorted(glob("%s.*-*" % self._get_log_path())) + [self._get_log_path()]
+
+    def _open_log(self, path):
+        """Open a log for reading text, whether it is compressed or not"""
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt')
+        return open(path, 'r')
+
+    def _get_line_datetime(self, line):
+        """Return the datetime of a log line, or None if it has none"""
+        end = line.find(']')
+        if not line.startswith('[') or end < 0:
+            return None
+        try:
+            return self.parse_timestamp(line[:end + 1])
+        except (AttributeError, IndexError, KeyError, ValueError, OverflowError):
+            return None
+
+    def _get_log_first_datetime(self, path):
+        """Return the datetime of the first timestamped line of a log"""
+        with self._open_log(path) as lf:
+            for line in lf:
+                dt = self._get_line_datetime(line)
+                if dt is not None:
+                    return dt
+        return None
+
+    def _get_log_last_datetime(self, path):
+        """Return the datetime of the last timestamped line of a plain log"""
+        with open(path, 'rb') as lf:
+            lf.seek(max(0, os.path.getsize(path) - SCAN_TAIL_SIZE))
+            lines = lf.read().decode('utf-8', errors='replace').splitlines()
+        for line in reversed(lines):
+            dt = self._get_line_datetime(line)
+            if dt is not None:
+                return dt
+        return None
+
+    def _plan_archive_scan(self, start, end, chunk_size):
+        """Split the logs into scan tasks, oldest first, leaving out the logs
+        that are entirely outside of the time window.
+
+        @return - A list of (path, offset, length, filter_lines) tuples, where
+                  filter_lines is True when the log is not entirely within
+                  the time window
+        """
+        paths = [p for p in self._get_archive_log_paths() if p is not None and os.path.exists(p)]
+        windowed = start is not None or end is not None
+        firsts = []
+        if windowed:
+            firsts = [self._get_log_first_datetime(p) for p in paths]
+
+        tasks = []
+        for i, path in enumerate(paths):
+            filter_lines = False
+            if windowed:
+                first = firsts[i]
+                if path.endswith('.gz'):
+                    # Reading the end of a gzip log means inflating it all, but a
+                    # log ends before the next one starts.
+                    last = firsts[i + 1] if i + 1 < len(firsts) else None
+                else:
+                    last = self._get_log_last_datetime(path)
+                if (first is not None and end is not None and first > end) or \
+                   (last is not None and start is not None and last < start):
+                    continue
+                filter_lines = (first is None or last is None or
+                                (start is not None and first < start) or
+                                (end is not None and last > end))
+
+            if path.endswith('.gz'):
+                tasks.append((path, 0, 0, filter_lines))
+            else:
+                size = os.path.getsize(path)
+                for offset in range(0, max(size, 1), chunk_size):
+                    tasks.append((path, offset, chunk_size, filter_lines))
+        return tasks
+
+    def scan_archive(self, pattern=None, start=None, end=None, jobs=None, chunk_size=SCAN_CHUNK_SIZE):
+        """Search all the log files, including rotated and compressed logs,
+        in parallel. Plain logs are split into byte ranges, and each range
+        or compressed log is searched by a worker process.
+
+        @param pattern - a regex pattern, or None for all the lines
+        @param start - an aware datetime, skip the lines logged before it
+        @param end - an aware datetime, skip the lines logged after it
+        @param jobs - the number of worker processes, defaults to the number of CPUs
+        @param chunk_size - the size of the byte ranges of plain logs
+        @return - a generator of the matching lines, oldest first
+        """
+        tasks = self._plan_archive_scan(start, end, chunk_size)
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+
+        if jobs == 1 or len(tasks) <= 1:
+            results = (_scan_log(path, offset, length, pattern) for (path, offset, length, _) in tasks)
+            yield from self._filter_scan(tasks, results, start, end)
+            return
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # Keep a bounded number of tasks in flight, and hand back their
+            # results in submission order so the lines stay chronological.
+            todo = iter(tasks)
+            pending = deque()
+            for (path, offset, length, _) in todo:
+                pending.append(executor.submit(_scan_log, path, offset, length, pattern))
+                if len(pending) >= jobs * 2:
+                    break
+
+            def results():
+                while pending:
+                    lines = pending.popleft().result()
+                    task = next(todo, None)
+                    if task is not None:
+                        pending.append(executor.submit(_scan_log, task[0], task[1], task[2], pattern))
+                    yield lines
+
+            yield from self._filter_scan(tasks, results(), start, end)
+
+    def _filter_scan(self, tasks, results, start, end):
+        """Flatten the results of the scan tasks, dropping the lines outside of
+        the time window from the logs that are not entirely within it.
+        Lines without a timestamp are kept.
+        """
+        for task, lines in zip(tasks, results):
+            if not task[3]:
+                yield from lines
+                continue
+            for line in lines:
+                dt = self._get_line_datetime(line)
+                if dt is not None and ((start is not None and dt < start) or
+                                       (end is not None and dt > end)):
+                    continue
+                yield line
+
+    def readlines_archive(self, start=None, end=None):
         """
         Returns an array of all the lines in all logs, included rotated logs
         and compressed logs. (gzip)
-        Will likely be very slow. Try using match instead.
+        Will likely be very slow. Try using scan_archive instead.
 
+        @param start - an aware datetime, skip the lines logged before it
+        @param end - an aware datetime, skip the lines logged after it
         @return - an array of all the lines in all logs
         """
-        lines = []
-        for log in self._get_all_log_paths():
-            # Open the log
-            if log.endswith(ensure_bytes('.gz')):
-                with gzip.open(log, 'r') as lf:
-                    lines += lf.readlines()
-            else:
-                with open(log, 'r') as lf:
-                    lines += lf.readlines()
-        return lines
+        return list(self.scan_archive(start=start, end=end))
 
     def readlines(self):
         """Returns an array of all the lines in the log.
@@ -93,27 +491,14 @@ class DirsrvLog(DSLint):
                 lines = lf.readlines()
         return lines
 
-    def match_archive(self, pattern):
+    def match_archive(self, pattern, start=None, end=None):
         """Search all the log files, including "zipped" logs
         @param pattern - a regex pattern
-        @return - results of the pattern matching
+        @param start - an aware datetime, skip the lines logged before it
+        @param end - an aware datetime, skip the lines logged after it
+        @return - results of the pattern matching, oldest first
         """
-        results = []
-        prog = re.compile(pattern)
-        for log in self._get_all_log_paths():
-            if log.endswith(ensure_bytes('.gz')):
-                with gzip.open(log, 'r') as lf:
-                    for line in lf:
-                        mres = prog.match(line)
-                        if mres:
-                            results.append(line)
-            else:
-                with open(log, 'r') as lf:
-                    for line in lf:
-                        mres = prog.match(line)
-                        if mres:
-                            results.append(line)
-        return results
+        return list(self.scan_archive(pattern, start=start, end=end))
 
     def match(self, pattern):
         """Search the current log file for the pattern
@@ -136,21 +521,56 @@ class DirsrvLog(DSLint):
         @param ts - The timestamp string from a log
         @return - a "datetime" object
         """
-        timedata = self.prog_timestamp.match(ts).groupdict()
-        # Now, have to convert month to an int.
-        dt_str = '{YEAR}-{MONTH}-{DAY} {HOUR}-{MINUTE}-{SECOND} {TZ}'.format(
-            YEAR=timedata['year'],
-            MONTH=MONTH_LOOKUP[timedata['month']],
-            DAY=timedata['day'],
-            HOUR=timedata['hour'],
-            MINUTE=timedata['minute'],
-            SECOND=timedata['second'],
-            TZ=timedata['tz'],
-            )
-        dt = dt_parse(dt_str)
-        if timedata['nanosecond']:
-            dt = dt.replace(microsecond=int(int(timedata['nanosecond']) / 1000))
-        return dt
+        try:
+            (year, month, day, hour, minute, second, nanosecond, tz) = _split_timestamp(ts)
+        except (IndexError, KeyError, ValueError):
+            # Not the layout written by the server, fall back to the regex
+            timedata = self.prog_timestamp.match(ts).groupdict()
+            (year, month, day) = (int(timedata['year']), MONTH_LOOKUP[timedata['month']], int(timedata['day']))
+            (hour, minute, second) = (int(timedata['hour']), int(timedata['minute']), int(timedata['second']))
+            nanosecond = int(timedata['nanosecond'].ljust(9, '0')[:9]) if timedata['nanosecond'] else 0
+            tz = timedata['tz']
+        return datetime(year, month, day, hour, minute, second, nanosecond // 1000,
+                        tzinfo=_get_tzinfo(tz))
+
+    def parse_timestamps(self, lines):
+        """Parse the timestamps of many log lines at once, keeping the
+        nanoseconds, without building a datetime for each line.
+        @param lines - an iterable of log lines or timestamps
+        @return - an array('q') of the nanoseconds since the epoch of each line,
+                  TIMESTAMP_MISSING for the lines without a timestamp
+        """
+        result = array('q')
+        append = result.append
+        for line in lines:
+            try:
+                i = 1 if line[0] == '[' else 0
+                # Lines of the same day and timezone share most of the work
+                date = line[i:i + 11]
+                day_secs = _EPOCH_DAY_CACHE.get(date)
+                if day_secs is None:
+                    if line[i + 2] != '/' or line[i + 6] != '/':
+                        raise ValueError("Invalid log timestamp: %s" % line)
+                    day_secs = calendar.timegm((int(line[i + 7:i + 11]), MONTH_LOOKUP[line[i + 3:i + 6]],
+                                                int(line[i:i + 2]), 0, 0, 0))
+                    _EPOCH_DAY_CACHE[date] = day_secs
+                if line[i + 11] != ':':
+                    raise ValueError("Invalid log timestamp: %s" % line)
+                secs = day_secs + int(line[i + 12:i + 14]) * 3600 + int(line[i + 15:i + 17]) * 60 + int(line[i + 18:i + 20])
+                j = i + 20
+                nanosecond = 0
+                if line[j] == '.':
+                    k = line.index(' ', j)
+                    nanosecond = int(line[j + 1:k].ljust(9, '0')[:9])
+                    j = k
+                tz = line[j + 1:j + 6]
+                offset = _TZOFFSET_CACHE.get(tz)
+                if offset is None:
+                    offset = _get_tzoffset(tz)
+                append((secs - offset) * 1000000000 + nanosecond)
+            except (IndexError, KeyError, ValueError):
+                append(TIMESTAMP_MISSING)
+        return result
 
     def get_time_in_secs(self, log_line):
         """Take the timestamp (not the date) from a DS log and convert it
@@ -190,25 +610,154 @@ class DirsrvAccessLog(DirsrvLog):
         self.prog_notes = re.compile(r'err=(?P<err>\d*)\stag=(?P<tag>\d*)\snentries=(?P<nentries>\d*)\setime=(?P<etime>[0-9.]*)\snotes=(?P<notes>\w*)')
         self.prog_repl = re.compile(r'err=(?P<err>\d*)\stag=(?P<tag>\d*)\snentries=(?P<nentries>\d*)\setime=(?P<etime>[0-9.]*)\scsn=(?P<csn>\w*)')
         self.prog_result = re.compile(r'err=(?P<err>\d*)\stag=(?P<tag>\d*)\snentries=(?P<nentries>\d*)\setime=(?P<etime>[0-9.]*)\s(?P<rem>.*)')
+        # Operation regex's for the single pass analyzer
+        self.prog_op = re.compile(r'^\[([^\]]*)\]\sconn=(\d+)\sop=(-?\d+)\s([A-Z]+)\s?(.*)')
+        self.prog_srch = re.compile(r'base="(?P<base>.*?)"\sscope=(?P<scope>\d+)\sfilter="(?P<filter>.*?)"(?:\s|$)')
         # Lists for each regex type
         self.full_regexs = [self.prog_m1, self.prog_con, self.prog_discon]
         self.result_regexs = [self.prog_notes, self.prog_repl,
                               self.prog_result]
+        self._csn_index = None
     @classmethod
     def lint_uid(cls):
         return 'logs'
 
-    def _log_get_search_stats(self, conn, op):
-        lines = self.match(f".* conn={conn} op={op} SRCH base=.*")
-        if len(lines) != 1:
-            return None
+    def _parse_result(self, rem):
+        """Break up the remainder of a RESULT line into its fields. The etime
+        is a float, err and nentries are ints, and notes is a list.
+        """
+        result = {}
+        for token in rem.split(' '):
+            (key, sep, value) = token.partition('=')
+            if sep and key in RESULT_FIELDS and key not in result:
+                result[key] = value
+        for key, conv in (('err', int), ('nentries', int), ('etime', float)):
+            try:
+                result[key] = conv(result[key])
+            except (KeyError, ValueError):
+                result[key] = None
+        result['notes'] = result['notes'].split(',') if result.get('notes') else []
+        return result
+
+    def iter_operations(self, archive=False, max_pending=MAX_PENDING_OPS):
+        """Read the access log once and yield one record per completed
+        operation. Requests are matched to their RESULT by conn and op.
+
+        A record holds the timestamp, conn and op, the action (SRCH, MOD, ...
+        or None if the request was not seen), base, scope and filter for
+        searches, the RESULT fields, and the path of the log it came from.
+
+        :param archive: Also read the rotated logs, oldest first
+        :type archive: bool
+        :param max_pending: How many requests can wait for their RESULT
+        :type max_pending: int
+        :returns: A generator of dicts
+        """
+        if archive:
+            paths = self._get_archive_log_paths()
+        else:
+            paths = [self._get_log_path()]
+        pending = OrderedDict()
+        for path in paths:
+            if path is None or not os.path.exists(path):
+                continue
+            with self._open_log(path) as lf:
+                for line in lf:
+                    mres = self.prog_op.match(line)
+                    if mres is None:
+                        continue
+                    (timestamp, conn, op, action, rem) = mres.groups()
+                    key = (conn, op)
+                    if action == 'RESULT':
+                        record = pending.pop(key, None)
+                        if record is None:
+                            record = {'timestamp': timestamp, 'conn': conn, 'op': op, 'action': None,
+                                      'base': None, 'scope': None, 'filter': None}
+                        record.update(self._parse_result(rem.rstrip()))
+                        record['log'] = path
+                        yield record
+                    elif action in REQUEST_ACTIONS and key not in pending:
+                        record = {'timestamp': timestamp, 'conn': conn, 'op': op, 'action': action,
+                                  'base': None, 'scope': None, 'filter': None}
+                        if action == 'SRCH':
+                            sres = self.prog_srch.match(rem)
+                            if sres:
+                                record.update(sres.groupdict())
+                        pending[key] = record
+                        if len(pending) > max_pending:
+                            pending.popitem(last=False)
+
+    def csn_index(self, cache_path=None, refresh=True):
+        """Return the index of the CSNs of the current log. See CSNIndex.
+
+        :param cache_path: The cache file, see CSNIndex
+        :type cache_path: str
+        :param refresh: Index the lines written since the last refresh. A new
+                        index is always brought up to date. Lookups of many
+                        CSNs should refresh once, rather than for each CSN.
+        :type refresh: bool
+        :returns: CSNIndex
+        """
+        if self._csn_index is not None and not refresh and \
+           (cache_path is None or self._csn_index.cache_path == cache_path):
+            return self._csn_index
+        if self._csn_index is None or self._csn_index.path != self._get_log_path() or \
+           (cache_path is not None and self._csn_index.cache_path != cache_path):
+            self._csn_index = CSNIndex(self, cache_path)
+        self._csn_index.update()
+        return self._csn_index
+
+    def analyze(self, archive=False, top=10, buckets=ETIME_BUCKETS, notes_limit=NOTES_REPORT_LIMIT):
+        """Gather the statistics of the access log in a single pass
+
+        :param archive: Also read the rotated logs, oldest first
+        :type archive: bool
+        :param top: How many of the slowest searches to keep
+        :type top: int
+        :param buckets: The upper bounds of the etime histogram buckets
+        :type buckets: tuple
+        :param notes_limit: How many operations to keep for each notes value
+        :type notes_limit: int
+        :returns: A dict with the number of 'operations', the 'notes' (notes
+            value to a dict of the total 'count', the 'actions' count of each
+            action, and the first 'ops'), the 'slow_searches' (slowest
+            first), and the 'etime_histogram' (action to a list of counts,
+            one per bucket plus one for the slower operations)
+        """
+        operations = 0
+        notes = {}
+        slowest = []
+        histogram = {}
+        for record in self.iter_operations(archive=archive):
+            operations += 1
+            for note in record['notes']:
+                found = notes.setdefault(note, {'count': 0, 'actions': {}, 'ops': []})
+                found['count'] += 1
+                note_action = record['action'] or 'UNKNOWN'
+                found['actions'][note_action] = found['actions'].get(note_action, 0) + 1
+                if len(found['ops']) < notes_limit:
+                    found['ops'].append(record)
+            etime = record['etime']
+            if etime is None:
+                continue
+            action = record['action'] or 'UNKNOWN'
+            counts = histogram.get(action)
+            if counts is None:
+                counts = histogram[action] = [0] * (len(buckets) + 1)
+            counts[bisect_left(buckets, etime)] += 1
+            if action == 'SRCH' and top > 0:
+                # The operations counter breaks the ties, records do not compare
+                item = (etime, operations, record)
+                if len(slowest) < top:
+                    heapq.heappush(slowest, item)
+                elif etime > slowest[0][0]:
+                    heapq.heapreplace(slowest, item)
 
-        quoted_vals = re.findall('"([^"]*)"', lines[0])
         return {
-            'base': quoted_vals[0],
-            'filter': quoted_vals[1],
-            'timestamp': re.findall('[(.*)]', lines[0])[0],
-            'scope': lines[0].split(' scope=', 1)[1].split(' ',1)[0]
+            'operations': operations,
+            'notes': notes,
+            'slow_searches': [item[2] for item in sorted(slowest, reverse=True)],
+            'etime_histogram': histogram,
         }
 
     def _lint_notes(self):
@@ -216,46 +765,38 @@ class DirsrvAccessLog(DirsrvLog):
         Check for notes=A (fully unindexed searches), and
         notes=F (unknown attribute in filter)
         """
-        for pattern, lint_report in [(".* notes=A", DSLOGNOTES0001), (".* notes=F", DSLOGNOTES0002)]:
-            lines = self.match(pattern)
-            if len(lines) > 0:
-                count = 0
-                searches = []
-                for line in lines:
-                    if ' RESULT err=' in line:
-                        # Looks like a valid notes=A/F
-                        conn = line.split(' conn=', 1)[1].split(' ',1)[0]
-                        op = line.split(' op=', 1)[1].split(' ',1)[0]
-                        etime = line.split(' etime=', 1)[1].split(' ',1)[0]
-                        stats = self._log_get_search_stats(conn, op)
-                        if stats is not None:
-                            timestamp = stats['timestamp']
-                            base = stats['base']
-                            scope = stats['scope']
-                            srch_filter = stats['filter']
-                            count += 1
-                            if lint_report == DSLOGNOTES0001:
-                                searches.append(f'\n  [{count}] Unindexed Search\n'
-                                                f'      - date:    {timestamp}\n'
-                                                f'      - conn/op: {conn}/{op}\n'
-                                                f'      - base:    {base}\n'
-                                                f'      - scope:   {scope}\n'
-                                                f'      - filter:  {srch_filter}\n'
-                                                f'      - etime:   {etime}\n')
-                            else:
-                                searches.append(f'\n  [{count}] Invalid Attribute in Filter\n'
-                                                f'      - date:    {timestamp}\n'
-                                                f'      - conn/op: {conn}/{op}\n'
-                                                f'      - filter:  {srch_filter}\n')
-                if len(searches) > 0:
-                    report = copy.deepcopy(lint_report)
-                    report['items'].append(self._get_log_path())
-                    report['detail'] = report['detail'].replace('NUMBER', str(count))
-                    for srch in searches:
-                        report['detail'] += srch
-                    report['check'] = f'logs:notes'
-                    yield report
-
+        stats = self.analyze(top=0)
+        for note, lint_report in [('A', DSLOGNOTES0001), ('F', DSLOGNOTES0002)]:
+            found = stats['notes'].get(note)
+            if found is None:
+                continue
+            total = found['actions'].get('SRCH', 0)
+            ops = [o for o in found['ops'] if o['action'] == 'SRCH']
+            searches = []
+            for count, op in enumerate(ops, 1):
+                if lint_report == DSLOGNOTES0001:
+                    searches.append(f'\n  [{count}] Unindexed Search\n'
+                                    f'      - date:    {op["timestamp"]}\n'
+                                    f'      - conn/op: {op["conn"]}/{op["op"]}\n'
+                                    f'      - base:    {op["base"]}\n'
+                                    f'      - scope:   {op["scope"]}\n'
+                                    f'      - filter:  {op["filter"]}\n'
+                                    f'      - etime:   {op["etime"]}\n')
+                else:
+                    searches.append(f'\n  [{count}] Invalid Attribute in Filter\n'
+                                    f'      - date:    {op["timestamp"]}\n'
+                                    f'      - conn/op: {op["conn"]}/{op["op"]}\n'
+                                    f'      - filter:  {op["filter"]}\n')
+            if len(searches) > 0:
+                report = copy.deepcopy(lint_report)
+                report['items'].append(self._get_log_path())
+                report['detail'] = report['detail'].replace('NUMBER', str(total))
+                for srch in searches:
+                    report['detail'] += srch
+                if total > len(ops):
+                    report['detail'] += f'\n  ... and {total - len(ops)} more\n'
+                report['check'] = f'logs:notes'
+                yield report
 
     def _get_log_path(self):
         """Return the current log file location"""
@@ -9,8 +9,11 @@
 
 import copy
 import os
+import re
 import base64
+import tempfile
 import time
+from contextlib import contextmanager
 from struct import pack, unpack
 from datetime import timedelta
 from stat import ST_MODE
@@ -26,16 +29,91 @@ from lib389.lint import (
 )
 
 
+def _normalize_dn(dn):
+    """Return the key of a DN in the index of dse.ldif"""
+    return re.sub(r'\s*([,=])\s*', r'\1', dn.strip().lower())
+
+
+def _parse_line(raw):
+    """Break up a line of dse.ldif, folded as it is in the file, into the
+    attribute name and its value (still base64 encoded if it was)
+    """
+    line = raw.replace('\n ', '').rstrip('\n')
+    (attr, _, value) = line.partition(':')
+    if value.startswith(':') or value.startswith('<'):
+        value = value[1:]
+    return (attr, value.lstrip(' '))
+
+
+class _DSEEntry(object):
+    """An entry of dse.ldif. Its lines are kept as they are in the file, so
+    the lines that are not changed are written back with their folding.
+    """
+
+    def __init__(self, raw_dn):
+        self.raw_dn = raw_dn
+        self.dn = _parse_line(raw_dn)[1]
+        # The folded lines after the dn, up to the next entry
+        self.lines = []
+        # lowercased attribute -> indexes of its lines, built when needed
+        self._attrs = None
+
+    def attrs(self):
+        if self._attrs is None:
+            self._attrs = {}
+            for (i, raw) in enumerate(self.lines):
+                if raw.strip() and not raw.startswith('#'):
+                    self._attrs.setdefault(_parse_line(raw)[0].lower(), []).append(i)
+        return self._attrs
+
+    def values(self, attr):
+        return [_parse_line(self.lines[i])[1] for i in self.attrs().get(attr.lower(), [])]
+
+    def add(self, attr, value, i=None):
+        """Add a value at the line i, or after the other values of the
+        attribute, or after the last attribute of the entry
+        """
+        if i is None:
+            attrs = self.attrs()
+            if attr.lower() in attrs:
+                i = attrs[attr.lower()][-1] + 1
+            else:
+                i = len(self.lines)
+                while i > 0 and not self.lines[i - 1].strip():
+                    i -= 1
+        self.lines.insert(i, "{}: {}\n".format(attr, value))
+        self._attrs = None
+
+    def delete(self, attr, value=None):
+        """Delete all the values of the attribute, or only the given value,
+        and return the index of the first line deleted
+        """
+        indexes = self.attrs().get(attr.lower(), [])
+        if value is not None:
+            indexes = [i for i in indexes if _parse_line(self.lines[i])[1] == value]
+        for i in reversed(indexes):
+            del self.lines[i]
+        self._attrs = None
+        return indexes[0] if indexes else None
+
+
 class DSEldif(DSLint):
     """A class for working with dse.ldif file
 
+    The file is parsed once, with an index of the entries by DN and of their
+    attributes by name, so the queries are answered from memory. Each change
+    rewrites the file atomically, and the changes made in a batch() are
+    written all at once.
+
     :param instance: An instance
     :type instance: lib389.DirSrv
     """
 
     def __init__(self, instance, serverid=None):
         self._instance = instance
-        self._contents = []
+        # Changes are only written at the end of the outermost batch
+        self._batch_depth = 0
+        self._batch_dirty = False
 
         if serverid:
             # Get the dse.ldif from the instance name
@@ -47,19 +125,38 @@ class DSEldif(DSLint):
             ds_paths = Paths(self._instance.serverid, self._instance)
             self.path = os.path.join(ds_paths.config_dir, 'dse.ldif')
 
+        self._load()
+
+    def _load(self):
+        """Parse dse.ldif into its entries, and index them by DN"""
+
+        # The lines before the first entry
+        self._preamble = []
+        self._entries = []
+        self._dns = {}
+        entry = None
         with open(self.path, 'r') as file_dse:
-            processed_line = ""
-            for line in file_dse.readlines():
-                if not line.startswith(' '):
-                    if processed_line:
-                        self._contents.append(processed_line)
-
-                    if line.startswith('dn:'):
-                        processed_line = line.lower()
+            for line in file_dse:
+                if line.startswith(' ') and (entry is not None or self._preamble):
+                    # A folded line continues the previous one
+                    if entry is None:
+                        self._preamble[-1] += line
+                    elif entry.lines:
+                        entry.lines[-1] += line
                     else:
-                        processed_line = line
+                        entry.raw_dn += line
+                        entry.dn = _parse_line(entry.raw_dn)[1]
+                elif line[:3].lower() == 'dn:':
+                    if entry is not None:
+                        self._dns.setdefault(_normalize_dn(entry.dn), entry)
+                    entry = _DSEEntry(line)
+                    self._entries.append(entry)
+                elif entry is None:
+                    self._preamble.append(line)
                 else:
-                    processed_line = processed_line[:-1] + line[1:]
+                    entry.lines.append(line)
+        if entry is not None:
+            self._dns.setdefault(_normalize_dn(entry.dn), entry)
 
     @classmethod
     def lint_uid(cls):
@@ -89,40 +186,91 @@ class DSEldif(DSLint):
                 yield report
 
     def _update(self):
-        """Update the dse.ldif with a new contents"""
-
-        with open(self.path, "w") as file_dse:
-            file_dse.write("".join(self._contents))
-
-    def _find_attr(self, entry_dn, attr):
-        """Find all attribute values and indexes under a given entry
-
-        Returns entry dn index and attribute data dict:
-        relative attribute indexes and the attribute value
+        """Update the dse.ldif with a new contents: write it to a temporary
+        file in the same directory, with the same permissions and owner, and
+        rename it over dse.ldif so the file is never half written
         """
 
-        entry_dn_i = self._contents.index("dn: {}\n".format(entry_dn.lower()))
-        attr_data = {}
+        if self._batch_depth > 0:
+            self._batch_dirty = True
+            return
 
-        # Find where the entry ends
+        st = os.stat(self.path)
+        (fd, tmp_path) = tempfile.mkstemp(prefix='.dse.ldif.', dir=os.path.dirname(self.path))
         try:
-            dn_end_i = self._contents[entry_dn_i:].index("\n")
-        except ValueError:
-            # We are in the end of the list
-            dn_end_i = len(self._contents)
-
-        entry_slice = self._contents[entry_dn_i:entry_dn_i + dn_end_i]
-
-        # Find the attribute
-        for line in entry_slice:
-            if line.startswith("{}:".format(attr)):
-                attr_value = line.split(" ", 1)[1][:-1]
-                attr_data.update({entry_slice.index(line): attr_value})
+            with os.fdopen(fd, "w") as file_dse:
+                file_dse.write("".join(self._preamble))
+                for entry in self._entries:
+                    file_dse.write(entry.raw_dn)
+                    file_dse.write("".join(entry.lines))
+                file_dse.flush()
+                os.fsync(file_dse.fileno())
+            os.chmod(tmp_path, st.st_mode & 0o7777)
+            try:
+                os.chown(tmp_path, st.st_uid, st.st_gid)
+            except PermissionError:
+                # Only root can give the file away, it is ours anyway
+                pass
+            os.rename(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @contextmanager
+    def batch(self):
+        """Make many changes with a single write of dse.ldif, at the end of
+        the block. If the block raises an exception, nothing is written and
+        the changes are undone.
+
+            with dse_ldif.batch():
+                dse_ldif.replace(DN_CONFIG, 'nsslapd-port', '390')
+                dse_ldif.delete(DN_CONFIG, 'nsslapd-secureport')
+        """
 
-        if not attr_data:
-            raise ValueError("Attribute {} wasn't found under dn: {}".format(attr, entry_dn.lower()))
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_dirty:
+                self._batch_dirty = False
+                self._load()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._batch_dirty:
+            self._batch_dirty = False
+            self._update()
+
+    def _get_entry(self, entry_dn):
+        """Return the entry of a DN, raise ValueError if there is none"""
+
+        entry = self._dns.get(_normalize_dn(entry_dn))
+        if entry is None:
+            raise ValueError("Entry dn: {} wasn't found".format(entry_dn.lower()))
+        return entry
+
+    def get_dns(self):
+        """Return the DNs of all the entries, in the order of the file"""
+
+        return [entry.dn for entry in self._entries]
+
+    def get_entry(self, entry_dn):
+        """Return all the attributes of an entry
+
+        :param entry_dn: a DN of entry we want to get
+        :type entry_dn: str
+        :returns: A dict of attribute name -> list of values, None if there is no such entry
+        """
 
-        return entry_dn_i, attr_data
+        entry = self._dns.get(_normalize_dn(entry_dn))
+        if entry is None:
+            return None
+        attrs = {}
+        for raw in entry.lines:
+            if raw.strip() and not raw.startswith('#'):
+                (attr, value) = _parse_line(raw)
+                attrs.setdefault(attr, []).append(value)
+        return attrs
 
     def get(self, entry_dn, attr, single=False):
         """Return attribute values under a given entry
@@ -135,14 +283,14 @@ class DSEldif(DSLint):
         :type sigle: boolean
         """
 
-        try:
-            _, attr_data = self._find_attr(entry_dn, attr)
-        except ValueError:
+        entry = self._dns.get(_normalize_dn(entry_dn))
+        if entry is None:
+            return None
+        vals = entry.values(attr)
+        if not vals:
             return None
-
-        vals = list(attr_data.values())
         if single:
-            return vals[0] if len(vals) > 0 else None
+            return vals[0]
         return vals
 
     def add(self, entry_dn, attr, value):
@@ -156,8 +304,7 @@ class DSEldif(DSLint):
         :type value: str
         """
 
-        entry_dn_i = self._contents.index("dn: {}\n".format(entry_dn.lower()))
-        self._contents.insert(entry_dn_i+1, "{}: {}\n".format(attr, value))
+        self._get_entry(entry_dn).add(attr, value)
         self._update()
 
     def delete(self, entry_dn, attr, value=None):
@@ -171,15 +318,10 @@ class DSEldif(DSLint):
         :type value: str
         """
 
-        entry_dn_i, attr_data = self._find_attr(entry_dn, attr)
-
-        if value is not None:
-            for attr_i, attr_value in attr_data.items():
-                if attr_value == value:
-                    del self._contents[entry_dn_i + attr_i]
-        else:
-            for attr_i in sorted(attr_data.keys(), reverse=True):
-                del self._contents[entry_dn_i + attr_i]
+        entry = self._get_entry(entry_dn)
+        if not entry.values(attr):
+            raise ValueError("Attribute {} wasn't found under dn: {}".format(attr, entry_dn.lower()))
+        entry.delete(attr, value)
         self._update()
 
     def replace(self, entry_dn, attr, value):
@@ -193,13 +335,24 @@ class DSEldif(DSLint):
         :type value: str
         """
 
-        try:
-            self.delete(entry_dn, attr)
-        except ValueError as e:
-            self._instance.log.debug("During replace operation: {}".format(e))
-        self.add(entry_dn, attr, value)
+        entry = self._get_entry(entry_dn)
+        # The new value takes the place of the old ones
+        i = entry.delete(attr)
+        if i is None:
+            self._instance.log.debug("During replace operation: Attribute {} wasn't found under dn: {}".format(
+                                     attr, entry_dn.lower()))
+        entry.add(attr, value, i)
         self._update()
 
+    def _unfolded_lines(self):
+        """Return the lines of dse.ldif unfolded, with the DNs lowercased"""
+
+        lines = []
+        for entry in self._entries:
+            lines.append("dn: {}\n".format(entry.dn.lower()))
+            lines.extend(raw.replace('\n ', '') for raw in entry.lines)
+        return lines
+
     # Read NsState helper functions
     def _flipend(self, end):
         if end == '<':
@@ -287,7 +440,7 @@ class DSEldif(DSLint):
         nsstate = ""
         states = []
 
-        for line in self._contents:
+        for line in self._unfolded_lines():
             if line.startswith("dn: "):
                 dn = line[4:].strip()
                 if dn.startswith("cn=replica"):
@@ -12,7 +12,8 @@ import time
 import subprocess
 from enum import Enum
 import ldap
-from lib389._mapped_object import DSLdapObject, DSLdapObjects, _gen_or, _gen_filter, _term_gen
+from ldap.dn import str2dn, dn2str
+from lib389._mapped_object import DSLdapObject, DSLdapObjects, _gen_or, _gen_filter, _term_gen, DEFAULT_PAGE_SIZE
 from lib389._constants import SER_ROOT_DN, SER_ROOT_PW
 from lib389.utils import gentime_to_posix_time, gentime_to_datetime
 from lib389.plugins import AccountPolicyPlugin, AccountPolicyConfig, AccountPolicyEntry
@@ -35,6 +36,167 @@ class AccountState(Enum):
             return f'{self.value}'
 
 
+def _first_value(values, attr):
+    # The first value of attr in a dict of values, or "" if it has none
+    vals = values.get(attr)
+    if not vals:
+        for (key, key_vals) in values.items():
+            if attr and key.lower() == attr.lower():
+                vals = key_vals
+    return vals[0] if vals else ""
+
+
+class AccountStatusContext(object):
+    """The Account Policy settings and the disabled roles that the status
+    of accounts depends on. They are read once, and the settings of each
+    root suffix are resolved the first time an account of that suffix is
+    evaluated, so that the status of many accounts can be computed from
+    their own attributes only.
+
+    :param instance: An instance
+    :type instance: lib389.DirSrv
+    """
+
+    def __init__(self, instance):
+        self._instance = instance
+        self._log = instance.log
+        self.process_account_policy = False
+        self.state_attr = ""
+        self.alt_state_attr = ""
+        self.spec_attr = ""
+        self.limit_attr = ""
+        self._config = None
+        self._root_suffixes = None
+        # Root suffix (lowercased) -> (limit, the DNs of the disabled roles)
+        self._suffix_settings = {}
+
+        # Fetch Account Policy data if its enabled
+        plugin = AccountPolicyPlugin(instance)
+        try:
+            self.process_account_policy = plugin.status()
+        except IndexError:
+            self._log.debug("The bound user doesn't have rights to access Account Policy settings. Not checking.")
+
+        if self.process_account_policy:
+            config_dn = plugin.get_attr_val_utf8("nsslapd-pluginarg0")
+            self._config = AccountPolicyConfig(instance, config_dn)
+            config_settings = self._config.get_attrs_vals_utf8(["stateattrname", "altstateattrname",
+                                                                "specattrname", "limitattrname"])
+            self.state_attr = _first_value(config_settings, "stateattrname")
+            self.alt_state_attr = _first_value(config_settings, "altstateattrname")
+            self.spec_attr = _first_value(config_settings, "specattrname")
+            self.limit_attr = _first_value(config_settings, "limitattrname")
+
+    @property
+    def attrlist(self):
+        """The account attributes that the status is evaluated from"""
+
+        attrs = ["createTimestamp", "modifyTimestamp", "nsAccountLock", "nsRole"]
+        for attr in (self.state_attr, self.alt_state_attr):
+            if attr and attr.lower() not in [a.lower() for a in attrs]:
+                attrs.append(attr)
+        return attrs
+
+    def root_suffix(self, dn):
+        """Get the root suffix to which an entry belongs, as
+        MappingTrees.get_root_suffix_by_entry does, but with the mapping
+        trees listed only once.
+
+        :param dn: An entry DN
+        :type dn: str
+        :returns: str, or None if the entry doesn't belong to any suffix
+        """
+
+        if self._root_suffixes is None:
+            try:
+                self._root_suffixes = {mt.rdn.lower(): mt.rdn for mt in MappingTrees(self._instance).list()}
+            except ldap.NO_SUCH_OBJECT:
+                self._root_suffixes = {}
+        dn_parts = str2dn(dn)
+        while dn_parts:
+            suffix = self._root_suffixes.get(dn2str(dn_parts).lower())
+            if suffix is not None:
+                return suffix
+            dn_parts.pop(0)
+        return None
+
+    def _settings(self, root_suffix):
+        key = root_suffix.lower() if root_suffix else None
+        if key in self._suffix_settings:
+            return self._suffix_settings[key]
+
+        limit = ""
+        if self.process_account_policy:
+            accpol_entry_dn = ""
+            if root_suffix:
+                for cos in CosTemplates(self._instance, root_suffix).list():
+                    if cos.present(self.spec_attr):
+                        accpol_entry_dn = cos.get_attr_val_utf8_l(self.spec_attr)
+            if accpol_entry_dn:
+                accpol_entry = AccountPolicyEntry(self._instance, accpol_entry_dn)
+            else:
+                accpol_entry = self._config
+            limit = accpol_entry.get_attr_val_utf8_l(self.limit_attr)
+
+        disabled_role_dns = None
+        if root_suffix:
+            try:
+                disabled_roles = Roles(self._instance, root_suffix).get_disabled_roles()
+                disabled_role_dns = set([role.dn.lower() for role in disabled_roles.keys()])
+            except ldap.NO_SUCH_OBJECT:
+                pass
+        else:
+            self._log.debug("The bound user doesn't have rights to access disabled roles settings. Not checking.")
+
+        self._suffix_settings[key] = (limit, disabled_role_dns)
+        return self._suffix_settings[key]
+
+    def evaluate(self, account, account_data):
+        """Evaluate the status of an account from its attributes
+
+        :param account: The account
+        :type account: lib389.idm.account.Account
+        :param account_data: The values of the attributes of attrlist
+        :type account_data: dict
+        :returns: a dict in the format of Account.status()
+        """
+
+        (limit, disabled_role_dns) = self._settings(self.root_suffix(account.dn))
+
+        last_login_time = _first_value(account_data, self.state_attr)
+        if not last_login_time:
+            last_login_time = _first_value(account_data, self.alt_state_attr)
+
+        create_time = _first_value(account_data, "createTimestamp")
+        modify_time = _first_value(account_data, "modifyTimestamp")
+
+        # Locked indirectly through a role
+        if disabled_role_dns:
+            locked_indirectly_role_dn = ""
+            for role in account_data.get("nsRole", []):
+                if role.lower() in disabled_role_dns:
+                    locked_indirectly_role_dn = role.lower()
+            if locked_indirectly_role_dn:
+                return account._format_status_message(AccountState.INDIRECTLY_LOCKED, create_time, modify_time,
+                                                      last_login_time, limit, locked_indirectly_role_dn)
+
+        # Locked directly
+        if _first_value(account_data, "nsAccountLock") == "true":
+            return account._format_status_message(AccountState.DIRECTLY_LOCKED,
+                                                  create_time, modify_time, last_login_time, limit)
+
+        # Locked indirectly through Account Policy plugin
+        if self.process_account_policy and last_login_time:
+            # Now check the Account Policy Plugin inactivity limits
+            remaining_time = float(limit) - (time.mktime(time.gmtime()) - gentime_to_posix_time(last_login_time))
+            if remaining_time <= 0:
+                return account._format_status_message(AccountState.INACTIVITY_LIMIT_EXCEEDED,
+                                                      create_time, modify_time, last_login_time, limit)
+        # All checks are passed - we are active
+        return account._format_status_message(AccountState.ACTIVATED, create_time, modify_time,
+                                              last_login_time, limit)
+
+
 class Account(DSLdapObject):
     """A single instance of Account entry
 
@@ -70,12 +232,6 @@ class Account(DSLdapObject):
             result["role_dn"] = role_dn
         return result
 
-    def _dict_get_with_ignore_indexerror(self, dict, attr):
-        try:
-            return dict[attr][0]
-        except IndexError:
-            return ""
-
     def status(self):
         """Check if account is locked by Account Policy plugin or
         nsAccountLock (directly or indirectly)
@@ -84,92 +240,9 @@ class Account(DSLdapObject):
                   {"status": status, "params": activity_data, "calc_time": epoch_time}
         """
 
-        inst = self._instance
-
-        # Fetch Account Policy data if its enabled
-        plugin = AccountPolicyPlugin(inst)
-        state_attr = ""
-        alt_state_attr = ""
-        limit = ""
-        spec_attr = ""
-        limit_attr = ""
-        process_account_policy = False
-        try:
-            process_account_policy = plugin.status()
-        except IndexError:
-            self._log.debug("The bound user doesn't have rights to access Account Policy settings. Not checking.")
-
-        if process_account_policy:
-            config_dn = plugin.get_attr_val_utf8("nsslapd-pluginarg0")
-            config = AccountPolicyConfig(inst, config_dn)
-            config_settings = config.get_attrs_vals_utf8(["stateattrname", "altstateattrname",
-                                                          "specattrname", "limitattrname"])
-            state_attr = self._dict_get_with_ignore_indexerror(config_settings, "stateattrname")
-            alt_state_attr = self._dict_get_with_ignore_indexerror(config_settings, "altstateattrname")
-            spec_attr = self._dict_get_with_ignore_indexerror(config_settings, "specattrname")
-            limit_attr = self._dict_get_with_ignore_indexerror(config_settings, "limitattrname")
-
-            mapping_trees = MappingTrees(inst)
-            root_suffix = mapping_trees.get_root_suffix_by_entry(self.dn)
-            cos_entries = CosTemplates(inst, root_suffix)
-            accpol_entry_dn = ""
-            for cos in cos_entries.list():
-                if cos.present(spec_attr):
-                    accpol_entry_dn = cos.get_attr_val_utf8_l(spec_attr)
-            if accpol_entry_dn:
-                accpol_entry = AccountPolicyEntry(inst, accpol_entry_dn)
-            else:
-                accpol_entry = config
-            limit = accpol_entry.get_attr_val_utf8_l(limit_attr)
-
-        # Fetch account data
-        account_data = self.get_attrs_vals_utf8(["createTimestamp", "modifyTimeStamp",
-                                                 "nsAccountLock", state_attr])
-
-        last_login_time = self._dict_get_with_ignore_indexerror(account_data, state_attr)
-        if not last_login_time:
-            last_login_time = self._dict_get_with_ignore_indexerror(account_data, alt_state_attr)
-
-        create_time = self._dict_get_with_ignore_indexerror(account_data, "createTimestamp")
-        modify_time = self._dict_get_with_ignore_indexerror(account_data, "modifyTimeStamp")
-
-        acct_roles = self.get_attr_vals_utf8_l("nsRole")
-        mapping_trees = MappingTrees(inst)
-        root_suffix = ""
-        try:
-            root_suffix = mapping_trees.get_root_suffix_by_entry(self.dn)
-        except ldap.NO_SUCH_OBJECT:
-            self._log.debug("The bound user doesn't have rights to access disabled roles settings. Not checking.")
-        if root_suffix:
-            roles = Roles(inst, root_suffix)
-            try:
-                disabled_roles = roles.get_disabled_roles()
-
-                # Locked indirectly through a role
-                locked_indirectly_role_dn = ""
-                for role in acct_roles:
-                    if str.lower(role) in [str.lower(role.dn) for role in disabled_roles.keys()]:
-                        locked_indirectly_role_dn = role
-                if locked_indirectly_role_dn:
-                    return self._format_status_message(AccountState.INDIRECTLY_LOCKED, create_time, modify_time,
-                                                       last_login_time, limit, locked_indirectly_role_dn)
-            except ldap.NO_SUCH_OBJECT:
-                pass
-
-        # Locked directly
-        if self._dict_get_with_ignore_indexerror(account_data, "nsAccountLock") == "true":
-            return self._format_status_message(AccountState.DIRECTLY_LOCKED,
-                                               create_time, modify_time, last_login_time, limit)
-
-        # Locked indirectly through Account Policy plugin
-        if process_account_policy and last_login_time:
-            # Now check the Account Policy Plugin inactivity limits
-            remaining_time = float(limit) - (time.mktime(time.gmtime()) - gentime_to_posix_time(last_login_time))
-            if remaining_time <= 0:
-                return self._format_status_message(AccountState.INACTIVITY_LIMIT_EXCEEDED,
-                                                   create_time, modify_time, last_login_time, limit)
-        # All checks are passed - we are active
-        return self._format_status_message(AccountState.ACTIVATED, create_time, modify_time, last_login_time, limit)
+        context = AccountStatusContext(self._instance)
+        account_data = self.get_attrs_vals_utf8(context.attrlist)
+        return context.evaluate(self, account_data)
 
     def ensure_lock(self):
         """Ensure nsAccountLock is set to 'true'"""
@@ -367,6 +440,27 @@ class Accounts(DSLdapObjects):
         )
 
 
+    def iter_status(self, search=None, scope=None, page_size=DEFAULT_PAGE_SIZE):
+        """Evaluate the status of the accounts with a single paged search.
+        The Account Policy settings and disabled roles are read once per
+        root suffix, and each account is evaluated from the attributes
+        fetched with it, as Account.status() does.
+
+        :param search: An additional filter to apply, or None
+        :type search: str
+        :param scope: The search scope, defaults to the scope of the object
+        :type scope: int
+        :param page_size: The number of entries per page
+        :type page_size: int
+        :returns: A generator of (account, status) tuples
+        """
+
+        context = AccountStatusContext(self._instance)
+        attrlist = context.attrlist
+        for account in self.iter_filter(search, scope, attrlist=attrlist, page_size=page_size):
+            yield (account, context.evaluate(account, account.get_attrs_vals_utf8(attrlist)))
+
+
 class Anonymous(DSLdapObject):
     """A single instance of Anonymous bind
 
@@ -6,13 +6,87 @@
 # See LICENSE for details.
 # --- END COPYRIGHT BLOCK ---
 
+import ldap
 from lib389._mapped_object import DSLdapObject, DSLdapObjects
-from lib389.utils import ds_is_older, ensure_str
+from lib389.utils import ds_is_older, ensure_str, ensure_bytes, normalizeDN
 
 MUST_ATTRIBUTES = [
     'cn',
 ]
 RDN = 'cn'
+# The number of values sent in each modify by add_members, remove_members
+# and sync_members
+DEFAULT_MEMBER_CHUNK = 1000
+
+
+def _compare_member(group, attr, dn):
+    # An LDAP compare, so that the server checks the value rather than
+    # sending back all the values of the attribute
+    try:
+        return group._instance.compare_ext_s(group._dn, attr, ensure_bytes(dn),
+                                             serverctrls=group._server_controls,
+                                             clientctrls=group._client_controls)
+    except (ldap.NO_SUCH_ATTRIBUTE, ldap.UNDEFINED_TYPE):
+        return False
+
+
+def _modify_members(group, attr, action, dns, chunk):
+    # Send the values in modifies of up to chunk values each
+    for i in range(0, len(dns), chunk):
+        group.set(attr, dns[i:i + chunk], action=action)
+
+
+def _current_members(group, attr):
+    # The members as they are on the server, keyed by normalized DN
+    group.refresh()
+    return {normalizeDN(dn): dn for dn in group.get_attr_vals_utf8(attr)}
+
+
+def _diff_members(group, attr, dns):
+    """Compare the wanted members with the current ones, read once
+
+    :returns: A tuple of the DNs of dns that are not members (in their order,
+              without duplicates) and a dict of the current members, keyed
+              by normalized DN
+    """
+    current = _current_members(group, attr)
+    missing = {}
+    for dn in dns:
+        dn = ensure_str(dn)
+        key = normalizeDN(dn)
+        if key not in current and key not in missing:
+            missing[key] = dn
+    return (list(missing.values()), current)
+
+
+def _add_members(group, attr, dns, chunk):
+    (missing, _) = _diff_members(group, attr, dns)
+    _modify_members(group, attr, ldap.MOD_ADD, missing, chunk)
+    return missing
+
+
+def _remove_members(group, attr, dns, chunk):
+    current = _current_members(group, attr)
+    present = {}
+    for dn in dns:
+        key = normalizeDN(ensure_str(dn))
+        if key in current:
+            present[key] = current[key]
+    present = list(present.values())
+    _modify_members(group, attr, ldap.MOD_DELETE, present, chunk)
+    return present
+
+
+def _sync_members(group, attr, dns, chunk):
+    dns = list(dns)
+    (missing, current) = _diff_members(group, attr, dns)
+    wanted = set([normalizeDN(ensure_str(dn)) for dn in dns])
+    extra = [dn for (key, dn) in current.items() if key not in wanted]
+    # Add first, so that the group is never emptied on the way
+    _modify_members(group, attr, ldap.MOD_ADD, missing, chunk)
+    _modify_members(group, attr, ldap.MOD_DELETE, extra, chunk)
+    return (missing, extra)
+
 
 class Group(DSLdapObject):
     """A single instance of Group entry
@@ -43,13 +117,14 @@ class Group(DSLdapObject):
         return self.get_attr_vals_utf8('member')
 
     def is_member(self, dn):
-        """Check if DN is a member
+        """Check if DN is a member, with an LDAP compare operation
 
         :param dn: Entry DN
         :type dn: str
+        :returns: True if DN is a member
         """
 
-        return self.present('member', dn)
+        return _compare_member(self, 'member', dn)
 
     def add_member(self, dn):
         """Add DN as a member
@@ -76,7 +151,48 @@ class Group(DSLdapObject):
         :type dn: str
         """
 
-        self.ensure_present('member', dn)
+        if not self.is_member(dn):
+            self.add_member(dn)
+
+    def add_members(self, dns, chunk=DEFAULT_MEMBER_CHUNK):
+        """Add the DNs that are not members yet. The members are read once,
+        and the new ones are added with modifies of up to chunk values.
+
+        :param dns: Entry DNs
+        :type dns: list of str
+        :param chunk: The number of values per modify
+        :type chunk: int
+        :returns: The list of DNs that were added
+        """
+
+        return _add_members(self, 'member', dns, chunk)
+
+    def remove_members(self, dns, chunk=DEFAULT_MEMBER_CHUNK):
+        """Remove the DNs that are members. The members are read once, and
+        removed with modifies of up to chunk values.
+
+        :param dns: Entry DNs
+        :type dns: list of str
+        :param chunk: The number of values per modify
+        :type chunk: int
+        :returns: The list of DNs that were removed
+        """
+
+        return _remove_members(self, 'member', dns, chunk)
+
+    def sync_members(self, dns, chunk=DEFAULT_MEMBER_CHUNK):
+        """Make the members of the group exactly the given DNs. The members
+        are read once, and only the difference is applied, with modifies of
+        up to chunk values.
+
+        :param dns: Entry DNs of the wanted members
+        :type dns: list or set of str
+        :param chunk: The number of values per modify
+        :type chunk: int
+        :returns: A tuple of the list of DNs added and the list of DNs removed
+        """
+
+        return _sync_members(self, 'member', dns, chunk)
 
 class Groups(DSLdapObjects):
     """DSLdapObjects that represents Groups entry
@@ -118,7 +234,7 @@ class UniqueGroup(DSLdapObject):
 
     def is_member(self, dn):
         # Check if dn is a member
-        return self.present('uniquemember', dn)
+        return _compare_member(self, 'uniquemember', dn)
 
     def add_member(self, dn):
         self.add('uniquemember', dn)
@@ -126,6 +242,18 @@ class UniqueGroup(DSLdapObject):
     def remove_member(self, dn):
         self.remove('uniquemember', dn)
 
+    def add_members(self, dns, chunk=DEFAULT_MEMBER_CHUNK):
+        # See Group.add_members
+        return _add_members(self, 'uniquemember', dns, chunk)
+
+    def remove_members(self, dns, chunk=DEFAULT_MEMBER_CHUNK):
+        # See Group.remove_members
+        return _remove_members(self, 'uniquemember', dns, chunk)
+
+    def sync_members(self, dns, chunk=DEFAULT_MEMBER_CHUNK):
+        # See Group.sync_members
+        return _sync_members(self, 'uniquemember', dns, chunk)
+
 
 class UniqueGroups(DSLdapObjects):
     # WARNING!!!
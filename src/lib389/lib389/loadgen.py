@@ -0,0 +1,648 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+
+"""
+An in-process LDAP load generator, to complement the ldclt wrapper.
+
+Worker processes run a weighted mix of loads over asynchronous connections,
+with a bounded number of operations outstanding on each connection. The
+latency of every operation is recorded in a histogram, the completions in
+a timeline, and the errors by type:
+
+    gen = LoadGenerator(inst, [
+        SearchLoad(DEFAULT_SUFFIX, '(uid=user_{0:07d})', low=1, high=6000, weight=8),
+        ModifyLoad('uid=user_{0:07d},ou=people,' + DEFAULT_SUFFIX, low=1, high=6000, weight=2),
+    ])
+    result = gen.run(duration=30)
+    result.summary()['search']['p99_ms']
+    result.write_json('/tmp/load.json')
+
+The filters and DNs of the loads are formatted with a random number between
+low and high, so they can target the entries created by dbgen or ldclt.
+Calling this on a production DS instance is likely a fast way to MESS THINGS UP.
+"""
+
+import csv
+import json
+import ldap
+import os
+import random
+import select
+import time
+from bisect import bisect
+from concurrent.futures import ProcessPoolExecutor
+from lib389.utils import ensure_bytes
+
+DEFAULT_LOAD_DURATION = 10
+# The connections opened by each worker for each kind of load
+DEFAULT_LOAD_CONNECTIONS = 4
+# The operations outstanding at once on each connection
+DEFAULT_LOAD_DEPTH = 4
+# The seconds covered by each point of the timeline
+DEFAULT_LOAD_INTERVAL = 1
+# The seconds to wait for the operations outstanding at the end of the run
+DEFAULT_LOAD_TIMEOUT = 30
+# The seconds given to the workers to connect before the load starts
+LOAD_STARTUP_DELAY = 1
+
+
+class LatencyHistogram(object):
+    """Latencies in microseconds, counted in buckets of two significant
+    digits, so each bucket is precise within 10% and the histograms of the
+    workers can be merged.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _bucket(usec):
+        scale = 1
+        while usec >= 100:
+            usec //= 10
+            scale *= 10
+        return (usec * scale, scale)
+
+    def record(self, latency):
+        """Record a latency
+
+        :param latency: The latency in seconds
+        :type latency: float
+        """
+        usec = int(round(latency * 1000000))
+        (bucket, scale) = self._bucket(usec)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += usec
+        self.max = max(self.max, usec)
+
+    def merge(self, other):
+        """Add the latencies of another histogram to this one
+
+        :param other: The histogram to merge
+        :type other: LatencyHistogram
+        """
+        for (bucket, count) in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Return the latency under which pct percent of the operations completed
+
+        :param pct: The percentile, from 0 to 100
+        :type pct: float
+        :returns: The latency in microseconds, the highest of its bucket
+        """
+        if self.count == 0:
+            return 0
+        rank = max(1, self.count * pct / 100.0)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                (bucket, scale) = self._bucket(bucket)
+                return min(bucket + scale - 1, self.max)
+        return self.max
+
+    def mean(self):
+        """Return the mean latency in microseconds"""
+        if self.count == 0:
+            return 0
+        return self.total / self.count
+
+
+class LoadStats(object):
+    """The completions, errors and latencies of one kind of load"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = {}
+
+    @property
+    def count(self):
+        return self.histogram.count
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        for (error, count) in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+
+
+class LoadResult(object):
+    """The result of a load generator run, the operations of all the workers.
+
+    :param interval: The seconds covered by each point of the timeline
+    :type interval: int
+    """
+
+    def __init__(self, interval=DEFAULT_LOAD_INTERVAL):
+        self.interval = interval
+        self.duration = 0
+        # name -> LoadStats
+        self.operations = {}
+        # interval index -> {name: completions}
+        self.timeline = {}
+
+    def _stats(self, name):
+        if name not in self.operations:
+            self.operations[name] = LoadStats()
+        return self.operations[name]
+
+    def _tick(self, name, elapsed):
+        point = self.timeline.setdefault(int(elapsed // self.interval), {})
+        point[name] = point.get(name, 0) + 1
+
+    def record(self, name, latency, elapsed):
+        """Record a completed operation
+
+        :param name: The name of the load
+        :type name: str
+        :param latency: The latency of the operation in seconds
+        :type latency: float
+        :param elapsed: The seconds since the start of the run
+        :type elapsed: float
+        """
+        self._stats(name).histogram.record(latency)
+        self._tick(name, elapsed)
+
+    def record_error(self, name, error):
+        """Record a failed operation
+
+        :param name: The name of the load
+        :type name: str
+        :param error: The error, counted by its type
+        :type error: Exception or str
+        """
+        if isinstance(error, Exception):
+            error = error.__class__.__name__
+        errors = self._stats(name).errors
+        errors[error] = errors.get(error, 0) + 1
+
+    def merge(self, other):
+        """Add the operations of another result, from another worker
+
+        :param other: The result to merge
+        :type other: LoadResult
+        """
+        self.duration = max(self.duration, other.duration)
+        for (name, stats) in other.operations.items():
+            self._stats(name).merge(stats)
+        for (index, point) in other.timeline.items():
+            mine = self.timeline.setdefault(index, {})
+            for (name, count) in point.items():
+                mine[name] = mine.get(name, 0) + count
+
+    def _summarise(self, stats):
+        hist = stats.histogram
+        return {
+            'count': hist.count,
+            'errors': sum(stats.errors.values()),
+            'error_types': dict(stats.errors),
+            'rate': round(hist.count / self.duration, 2) if self.duration else 0,
+            'mean_ms': round(hist.mean() / 1000.0, 3),
+            'p50_ms': round(hist.percentile(50) / 1000.0, 3),
+            'p95_ms': round(hist.percentile(95) / 1000.0, 3),
+            'p99_ms': round(hist.percentile(99) / 1000.0, 3),
+            'max_ms': round(hist.max / 1000.0, 3),
+        }
+
+    def summary(self):
+        """Return the statistics of each load, and of all of them under 'total'
+
+        :returns: A dict of name -> dict with the count, errors, rate per
+                  second, and the mean, p50, p95, p99 and max latencies in ms
+        """
+        total = LoadStats()
+        result = {}
+        for name in sorted(self.operations):
+            stats = self.operations[name]
+            total.merge(stats)
+            result[name] = self._summarise(stats)
+        result['total'] = self._summarise(total)
+        return result
+
+    def throughput(self):
+        """Return the completions per second of each load over time
+
+        :returns: A list of dicts with the 'time' in seconds since the start,
+                  and the rate of each load
+        """
+        points = []
+        names = sorted(self.operations)
+        if not self.timeline:
+            return points
+        for index in range(max(self.timeline) + 1):
+            point = self.timeline.get(index, {})
+            rates = {'time': index * self.interval}
+            for name in names:
+                rates[name] = point.get(name, 0) / self.interval
+            points.append(rates)
+        return points
+
+    def write_json(self, path):
+        """Write the summary and the throughput over time as JSON
+
+        :param path: The file to write
+        :type path: str
+        """
+        with open(path, 'w') as f:
+            json.dump({
+                'duration': round(self.duration, 3),
+                'interval': self.interval,
+                'summary': self.summary(),
+                'throughput': self.throughput(),
+            }, f, indent=4)
+
+    def write_csv(self, path, timeline_path=None):
+        """Write the summary as CSV, one row per load and the total last
+
+        :param path: The file to write
+        :type path: str
+        :param timeline_path: Also write the throughput over time to this file
+        :type timeline_path: str
+        """
+        fields = ['count', 'errors', 'rate', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['operation'] + fields)
+            for (name, stats) in self.summary().items():
+                writer.writerow([name] + [stats[field] for field in fields])
+        if timeline_path is not None:
+            names = sorted(self.operations)
+            with open(timeline_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['time'] + names)
+                for point in self.throughput():
+                    writer.writerow([point['time']] + [point[name] for name in names])
+
+
+class Load(object):
+    """A kind of operation of the mix, sent by send(conn, rng, token) on an
+    asynchronous connection, which returns the message id.
+
+    :param weight: The share of the operations of the mix
+    :type weight: int
+    :param name: The name of the load in the results
+    :type name: str
+    """
+
+    # Binds change the identity of their connection, and need it idle
+    exclusive = False
+
+    def __init__(self, weight=1, name=None):
+        self.weight = weight
+        self.name = name
+
+    def send(self, conn, rng, token):
+        raise NotImplementedError
+
+
+class SearchLoad(Load):
+    """Searches, the filter is formatted with a random number in [low, high]
+
+    :param basedn: The base of the searches
+    :type basedn: str
+    :param filterstr: The filter, such as '(uid=user_{0:07d})'
+    :type filterstr: str
+    :param scope: The scope of the searches
+    :type scope: int
+    :param attrlist: The attributes to return, all of them if None
+    :type attrlist: list of str
+    :param low: The lowest random number
+    :type low: int
+    :param high: The highest random number
+    :type high: int
+    """
+
+    def __init__(self, basedn, filterstr, scope=ldap.SCOPE_SUBTREE, attrlist=None,
+                 low=1, high=1, weight=1, name='search'):
+        self.basedn = basedn
+        self.filterstr = filterstr
+        self.scope = scope
+        self.attrlist = attrlist
+        self.low = low
+        self.high = high
+        super(SearchLoad, self).__init__(weight, name)
+
+    def send(self, conn, rng, token):
+        filterstr = self.filterstr.format(rng.randint(self.low, self.high))
+        return conn.search_ext(self.basedn, self.scope, filterstr, self.attrlist)
+
+
+class BindLoad(Load):
+    """Simple binds, the DN and password are formatted with a random number
+    in [low, high]. The binds run on their own connections.
+
+    :param dn: The DN to bind as, such as 'uid=user_{0:07d},ou=people,dc=example,dc=com'
+    :type dn: str
+    :param password: The password, such as 'user_{0:07d}'
+    :type password: str
+    """
+
+    exclusive = True
+
+    def __init__(self, dn, password, low=1, high=1, weight=1, name='bind'):
+        self.dn = dn
+        self.password = password
+        self.low = low
+        self.high = high
+        super(BindLoad, self).__init__(weight, name)
+
+    def send(self, conn, rng, token):
+        number = rng.randint(self.low, self.high)
+        return conn.simple_bind(self.dn.format(number), self.password.format(number))
+
+
+class ModifyLoad(Load):
+    """Replaces of an attribute with a random value, the DN is formatted with
+    a random number in [low, high]
+
+    :param dn: The DN to modify, such as 'uid=user_{0:07d},ou=people,dc=example,dc=com'
+    :type dn: str
+    :param attr: The attribute to replace
+    :type attr: str
+    """
+
+    def __init__(self, dn, attr='description', low=1, high=1, weight=1, name='modify'):
+        self.dn = dn
+        self.attr = attr
+        self.low = low
+        self.high = high
+        super(ModifyLoad, self).__init__(weight, name)
+
+    def send(self, conn, rng, token):
+        dn = self.dn.format(rng.randint(self.low, self.high))
+        value = ensure_bytes('%s %s' % (self.name, token))
+        return conn.modify_ext(dn, [(ldap.MOD_REPLACE, self.attr, [value])])
+
+
+class AddLoad(Load):
+    """Adds of new entries. The rdn and the values are formatted with a token
+    unique to each add, the entries are left in place after the run.
+
+    :param parent: The DN of the parent of the entries
+    :type parent: str
+    :param rdn: The rdn of the entries, such as 'cn=load_{0}'
+    :type rdn: str
+    :param properties: The attributes of the entries, such as
+                       {'objectClass': ['top', 'person'], 'cn': 'load_{0}', 'sn': 'load'}
+    :type properties: dict
+    """
+
+    def __init__(self, parent, rdn, properties, weight=1, name='add'):
+        self.parent = parent
+        self.rdn = rdn
+        self.properties = properties
+        super(AddLoad, self).__init__(weight, name)
+
+    def send(self, conn, rng, token):
+        modlist = []
+        for (attr, values) in self.properties.items():
+            if not isinstance(values, list):
+                values = [values]
+            modlist.append((attr, [ensure_bytes(v.format(token)) for v in values]))
+        return conn.add_ext('%s,%s' % (self.rdn.format(token), self.parent), modlist)
+
+
+class _LoadConnection(object):
+    # One asynchronous connection of a worker, and its outstanding operations
+
+    def __init__(self, settings, exclusive):
+        self.settings = settings
+        self.exclusive = exclusive
+        self.depth = 1 if exclusive else settings['depth']
+        # msgid -> (load, time sent)
+        self.pending = {}
+        self.conn = None
+
+    def open(self):
+        settings = self.settings
+        conn = ldap.initialize(settings['uri'])
+        conn.set_option(ldap.OPT_PROTOCOL_VERSION, ldap.VERSION3)
+        conn.set_option(ldap.OPT_REFERRALS, 0)
+        conn.set_option(ldap.OPT_NETWORK_TIMEOUT, settings['timeout'])
+        if settings['certdir'] is not None:
+            conn.set_option(ldap.OPT_X_TLS_CACERTDIR, settings['certdir'])
+        if settings['uri'].startswith('ldaps://'):
+            conn.set_option(ldap.OPT_X_TLS_REQUIRE_CERT, settings['reqcert'])
+            conn.set_option(ldap.OPT_X_TLS_NEWCTX, 0)
+        if not self.exclusive and settings['binddn']:
+            conn.simple_bind_s(settings['binddn'], settings['bindpw'])
+        self.conn = conn
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.unbind_s()
+            except ldap.LDAPError:
+                pass
+        self.conn = None
+
+    def fail(self, result, error):
+        # The connection is lost with its outstanding operations, reopen it
+        for (load, sent) in self.pending.values():
+            result.record_error(load.name, error)
+        self.pending = {}
+        self.close()
+        try:
+            self.open()
+        except ldap.LDAPError:
+            # Retried before the next operation sent on this connection
+            self.conn = None
+
+    def collect(self, result, start):
+        # Read the results available without waiting, return how many were read
+        done = 0
+        while self.pending:
+            try:
+                (rtype, rdata, msgid, rctrls) = self.conn.result3(ldap.RES_ANY, 1, 0)
+            except ldap.LDAPError as e:
+                info = e.args[0] if e.args and isinstance(e.args[0], dict) else {}
+                if info.get('msgid') in self.pending:
+                    (load, sent) = self.pending.pop(info['msgid'])
+                    result.record_error(load.name, e)
+                    done += 1
+                    continue
+                done += len(self.pending)
+                self.fail(result, e)
+                break
+            if rtype is None:
+                break
+            now = time.perf_counter()
+            if msgid in self.pending:
+                (load, sent) = self.pending.pop(msgid)
+                result.record(load.name, now - sent, time.time() - start)
+                done += 1
+        return done
+
+
+def _wait(connections, result, start, timeout):
+    # Wait for at least one result of the busy connections, or the timeout
+    busy = [c for c in connections if c.pending]
+    if not busy:
+        return
+    deadline = time.time() + timeout
+    while True:
+        # Poll first, libldap may have buffered results already
+        if sum(c.collect(result, start) for c in busy) > 0:
+            return
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        descs = {}
+        for c in busy:
+            if c.pending:
+                descs[c.conn.get_option(ldap.OPT_DESC)] = c
+        if not descs:
+            return
+        select.select(list(descs), [], [], min(remaining, 0.1))
+
+
+def _load_worker(settings, loads, worker, start, stop):
+    """Run the loads until stop, and return the LoadResult of this worker"""
+    result = LoadResult(settings['interval'])
+    rng = random.Random('%s:%s' % (settings['seed'], worker))
+    lanes = {}
+    for exclusive in set(load.exclusive for load in loads):
+        lanes[exclusive] = [_LoadConnection(settings, exclusive) for i in range(settings['connections'])]
+    connections = [c for lane in lanes.values() for c in lane]
+    cumulative = []
+    total = 0
+    for load in loads:
+        total += load.weight
+        cumulative.append(total)
+
+    try:
+        for c in connections:
+            c.open()
+        time.sleep(max(0, start - time.time()))
+
+        sent = 0
+        while time.time() < stop:
+            load = loads[bisect(cumulative, rng.random() * total)]
+            lane = lanes[load.exclusive]
+            conn = min(lane, key=lambda c: len(c.pending))
+            while len(conn.pending) >= conn.depth:
+                _wait(lane, result, start, stop - time.time())
+                if time.time() >= stop:
+                    break
+                conn = min(lane, key=lambda c: len(c.pending))
+            if len(conn.pending) >= conn.depth:
+                break
+            sent += 1
+            token = '%s-%s-%s' % (int(start), worker, sent)
+            try:
+                if conn.conn is None:
+                    conn.open()
+                msgid = load.send(conn.conn, rng, token)
+                conn.pending[msgid] = (load, time.perf_counter())
+            except ldap.SERVER_DOWN as e:
+                result.record_error(load.name, e)
+                if conn.conn is not None:
+                    conn.fail(result, e)
+                else:
+                    # Do not spin while the server is down
+                    time.sleep(0.1)
+            except ldap.LDAPError as e:
+                result.record_error(load.name, e)
+            for c in connections:
+                c.collect(result, start)
+
+        # Wait for the operations sent before the end of the run
+        deadline = time.time() + settings['timeout']
+        while any(c.pending for c in connections) and time.time() < deadline:
+            _wait(connections, result, start, deadline - time.time())
+        for c in connections:
+            for (load, sent_at) in c.pending.values():
+                result.record_error(load.name, 'TIMEOUT')
+            c.pending = {}
+        result.duration = time.time() - start
+    finally:
+        for c in connections:
+            c.close()
+    return result
+
+
+class LoadGenerator(object):
+    """Run a weighted mix of loads against an instance from worker processes.
+
+    :param instance: The instance to load, its uri and bind credentials are used
+    :type instance: lib389.DirSrv
+    :param loads: The loads to mix, SearchLoad, BindLoad, ModifyLoad or AddLoad
+    :type loads: list
+    :param workers: The number of worker processes, defaults to the number of CPUs
+    :type workers: int
+    :param connections: The connections of each worker, for each kind of load
+    :type connections: int
+    :param depth: The operations outstanding at once on each connection
+    :type depth: int
+    :param interval: The seconds covered by each point of the timeline
+    :type interval: int
+    :param seed: The random seed, a random one if None
+    :type seed: int
+    :param uri: The uri to connect to, instead of the one of the instance
+    :type uri: str
+    :param reqcert: The certificate policy of ldaps connections
+    :type reqcert: int
+    :param certdir: The CA certificate directory, the one of a local instance if None
+    :type certdir: str
+    :param timeout: The seconds to wait to connect, and for the last operations
+    :type timeout: int
+    """
+
+    def __init__(self, instance, loads, workers=None, connections=DEFAULT_LOAD_CONNECTIONS,
+                 depth=DEFAULT_LOAD_DEPTH, interval=DEFAULT_LOAD_INTERVAL, seed=None, uri=None,
+                 reqcert=ldap.OPT_X_TLS_HARD, certdir=None, timeout=DEFAULT_LOAD_TIMEOUT):
+        if not loads:
+            raise ValueError("At least one load is required")
+        if certdir is None and instance.isLocal:
+            certdir = instance.get_cert_dir()
+        self._instance = instance
+        self._log = instance.log
+        self.loads = loads
+        self.workers = workers or os.cpu_count() or 1
+        self.settings = {
+            'uri': uri or instance.toLDAPURL(),
+            'binddn': instance.binddn,
+            'bindpw': instance.bindpw,
+            'certdir': certdir,
+            'reqcert': reqcert,
+            'timeout': timeout,
+            'connections': connections,
+            'depth': depth,
+            'interval': interval,
+            'seed': seed if seed is not None else random.randrange(2 ** 32),
+        }
+
+    def run(self, duration=DEFAULT_LOAD_DURATION):
+        """Run the loads for duration seconds, after the workers are connected
+
+        :param duration: The seconds to run the loads for
+        :type duration: int
+        :returns: LoadResult
+        """
+        start = time.time() + LOAD_STARTUP_DELAY
+        stop = start + duration
+        self._log.debug("Running %s for %ss on %s workers against %s",
+                        ', '.join(load.name for load in self.loads), duration,
+                        self.workers, self.settings['uri'])
+        result = LoadResult(self.settings['interval'])
+        if self.workers == 1:
+            result.merge(_load_worker(self.settings, self.loads, 0, start, stop))
+            return result
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(_load_worker, self.settings, self.loads, worker, start, stop)
+                       for worker in range(self.workers)]
+            for future in futures:
+                result.merge(future.result())
+        return result
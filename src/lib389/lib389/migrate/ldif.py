@@ -8,12 +8,115 @@
 #
 
 
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from ldif import LDIFParser
 
+# Ldifs are transformed in chunks of about this size, one per worker task.
+TRANSFORM_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def ldif_chunks(path, chunk_size=TRANSFORM_CHUNK_SIZE):
+    """Split an ldif into byte ranges of about chunk_size that start and
+    end on record boundaries, so that each range can be parsed on its own.
+
+    :param path: The ldif path
+    :type path: str
+    :param chunk_size: The size of the ranges
+    :type chunk_size: int
+    :returns: A list of (offset, length)
+    """
+    size = os.path.getsize(path)
+    chunks = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                # Skip the rest of the current line, then a record ends at the next blank line
+                f.readline()
+                while True:
+                    line = f.readline()
+                    if not line:
+                        end = size
+                        break
+                    if line in (b'\n', b'\r\n'):
+                        end = f.tell()
+                        break
+            chunks.append((start, end - start))
+            start = end
+    return chunks
+
+
+def _transform_chunk(path, offset, length, transformer):
+    """Transform the records of a byte range of an ldif.
+
+    This runs in the worker processes of transform_ldif.
+
+    :returns: The transformed ldif, as a str
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length).decode('utf-8')
+    output = io.StringIO()
+    transformer(io.StringIO(data), output).parse()
+    return output.getvalue()
+
+
+def transform_ldif(src, dst, transformer, jobs=None, chunk_size=TRANSFORM_CHUNK_SIZE):
+    """Transform an ldif in parallel. The source is split into chunks of
+    records, each chunk is parsed by a worker process with the transformer,
+    and the results are written to the destination in the original order.
+
+    :param src: The path of the ldif to read
+    :type src: str
+    :param dst: The path of the ldif to write
+    :type dst: str
+    :param transformer: An LDIFParser class taking (input file, output file),
+                        that writes the records it handles to the output file
+    :type transformer: class
+    :param jobs: The number of worker processes, defaults to the number of CPUs
+    :type jobs: int
+    :param chunk_size: The size of the chunks
+    :type chunk_size: int
+    """
+    chunks = ldif_chunks(src, chunk_size)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    with open(dst, 'w') as f_outport:
+        if jobs == 1 or len(chunks) <= 1:
+            for (offset, length) in chunks:
+                f_outport.write(_transform_chunk(src, offset, length, transformer))
+            return
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # Keep a bounded number of chunks in flight, and write their
+            # results in submission order.
+            todo = iter(chunks)
+            pending = deque()
+            for (offset, length) in todo:
+                pending.append(executor.submit(_transform_chunk, src, offset, length, transformer))
+                if len(pending) >= jobs * 2:
+                    break
+            while pending:
+                output = pending.popleft().result()
+                chunk = next(todo, None)
+                if chunk is not None:
+                    pending.append(executor.submit(_transform_chunk, src, chunk[0], chunk[1], transformer))
+                f_outport.write(output)
+
+
 class ImportMetadata(LDIFParser):
     def __init__(self, f_import):
         self.suffix = None
-        super().__init__(f_import)
+        # Only the first entry is needed
+        super().__init__(f_import, max_entries=1)
 
     def handle(self, dn, entry):
         # This only sets on the first entry, which is the basedn
@@ -33,7 +136,7 @@ class LdifMetadata(object):
                 # Open and read the first entry.
                 meta = ImportMetadata(f_import)
                 meta.parse()
-                self.log.debug(f"{ldif} contains {meta.suffix}:{meta.records_read} entries")
+                self.log.debug(f"{ldif} contains {meta.suffix}")
                 # Stash the suffix with the ldif path.
                 self.inner[meta.suffix] = ldif
         self.log.info('Completed Ldif Metadata Parsing.')
@@ -7,9 +7,11 @@
 # --- END COPYRIGHT BLOCK ---
 #
 
+from ldap.schema.models import AttributeType, ObjectClass
 from lib389.schema import Schema, Resolver
 from lib389.backend import Backends
 from lib389.migrate.openldap.config import olOverlayType
+from lib389.migrate.ldif import transform_ldif
 from lib389.plugins import MemberOfPlugin, ReferentialIntegrityPlugin, AttributeUniquenessPlugins
 import ldap
 import os
@@ -142,26 +144,32 @@ class ImportTransformer(LDIFParser):
         self.writer.unparse(dn, entry)
 
 class DatabaseLdifImport(MigrationAction):
-    def __init__(self, suffix, ldif_path):
+    def __init__(self, suffix, ldif_path, export=True, jobs=None):
         self.suffix = suffix
         self.ldif_path = ldif_path
+        # Export the current content of the backend before the import
+        self.export = export
+        # The number of processes transforming the ldif, defaults to the number of CPUs
+        self.jobs = jobs
 
     def apply(self, inst):
         # Create a unique op id.
         op_id = str(uuid4())
         op_path = os.path.join(inst.get_ldif_dir(), f'{op_id}.ldif')
 
-        with open(self.ldif_path, 'r') as f_import:
-            with open(op_path, 'w') as f_outport:
-                p = ImportTransformer(f_import, f_outport)
-                p.parse()
-
         be = Backends(inst).get(self.suffix)
-        task = be.export_ldif()
-        task.wait()
+        # The export runs in the server while we transform the ldif.
+        export_task = None
+        if self.export:
+            export_task = be.export_ldif()
+
+        transform_ldif(self.ldif_path, op_path, ImportTransformer, jobs=self.jobs)
+
+        if export_task is not None:
+            export_task.wait(timeout=None)
 
         task = be.import_ldif([op_path])
-        task.wait()
+        task.wait(timeout=None)
 
     def __unicode__(self):
         return f"DatabaseLdifImport -> {self.suffix} {self.ldif_path}"
@@ -426,10 +434,15 @@ class PluginUnknownManual(MigrationAction):
 
 
 class Migration(object):
-    def __init__(self, olconfig, inst, ldifs=None, skip_schema_oids=[], skip_overlays=[]):
+    def __init__(self, olconfig, inst, ldifs=None, skip_schema_oids=[], skip_overlays=[],
+                 export_before_import=True, import_jobs=None):
         """Generate a migration plan from an openldap config, the instance to migrate too
         and an optional dictionary of { suffix: ldif_path }.
 
+        Before an ldif is imported, the current content of its backend is
+        exported unless export_before_import is False. The ldifs are
+        transformed by import_jobs processes, by default one per CPU.
+
         The migration plan once generate still needs to be executed, but the idea is that
         this module connects to a UI program that can allow the plan to be reviewed and
         accepted. Plan modification is "out of scope", but possible as the array could
@@ -439,6 +452,8 @@ class Migration(object):
         self.inst = inst
         self.plan = []
         self.ldifs = ldifs
+        self._export_before_import = export_before_import
+        self._import_jobs = import_jobs
         self._overlay_do_not_migrate = set(skip_overlays)
         self._schema_oid_do_not_migrate = set([
             # We pre-modified these as they are pretty core, and we don't want
@@ -509,9 +524,8 @@ class Migration(object):
 
     def _gen_schema_plan(self):
         # Get the server schema so that we can query it repeatedly.
-        schema = Schema(self.inst)
-        schema_attrs = schema.get_attributetypes()
-        schema_objects = schema.get_objectclasses()
+        snapshot = Schema(self.inst).get_snapshot()
+        schema_attrs = snapshot.get_objects(AttributeType)
 
         resolver = Resolver(schema_attrs)
 
@@ -525,7 +539,7 @@ class Migration(object):
                 continue
             # For the attr, find if anything has a name overlap in any capacity.
             # overlaps = [ (names, ds_attr) for (names, ds_attr) in schema_attr_names if len(names.intersection(attr.name_set)) > 0]
-            overlaps = [ ds_attr for ds_attr in schema_attrs if ds_attr.oid == attr.oid]
+            overlaps = snapshot.get_by_oid(attr.oid, AttributeType)
             if len(overlaps) == 0:
                 # We need to add attr
                 self.plan.append(SchemaAttributeCreate(attr))
@@ -548,7 +562,7 @@ class Migration(object):
                 self.plan.append(SchemaClassUnsupported(obj))
                 continue
             # For the attr, find if anything has a name overlap in any capacity.
-            overlaps = [ ds_obj for ds_obj in schema_objects if ds_obj.oid == obj.oid]
+            overlaps = snapshot.get_by_oid(obj.oid, ObjectClass)
             if len(overlaps) == 0:
                 # We need to add attr
                 self.plan.append(SchemaClassCreate(obj))
@@ -633,7 +647,8 @@ class Migration(object):
         if self.ldifs is None:
             return
         for (suffix, ldif_path) in self.ldifs.items():
-            self.plan.append(DatabaseLdifImport(suffix, ldif_path))
+            self.plan.append(DatabaseLdifImport(suffix, ldif_path, export=self._export_before_import,
+                                                jobs=self._import_jobs))
 
     def _gen_migration_plan(self):
         """Order of this module is VERY important!!!
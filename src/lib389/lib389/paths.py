@@ -110,6 +110,11 @@ class Paths(object):
         the contents are cached. This means that remote tools that don't need
         to know about paths, shouldn't need to have a copy of 389-ds-base
         installed to remotely admin a server.
+
+        While the instance is online, keys in CONFIG_MAP are read from the
+        server instead. All the mapped attributes of an entry are read in one
+        search, and memoized until refresh() is called. lib389 does this for
+        you when it writes to one of those entries, or reconnects.
         """
         self._is_container = os.path.exists(DSRC_CONTAINER)
         self._defaults_cached = False
@@ -117,6 +122,8 @@ class Paths(object):
         self._serverid = serverid
         self._instance = instance
         self._islocal = local
+        # Online values, as {dn: {attr: value}}
+        self._online_values = {}
 
     def _get_defaults_loc(self, search_paths):
         ## THIS IS HOW WE HANDLE A PREFIX INSTALL
@@ -150,6 +157,30 @@ class Paths(object):
                 raise KeyError('Invalid defaults.inf, missing key %s' % k)
         return True
 
+    def refresh(self, dn=None):
+        """Forget the values read from the online instance, so that they are
+        read again on next access. Use this if the server configuration may
+        have been changed by something other than this lib389 connection.
+
+        :param dn: Only forget the values read from this entry
+        :type dn: str
+        """
+        if dn is None:
+            self._online_values = {}
+        else:
+            self._online_values.pop(dn.lower(), None)
+
+    def _get_online_value(self, dn, attr):
+        from lib389.utils import ensure_str
+        values = self._online_values.get(dn.lower(), None)
+        if values is None:
+            # Read every attribute we map from this entry in a single search.
+            attrs = [a for (d, a) in CONFIG_MAP.values() if d == dn]
+            ent = self._instance.getEntry(dn, attrlist=attrs)
+            values = dict([(a, ensure_str(ent.getValue(a))) for a in attrs])
+            self._online_values[dn.lower()] = values
+        return values[attr]
+
     def __getattr__(self, name):
         from lib389.utils import ensure_str
         if self._defaults_cached is False and self._islocal:
@@ -159,10 +190,7 @@ class Paths(object):
         if name in CONFIG_MAP and self._instance is not None and self._instance.state == DIRSRV_STATE_ONLINE:
             # Get the online value.
             (dn, attr) = CONFIG_MAP[name]
-            ent = self._instance.getEntry(dn, attrlist=[attr,])
-            # If the server doesn't have it, fall back to our configuration.
-            if attr is not None:
-                v = ensure_str(ent.getValue(attr))
+            v = self._get_online_value(dn, attr)
             # Do we need to post-process the value?
             if name == 'version':
                 # We need to post process this - it's 389-Directory/1.4.2.2.20191031git8166d8345 B2019.304.19
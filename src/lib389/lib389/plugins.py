@@ -197,9 +197,11 @@ class AttributeUniquenessPlugins(DSLdapObjects):
         self._server_controls = None
         self._client_controls = None
 
-    def list(self):
+    def list(self, attrlist=None):
         """Get a list of all plugin instances where nsslapd-pluginInitfunc: NSUniqueAttr_Init
 
+        :param attrlist: Attributes to fetch with the entries, see DSLdapObjects.list()
+        :type attrlist: list of str
         :returns: A list of children entries
         """
 
@@ -208,10 +210,10 @@ class AttributeUniquenessPlugins(DSLdapObjects):
                 base=self._basedn,
                 scope=self._scope,
                 filterstr=self._search_filter,
-                attrlist=self._list_attrlist,
+                attrlist=self._search_attrlist(attrlist),
                 serverctrls=self._server_controls, clientctrls=self._client_controls
             )
-            insts = [self._entry_to_instance(dn=r.dn, entry=r) for r in results]
+            insts = self._results_to_instances(results, attrlist)
         except ldap.NO_SUCH_OBJECT:
             # There are no objects to select from, se we return an empty array
             insts = []
@@ -334,10 +336,12 @@ class MEPConfigs(DSLdapObjects):
             basedn = "cn=managed entries,cn=plugins,cn=config"
         self._basedn = basedn
 
-    def list(self):
+    def list(self, attrlist=None):
         """Get a list of children entries (DSLdapObject, Replica, etc.) using a base DN
         and objectClasses of our object (DSLdapObjects, Replicas, etc.)
 
+        :param attrlist: Attributes to fetch with the entries, see DSLdapObjects.list()
+        :type attrlist: list of str
         :returns: A list of children entries
         """
 
@@ -351,12 +355,12 @@ class MEPConfigs(DSLdapObjects):
                 base=self._basedn,
                 scope=self._scope,
                 filterstr=filterstr,
-                attrlist=self._list_attrlist,
+                attrlist=self._search_attrlist(attrlist),
                 serverctrls=self._server_controls, clientctrls=self._client_controls,
                 escapehatch='i am sure'
             )
             # def __init__(self, instance, dn=None):
-            insts = [self._entry_to_instance(dn=r.dn, entry=r) for r in results]
+            insts = self._results_to_instances(results, attrlist)
         except ldap.NO_SUCH_OBJECT:
             # There are no objects to select from, se we return an empty array
             insts = []
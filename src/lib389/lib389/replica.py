@@ -16,8 +16,8 @@ import logging
 import uuid
 import json
 import copy
+from concurrent.futures import ThreadPoolExecutor
 from operator import itemgetter
-from itertools import permutations
 from lib389._constants import *
 from lib389.properties import *
 from lib389.utils import (normalizeDN, escapeDNValue, ensure_bytes, ensure_str,
@@ -29,15 +29,22 @@ from lib389.passwd import password_generate
 from lib389.mappingTree import MappingTrees
 from lib389.agreement import Agreements
 from lib389.tombstone import Tombstones
-from lib389.tasks import CleanAllRUVTask
+from lib389.tasks import CleanAllRUVTask, backoff_intervals
 from lib389.idm.domain import Domain
-from lib389.idm.group import Groups
+from lib389.idm.group import Group, Groups
 from lib389.idm.services import ServiceAccounts
 from lib389.idm.organizationalunit import OrganizationalUnits
 from lib389.conflicts import ConflictEntries
 from lib389.lint import (DSREPLLE0001, DSREPLLE0002, DSREPLLE0003, DSREPLLE0004,
                          DSREPLLE0005)
 
+# Replication is polled with an interval that starts at REPL_POLL_MIN
+# seconds and doubles up to REPL_POLL_MAX seconds. The convergence checker
+# polls up to CONVERGENCE_POLL_MAX seconds, for a finer latency.
+REPL_POLL_MIN = 0.05
+REPL_POLL_MAX = 1
+CONVERGENCE_POLL_MAX = 0.1
+
 
 class ReplicaLegacy(object):
     proxied_methods = 'search_s getEntry'.split()
@@ -951,16 +958,144 @@ class RUV(object):
 
 
 class ChangelogLDIF(object):
-    def __init__(self, file_path, output_file):
+    def __init__(self, file_path, output_file=None, min_csn=None, max_csn=None, rids=None):
         """A class for working with Changelog LDIF file
 
+        The file is read one record at a time, so any size of changelog can
+        be processed in constant memory. The records can be filtered by
+        CSN range and replica ID. The records without a CSN, like the RUV
+        of the changelog, are always kept.
+
         :param file_path: LDIF file path
         :type file_path: str
         :param output_file: LDIF file path
--       :type output_file: str
+        :type output_file: str
+        :param min_csn: Skip the changes with a lower CSN
+        :type min_csn: str
+        :param max_csn: Skip the changes with a higher CSN
+        :type max_csn: str
+        :param rids: Only keep the changes of these replica IDs
+        :type rids: list of int
         """
         self.file_path = file_path
         self.output_file = output_file
+        self.min_csn = min_csn.lower() if min_csn else None
+        self.max_csn = max_csn.lower() if max_csn else None
+        self.rids = set(int(rid) for rid in rids) if rids else None
+
+    @staticmethod
+    def csn_from_time(timestamp):
+        """Return the lowest CSN of a point in time, to use as a CSN bound
+
+        :param timestamp: Seconds since the epoch, or an aware datetime
+        :type timestamp: int or datetime.datetime
+        :returns: str
+        """
+        if isinstance(timestamp, datetime.datetime):
+            timestamp = timestamp.timestamp()
+        return "%08x000000000000" % int(timestamp)
+
+    def _raw_records(self):
+        """Generate the records of the file as lists of lines, without
+        their line ends and their blank separator line
+        """
+        with open(self.file_path) as LDIF_IN:
+            lines = []
+            for line in LDIF_IN:
+                line = line.rstrip('\r\n')
+                if line:
+                    lines.append(line)
+                elif lines:
+                    yield lines
+                    lines = []
+            if lines:
+                yield lines
+
+    def _match(self, lines):
+        """Check the CSN of a record against the filters"""
+        if self.min_csn is None and self.max_csn is None and self.rids is None:
+            return True
+        csn = None
+        for line in lines:
+            if line.startswith('csn: '):
+                csn = line[5:].strip().lower()
+                break
+        if csn is None:
+            return True
+        if self.min_csn is not None and csn < self.min_csn:
+            return False
+        if self.max_csn is not None and csn > self.max_csn:
+            return False
+        if self.rids is not None:
+            try:
+                if int(csn[12:16], 16) not in self.rids:
+                    return False
+            except ValueError:
+                return False
+        return True
+
+    @staticmethod
+    def _unfold(lines):
+        """Generate the (type, value, is base64) of the lines of a record"""
+        attr = None
+        for line in lines:
+            if line.startswith(' ') and attr is not None:
+                attr[1].append(line[1:])
+                continue
+            if attr is not None:
+                yield (attr[0], ''.join(attr[1]), attr[2])
+            attr = None
+            if line.startswith('#') or ':' not in line:
+                continue
+            (atype, value) = line.split(':', 1)
+            is_b64 = value.startswith(':')
+            if is_b64:
+                value = value[1:]
+            attr = (atype, [value.lstrip(' ')], is_b64)
+        if attr is not None:
+            yield (attr[0], ''.join(attr[1]), attr[2])
+
+    def records(self):
+        """Generate the changes of the changelog that match the filters
+
+        :returns: A generator of dicts with the keys csn, rid, changetype,
+                  dn, changes (the decoded change, or None) and attrs (a
+                  dict of all the attributes of the record, lower case, to
+                  the list of their decoded values)
+        """
+        for lines in self._raw_records():
+            if not self._match(lines):
+                continue
+            attrs = {}
+            for (atype, value, is_b64) in self._unfold(lines):
+                if is_b64:
+                    value = ensure_str(base64.b64decode(value))
+                attrs.setdefault(atype.lower(), []).append(value)
+            csn = attrs.get('csn', [None])[0]
+            try:
+                rid = int(csn[12:16], 16) if csn else None
+            except ValueError:
+                rid = None
+            yield {'csn': csn,
+                   'rid': rid,
+                   'changetype': attrs.get('changetype', [None])[0],
+                   'dn': attrs.get('dn', [None])[0],
+                   'changes': attrs.get('change', attrs.get('changes', [None]))[0],
+                   'attrs': attrs}
+
+    @staticmethod
+    def _parse_ruv_value(value):
+        """Interpret a changelog RUV value like
+        '{replica 1} 5a2ffd0f000000010000 5a2ffd0f000200010000 5a2ffd0f'
+
+        :returns: A tuple of the readable csn, maxcsn and modification time,
+                  they are empty when the value does not have them
+        """
+        parts = value.split('}', 1)[-1].split()
+        csn = RUV.parse_csn(parts[0]) if len(parts) > 0 else ""
+        maxcsn = RUV.parse_csn(parts[1]) if len(parts) > 1 else ""
+        modts = RUV.parse_csn(parts[2]) if len(parts) > 2 else ""
+        return (csn, maxcsn, modts)
 
     def grep_csn(self):
         """Grep and interpret CSNs
@@ -970,21 +1105,18 @@ class ChangelogLDIF(object):
         """
         with open(self.output_file, 'w') as LDIF_OUT:
             LDIF_OUT.write(f"# LDIF File: {self.output_file}\n")
-            with open(self.file_path) as LDIF_IN:
-                for line in LDIF_IN.readlines():
+            for lines in self._raw_records():
+                if not self._match(lines):
+                    continue
+                for line in lines:
                     if "ruv:" in line or "csn:" in line:
                         csn = ""
                         maxcsn = ""
                         modts = ""
-                        line = line.split("\n")[0]
                         if "ruv:" in line:
-                            ruv = RUV([line.split("ruv: ")[1]])
-                            ruv_dict = ruv.parse_ruv()
-                            csn = ruv_dict["csn"]
-                            maxcsn = ruv_dict["maxcsn"]
-                            modts = ruv_dict["modts"]
+                            (csn, maxcsn, modts) = self._parse_ruv_value(line.split("ruv: ", 1)[1])
                         elif "csn:" in line:
-                            csn = RUV().parse_csn(line.split("csn: ")[1])
+                            csn = RUV.parse_csn(line.split("csn: ", 1)[1])
                         if maxcsn or modts:
                             LDIF_OUT.write(f'{line} ({csn}\n')
                             if maxcsn:
@@ -1003,33 +1135,40 @@ class ChangelogLDIF(object):
         """
         with open(self.output_file, 'w') as LDIF_OUT:
             LDIF_OUT.write(f"# LDIF File: {self.output_file}\n")
-            with open(self.file_path) as LDIF_IN:
-                encoded_str = ""
-                for line in LDIF_IN.readlines():
+            for lines in self._raw_records():
+                if not self._match(lines):
+                    continue
+                encoded = None
+                for line in lines:
+                    if encoded is not None:
+                        if line.startswith(' '):
+                            encoded.append(line[1:])
+                            continue
+                        self._write_change(LDIF_OUT, encoded)
+                        encoded = None
                     if line.startswith("change::") or line.startswith("changes::"):
                         LDIF_OUT.write("change::\n")
-                        try:
-                            encoded_str = line.split("change:: ")[1]
-                        except IndexError:
-                            encoded_str = line.split("changes:: ")[1]
+                        encoded = [line.split("::", 1)[1].strip()]
                         continue
-                    if not encoded_str:
-                        LDIF_OUT.write(line.split('\n')[0] + "\n")
-                        continue
-                    if line == "\n":
-                        decoded_str = ensure_str(base64.b64decode(encoded_str))
-                        LDIF_OUT.write(decoded_str + "\n")
-                        encoded_str = ""
-                        continue
-                    encoded_str += line
+                    LDIF_OUT.write(line + "\n")
+                if encoded is not None:
+                    self._write_change(LDIF_OUT, encoded)
+                LDIF_OUT.write("\n")
+
+    @staticmethod
+    def _write_change(LDIF_OUT, encoded):
+        decoded_str = ensure_str(base64.b64decode(''.join(encoded)))
+        LDIF_OUT.write(decoded_str)
+        if not decoded_str.endswith("\n"):
+            LDIF_OUT.write("\n")
 
     def process(self):
         # Process the file as is, just log it into the new custom file
         with open(self.output_file, 'w') as LDIF_OUT:
-            LDIF_OUT.write(f"# LDIF File: {self.output_file}")
-            with open(self.file_path) as LDIF_IN:
-                for line in LDIF_IN.readlines():
-                    LDIF_OUT.write(line)
+            LDIF_OUT.write(f"# LDIF File: {self.output_file}\n")
+            for lines in self._raw_records():
+                if self._match(lines):
+                    LDIF_OUT.write("\n".join(lines) + "\n\n")
 
 
 class Changelog(DSLdapObject):
@@ -1695,13 +1834,14 @@ class Replica(DSLdapObject):
     def task_finished(self):
         """Wait for a replica task to complete: CL2LDIF / LDIF2CL
         """
-        loop_limit = 30
-        while loop_limit > 0:
-            time.sleep(1)
+        deadline = time.monotonic() + 30
+        for interval in backoff_intervals():
             task_running = self.get_attr_val('nsds5task')
             if task_running is None:
                 return True
-            loop_limit -= 1
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(interval)
 
         # Task is still running?!
         return False
@@ -1719,9 +1859,15 @@ class Replica(DSLdapObject):
         """Get a list of the status for every agreement
         """
         agmtList = []
-        agmts = Agreements(self._instance, self.dn, winsync=winsync).list()
+        agreements = Agreements(self._instance, self.dn, winsync=winsync)
+        agmts = agreements.list()
+        maxcsns = {}
+        if not winsync:
+            # Read the RUV of all the consumers at once
+            maxcsns = agreements.get_consumer_maxcsns(binddn=binddn, bindpw=bindpw, agmts=agmts)
         for agmt in agmts:
-            raw_status = agmt.status(binddn=binddn, bindpw=bindpw, use_json=True, winsync=winsync)
+            raw_status = agmt.status(binddn=binddn, bindpw=bindpw, use_json=True, winsync=winsync,
+                                     consumer_maxcsn=maxcsns.get(agmt.dn))
             agmtList.append(json.loads(raw_status))
 
         # sort the list of agreements by the lag time
@@ -1768,7 +1914,8 @@ class Replicas(DSLdapObjects):
             replica._populate_suffix()
         return replica
 
-    def process_and_dump_changelog(self, replica_root, output_file, csn_only=False, preserve_ldif_done=False, decode=False):
+    def process_and_dump_changelog(self, replica_root, output_file, csn_only=False, preserve_ldif_done=False, decode=False,
+                                   min_csn=None, max_csn=None, rids=None):
         """Dump and decode Directory Server replication changelog
 
         :param replica_root: Replica suffix that needs to be processed
@@ -1781,6 +1928,12 @@ class Replicas(DSLdapObjects):
         :type preserve_ldif_done: bool
         :param decode: Decode any base64 values from the changelog
         :type log: bool
+        :param min_csn: Skip the changes with a lower CSN
+        :type min_csn: str
+        :param max_csn: Skip the changes with a higher CSN
+        :type max_csn: str
+        :param rids: Only keep the changes of these replica IDs
+        :type rids: list of int
         """
 
         # Dump the changelog for the replica
@@ -1797,7 +1950,7 @@ class Replicas(DSLdapObjects):
             raise ValueError("The changelog to LDIF task (CL2LDIF) did not complete in time")
 
         # Decode the dumped changelog if we are using a non default location
-        cl_ldif = ChangelogLDIF(file_path, output_file=output_file)
+        cl_ldif = ChangelogLDIF(file_path, output_file=output_file, min_csn=min_csn, max_csn=max_csn, rids=rids)
         if csn_only:
             cl_ldif.grep_csn()
         elif decode:
@@ -2460,12 +2613,15 @@ class ReplicationManager(object):
 
         from_ruv = from_r.get_ruv()
 
-        for i in range(0, timeout):
+        deadline = time.monotonic() + timeout
+        for interval in backoff_intervals(REPL_POLL_MIN, REPL_POLL_MAX):
             to_ruv = to_r.get_ruv()
             if to_ruv.is_synced(from_ruv):
                 self._log.info("SUCCESS: RUV from %s to %s is in sync" % (from_instance.ldapuri, to_instance.ldapuri))
                 return True
-            time.sleep(1)
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(interval)
         raise Exception("RUV did not sync in time!")
 
     def wait_for_replication(self, from_instance, to_instance, timeout=20):
@@ -2490,16 +2646,110 @@ class ReplicationManager(object):
 
         from_group.replace('description', change)
 
-        for i in range(0, timeout):
+        deadline = time.monotonic() + timeout
+        for interval in backoff_intervals(REPL_POLL_MIN, REPL_POLL_MAX):
             desc = to_group.get_attr_val_utf8('description')
             if change == desc:
                 self._log.info("SUCCESS: Replication from %s to %s is working" % (from_instance.ldapuri, to_instance.ldapuri))
                 return True
-            self._log.info("Retry: Replication from %s to %s is NOT working (expect %s / got description=%s)" % (from_instance.ldapuri, to_instance.ldapuri, change, desc))
-            time.sleep(1)
+            if time.monotonic() >= deadline:
+                break
+            self._log.debug("Retry: Replication from %s to %s is NOT working (expect %s / got description=%s)" % (from_instance.ldapuri, to_instance.ldapuri, change, desc))
+            time.sleep(interval)
         self._log.info("FAIL: Replication from %s to %s is NOT working (expect %s / got description=%s)" % (from_instance.ldapuri, to_instance.ldapuri, change, desc))
         raise Exception("Replication did not sync in time!")
 
+    def _write_probe(self, instance):
+        """Write a unique value to the description of the replication managers
+        group of a supplier. The previous value written for the supplier is
+        removed, so the group holds one probe per supplier.
+
+        :returns: A tuple of the DN of the group, the value, and the time it was written
+        """
+        group = Groups(instance, basedn=self._suffix, rdn=None).get('replication_managers')
+        prefix = "convergence probe from %s: " % instance.ldapuri
+        value = prefix + str(uuid.uuid4())
+        mods = [(ldap.MOD_ADD, 'description', value)]
+        old = [v for v in group.get_attr_vals_utf8('description') if v.startswith(prefix)]
+        if old:
+            mods.insert(0, (ldap.MOD_DELETE, 'description', old))
+        group.apply_mods(mods)
+        return (group.dn, value, time.monotonic())
+
+    def _watch_probes(self, target, group_dn, probes, deadline):
+        """Read the replication managers group of a target until it holds all
+        the probes, or until the deadline. It runs in the worker threads of
+        wait_for_convergence.
+
+        :param probes: A list of (supplier, value, time written)
+        :returns: A dict of supplier -> latency in milliseconds, None if the
+                  probe of the supplier did not reach the target
+        """
+        group = Group(target, group_dn)
+        pending = list(probes)
+        latencies = {}
+        for interval in backoff_intervals(REPL_POLL_MIN, CONVERGENCE_POLL_MAX):
+            try:
+                values = group.get_attr_vals_utf8('description')
+            except ldap.NO_SUCH_OBJECT:
+                # The target is not initialized yet
+                values = []
+            now = time.monotonic()
+            for probe in list(pending):
+                (supplier, value, written) = probe
+                if value in values:
+                    latencies[supplier] = round((now - written) * 1000, 1)
+                    pending.remove(probe)
+            if not pending or now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+        for (supplier, value, written) in pending:
+            latencies[supplier] = None
+        return latencies
+
+    def wait_for_convergence(self, suppliers, targets=None, timeout=20):
+        """Write a probe on each supplier, and wait until every target has
+        received the probes of all the other suppliers. The targets are
+        watched at the same time, so the whole topology is checked in about
+        the time of its slowest edge.
+
+        :param suppliers: The instances to write a probe on
+        :type suppliers: list[lib389.DirSrv]
+        :param targets: The instances to check, the suppliers by default.
+                        They can include hubs and consumers.
+        :type targets: list[lib389.DirSrv]
+        :param timeout: Stop waiting after timeout seconds.
+        :type timeout: int
+        :returns: A dict of (supplier ldapuri, target ldapuri) -> the
+                  replication latency in milliseconds, None if the probe of
+                  the supplier did not reach the target in time. The latency
+                  is measured from the end of the write, its resolution is
+                  the polling interval of CONVERGENCE_POLL_MAX seconds at most.
+        """
+        suppliers = list(suppliers)
+        targets = suppliers if targets is None else list(targets)
+        probes = []
+        group_dn = None
+        for supplier in suppliers:
+            (group_dn, value, written) = self._write_probe(supplier)
+            probes.append((supplier, value, written))
+        deadline = time.monotonic() + timeout
+
+        latencies = {}
+        if not probes or not targets:
+            return latencies
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            futures = [(target, executor.submit(self._watch_probes, target, group_dn,
+                                                [p for p in probes if p[0] is not target], deadline))
+                       for target in targets]
+            for (target, future) in futures:
+                for (supplier, latency) in future.result().items():
+                    latencies[(supplier.ldapuri, target.ldapuri)] = latency
+                    if latency is None:
+                        self._log.info("FAIL: Replication from %s to %s is NOT working" % (supplier.ldapuri, target.ldapuri))
+                    else:
+                        self._log.info("SUCCESS: Replication from %s to %s is working (%.1fms)" % (supplier.ldapuri, target.ldapuri, latency))
+        return latencies
 
     def test_replication(self, from_instance, to_instance, timeout=20):
         """Wait for a replication event to occur from instance to instance. This
@@ -2524,11 +2774,14 @@ class ReplicationManager(object):
         :type instances: list[lib389.DirSrv]
         :param timeout: Fail after timeout seconds.
         :type timeout: int
+        :returns: A dict of (supplier ldapuri, target ldapuri) -> the replication
+                  latency in milliseconds, see wait_for_convergence
 
         """
-        for p in permutations(instances, 2):
-            a, b = p
-            self.test_replication(a, b, timeout)
+        latencies = self.wait_for_convergence(instances, timeout=timeout)
+        if None in latencies.values():
+            raise Exception("Replication did not sync in time!")
+        return latencies
 
     def get_rid(self, instance):
         """For a given master, retrieve it's RID for this suffix.
@@ -2542,6 +2795,13 @@ class ReplicationManager(object):
         return replica.get_rid()
 
 
+def _ldap_error_desc(error):
+    # The description of an LDAPError, which python-ldap gives as a dict
+    if error.args and isinstance(error.args[0], dict):
+        return error.args[0].get('desc', str(error))
+    return str(error)
+
+
 class ReplicationMonitor(object):
     """The lib389 replication monitor. This is used to check the status
     of many instances at once.
@@ -2566,42 +2826,111 @@ class ReplicationMonitor(object):
         and add new hostname:port pairs for future processing
         """
 
+        replicas_status, consumers = self._read_replica_status(instance, use_json)
+        for consumer, protocol in consumers:
+            if consumer not in report_data:
+                report_data[f"{consumer}:{protocol}"] = None
+        return replicas_status
+
+    def _read_replica_status(self, instance, use_json):
+        """Load all of the status data to report of an instance
+
+        :returns: A tuple of the replicas status and the list of
+                  (hostname:port, protocol) of the agreement consumers,
+                  in the order the agreements were read
+        """
+
         replicas_status = []
+        consumers = []
         replicas = Replicas(instance)
-        for replica in replicas.list():
+        for replica in replicas.list(attrlist=['nsDS5ReplicaId', 'nsDS5ReplicaRoot']):
             replica_id = replica.get_rid()
             replica_root = replica.get_suffix()
             replica_maxcsn = replica.get_maxcsn()
             agmts_status = []
-            agmts = replica.get_agreements()
-            for agmt in agmts.list():
+            agreements = replica.get_agreements()
+            # status() reads the whole agreement entry, so snapshot all of it here.
+            agmts = agreements.list(attrlist=['*', '+'])
+            # Read the RUV of all the consumers at once
+            maxcsns = agreements.get_consumer_maxcsns(agmts=agmts)
+            for agmt in agmts:
                 host = agmt.get_attr_val_utf8_l("nsds5replicahost")
                 port = agmt.get_attr_val_utf8_l("nsds5replicaport")
                 protocol = agmt.get_attr_val_utf8_l('nsds5replicatransportinfo')
                 # Supply protocol here because we need it only for connection
                 # and agreement status is already preformatted for the user output
-                consumer = f"{host}:{port}"
-                if consumer not in report_data:
-                    report_data[f"{consumer}:{protocol}"] = None
+                consumers.append((f"{host}:{port}", protocol))
                 if use_json:
-                    agmts_status.append(json.loads(agmt.status(use_json=True)))
+                    agmts_status.append(json.loads(agmt.status(use_json=True, consumer_maxcsn=maxcsns.get(agmt.dn))))
                 else:
-                    agmts_status.append(agmt.status())
+                    agmts_status.append(agmt.status(consumer_maxcsn=maxcsns.get(agmt.dn)))
             replicas_status.append({"replica_id": replica_id,
                                     "replica_root": replica_root,
                                     "replica_status": "Available",
                                     "maxcsn": replica_maxcsn,
                                     "agmts_status": agmts_status})
-        return replicas_status
+        return replicas_status, consumers
+
+    def _read_supplier_status(self, supplier, credentials, use_json, timeout):
+        """Connect to a supplier and load its status data. It runs in the
+        worker threads of generate_report, so it must not touch the report.
+
+        :returns: A tuple of the replicas status and the consumers, or
+                  None and the LDAPError if the connection or the read failed
+        """
+
+        supplier_hostname, supplier_port, supplier_protocol = supplier.split(":")
+        supplier_inst = DirSrv(verbose=self._instance.verbose)
+        # args_instance is shared by the whole process, only change a copy
+        args_standalone = args_instance.copy()
+        args_standalone[SER_HOST] = supplier_hostname
+        if supplier_protocol == "ssl" or supplier_protocol == "ldaps":
+            args_standalone[SER_SECURE_PORT] = int(supplier_port)
+        else:
+            args_standalone[SER_PORT] = int(supplier_port)
+        args_standalone[SER_ROOT_DN] = credentials["binddn"]
+        args_standalone[SER_ROOT_PW] = credentials["bindpw"]
+        supplier_inst.allocate(args_standalone)
+        try:
+            supplier_inst.open(timeout=timeout)
+        except ldap.LDAPError as e:
+            self._log.debug(f"Connection to consumer ({supplier_hostname}:{supplier_port}) failed, error: {e}")
+            return None, e
 
-    def generate_report(self, get_credentials, use_json=False):
+        try:
+            return self._read_replica_status(supplier_inst, use_json)
+        except ldap.LDAPError as e:
+            # A timeout or an error in the middle of the read makes the
+            # instance unavailable, rather than aborting the whole report
+            self._log.debug(f"Reading the status of ({supplier_hostname}:{supplier_port}) failed, error: {e}")
+            return None, e
+        finally:
+            supplier_inst.close()
+
+    def generate_report(self, get_credentials, use_json=False, workers=8, timeout=None, callback=None):
         """Generate a replication report for each supplier or hub and the instances
         that are connected with it by agreements.
 
+        The topology is walked breadth first. Every instance is queried by a pool
+        of worker threads as soon as an agreement pointing to it is found, so the
+        slow instances are waited for concurrently. The report is the same as
+        the one of a walk done one instance at a time.
+
         :param get_credentials: A user-defined callback function with parameters (host, port) which returns
                                 a dictionary with binddn and bindpw keys -
-                                example values "cn=Directory Manager" and "password"
+                                example values "cn=Directory Manager" and "password".
+                                It is always called from the calling thread.
         :type get_credentials: function
+        :param use_json: Get the agreements status as dictionaries instead of text
+        :type use_json: bool
+        :param workers: The number of instances queried at the same time
+        :type workers: int
+        :param timeout: The network and operation timeout in seconds for each instance,
+                        None to wait forever
+        :type timeout: float
+        :param callback: A function with parameters (hostname:port, replicas status)
+                         called for each instance as soon as its part of the report is ready
+        :type callback: function
         :returns: dict
         """
         report_data = {}
@@ -2611,54 +2940,69 @@ class ReplicationMonitor(object):
         try:
             report_data[initial_inst_key] = self._get_replica_status(self._instance, report_data, use_json)
         except ldap.LDAPError as e:
-            self._log.debug(f"Connection to consumer ({supplier_hostname}:{supplier_port}) failed, error: {e}")
-            report_data[initial_inst_key] = [{"replica_status": f"Unavailable - {e.args[0]['desc']}"}]
+            self._log.debug(f"Connection to consumer ({initial_inst_key}) failed, error: {e}")
+            report_data[initial_inst_key] = [{"replica_status": f"Unavailable - {_ldap_error_desc(e)}"}]
+        if callback is not None:
+            callback(initial_inst_key, report_data[initial_inst_key])
 
         # Check if at least some replica report on other instances was generated
         repl_exists = False
 
-        # While we have unprocessed instances - continue
-        while True:
-            try:
-                supplier = [host_port for host_port, processed_data in report_data.items() if processed_data is None][0]
-            except IndexError:
-                break
+        # The instances queued for processing, with their credentials and
+        # the pending query. They are consumed in the queue order, so the
+        # report and the credentials prompts keep the order of a serial walk.
+        pending = {}
 
-            del report_data[supplier]
-            s_splitted = supplier.split(":")
-            supplier_hostname = s_splitted[0]
-            supplier_port = s_splitted[1]
-            supplier_protocol = s_splitted[2]
-            supplier_hostport_only = ":".join(s_splitted[:2])
-
-            # The function should be defined outside and
-            # it should have all the logic for figuring out the credentials.
-            # It is done for flexibility purpuses between CLI, WebUI and lib389 API applications
-            credentials = get_credentials(supplier_hostname, supplier_port)
-            if not credentials["binddn"]:
-                report_data[supplier_hostport_only] = [{"replica_status": "Unavailable - Bind DN was not specified"}]
-                continue
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def queue_supplier(supplier):
+                if supplier in pending:
+                    return
+                s_splitted = supplier.split(":")
+                # The function should be defined outside and
+                # it should have all the logic for figuring out the credentials.
+                # It is done for flexibility purpuses between CLI, WebUI and lib389 API applications
+                credentials = get_credentials(s_splitted[0], s_splitted[1])
+                if not credentials["binddn"]:
+                    pending[supplier] = None
+                else:
+                    pending[supplier] = executor.submit(self._read_supplier_status, supplier,
+                                                        credentials, use_json, timeout)
+
+            for supplier in [host_port for host_port, processed_data in report_data.items() if processed_data is None]:
+                queue_supplier(supplier)
 
-            # Open a connection to the consumer
-            supplier_inst = DirSrv(verbose=self._instance.verbose)
-            args_instance[SER_HOST] = supplier_hostname
-            if supplier_protocol == "ssl" or supplier_protocol == "ldaps":
-                args_instance[SER_SECURE_PORT] = int(supplier_port)
-            else:
-                args_instance[SER_PORT] = int(supplier_port)
-            args_instance[SER_ROOT_DN] = credentials["binddn"]
-            args_instance[SER_ROOT_PW] = credentials["bindpw"]
-            args_standalone = args_instance.copy()
-            supplier_inst.allocate(args_standalone)
             try:
-                supplier_inst.open()
-            except ldap.LDAPError as e:
-                self._log.debug(f"Connection to consumer ({supplier_hostname}:{supplier_port}) failed, error: {e}")
-                report_data[supplier_hostport_only] = [{"replica_status": f"Unavailable - {e.args[0]['desc']}"}]
-                continue
+                # While we have unprocessed instances - continue
+                while True:
+                    try:
+                        supplier = [host_port for host_port, processed_data in report_data.items() if processed_data is None][0]
+                    except IndexError:
+                        break
 
-            report_data[supplier_hostport_only] = self._get_replica_status(supplier_inst, report_data, use_json)
-            repl_exists = True
+                    del report_data[supplier]
+                    supplier_hostport_only = ":".join(supplier.split(":")[:2])
+                    future = pending.pop(supplier)
+                    if future is None:
+                        report_data[supplier_hostport_only] = [{"replica_status": "Unavailable - Bind DN was not specified"}]
+                    else:
+                        replicas_status, consumers = future.result()
+                        if replicas_status is None:
+                            error = consumers
+                            report_data[supplier_hostport_only] = [{"replica_status": f"Unavailable - {_ldap_error_desc(error)}"}]
+                        else:
+                            for consumer, protocol in consumers:
+                                if consumer not in report_data:
+                                    report_data[f"{consumer}:{protocol}"] = None
+                                    queue_supplier(f"{consumer}:{protocol}")
+                            report_data[supplier_hostport_only] = replicas_status
+                            repl_exists = True
+                    if callback is not None:
+                        callback(supplier_hostport_only, report_data[supplier_hostport_only])
+            finally:
+                # Don't wait for the queued queries if one of them failed
+                for future in pending.values():
+                    if future is not None:
+                        future.cancel()
 
         # Get rid of the repeated items
         report_data_parsed = {}
@@ -1,3 +1,4 @@
+import math
 import os
 import os.path
 import re
@@ -29,6 +30,23 @@ def smart_sort(str_list):
     str_list.sort(key=_alphanum_key)
 
 
+def _percentile(values, pct):
+    """Return the nearest-rank percentile of a list of numbers
+
+    :param values: The numbers, sorted
+    :type values: list
+    :param pct: The percentile, from 0 to 100
+    :type pct: float
+
+    :returns: The value under which pct percent of the values are
+    """
+
+    if not values:
+        return None
+    rank = max(1, int(math.ceil(len(values) * pct / 100.0)))
+    return values[rank - 1]
+
+
 def _getCSNTime(inst, csn):
     """Take a CSN and get the access log timestamp in seconds
 
@@ -38,15 +56,82 @@ def _getCSNTime(inst, csn):
                 the access log, and what time in seconds it was logged.
     :type csn: str
 
-    :returns: The time is seconds that the operation was logged
+    :returns: The time in seconds since the epoch that the operation was logged
     """
 
-    op_line = inst.ds_access_log.match('.*csn=%s' % csn)
-    if op_line:
-        #vals = inst.ds_access_log.parse_line(op_line[0])
-        return inst.ds_access_log.get_time_in_secs(op_line[0])
-    else:
-        return None
+    # The index is brought up to date once, by the first lookup or by the
+    # caller, not for each of the CSNs looked up
+    return inst.ds_access_log.csn_index(refresh=False).get_time(csn)
+
+
+def _getCSNsAndTimes(inst, ops):
+    """Find the CSN of many operations in a single pass over the inst's access
+    log, and the time they were logged
+
+    :param inst: An instance to check access log
+    :type inst: lib389.DirSrv
+    :param ops: The operations, strings matched against the request lines of
+                the access log, such as 'ADD dn="uid=user,dc=example,dc=com'.
+                Ops of this form are looked up by the operation and DN of
+                each line, any other op is searched for in every line.
+    :type ops: list of str
+
+    :returns: A dict of op -> (csn, time in seconds since the epoch), for the
+              first operation matching each of them that has a CSN
+    """
+
+    prog_key = re.compile(r'^([A-Z]+ dn="[^"]*)"?$')
+    prog_dn = re.compile(r'^dn="([^"]*)"')
+    prog_csn = re.compile(r'\bcsn=(\w+)')
+    # 'ADD dn="..." -> the ops looked up by the operation and DN of a line
+    keyed = {}
+    others = set()
+    for op in ops:
+        kres = prog_key.match(op)
+        if kres is not None:
+            keyed.setdefault(kres.group(1), set()).add(op)
+        else:
+            others.add(op)
+    # The CSN of the matched ops, in the order of the log
+    csns = []
+    # (conn, op) -> the ops matched by its request line
+    pending = {}
+    access_log = inst.ds_access_log
+    with access_log._open_log(access_log._get_log_path()) as lf:
+        for line in lf:
+            if not keyed and not others and not pending:
+                break
+            mres = access_log.prog_op.match(line)
+            if mres is None:
+                continue
+            key = (mres.group(2), mres.group(3))
+            if mres.group(4) != 'RESULT':
+                matched = set()
+                dres = prog_dn.match(mres.group(5))
+                if dres is not None:
+                    matched = keyed.pop('%s dn="%s' % (mres.group(4), dres.group(1)), matched)
+                if others:
+                    found_others = {op for op in others if op in line}
+                    others.difference_update(found_others)
+                    matched = matched | found_others
+                if matched:
+                    pending[key] = matched
+                continue
+            matched = pending.pop(key, None)
+            if matched is None:
+                continue
+            cres = prog_csn.search(mres.group(5))
+            if cres is not None:
+                csn = cres.group(1)
+                csns.append((csn, matched))
+
+    found = {}
+    index = access_log.csn_index()
+    for (csn, matched) in csns:
+        csntime = index.get_time(csn)
+        for op in matched:
+            found[op] = (csn, csntime)
+    return found
 
 
 def _getCSNandTime(inst, line):
@@ -61,23 +146,7 @@ def _getCSNandTime(inst, line):
               it was logged.
     """
 
-    op_line = inst.ds_access_log.match('.*%s.*' % line)
-    if op_line:
-        vals = inst.ds_access_log.parse_line(op_line[0])
-        op = vals['op']
-        conn = vals['conn']
-
-        # Now find the result line and CSN
-        result_line = inst.ds_access_log.match_archive(
-            '.*conn=%s op=%s RESULT.*' % (conn, op))
-
-        if result_line:
-            vals = inst.ds_access_log.parse_line(result_line[0])
-            if 'csn' in vals:
-                ts = inst.ds_access_log.get_time_in_secs(result_line[0])
-                return (vals['csn'], ts)
-
-    return (None, None)
+    return _getCSNsAndTimes(inst, [line]).get(line, (None, None))
 
 
 class ReplTools(object):
@@ -156,53 +225,73 @@ class ReplTools(object):
               (replica.serverid, suffix))
         print('-' * 80)
 
+        # The role of each replica, and the convergence times of the ops
+        roles = []
+        for inst in all_replicas:
+            replObj = inst.replicas.get(suffix)
+            if replObj is None:
+                inst.log.warning('(%s) not setup for replication of (%s)' %
+                               (inst.serverid, suffix))
+                continue
+            role = replObj.get_role()
+            if role == ReplicaRole.MASTER:
+                txt = 'Master (%s)' % (inst.serverid)
+            elif role == ReplicaRole.HUB:
+                txt = 'Hub (%s)' % (inst.serverid)
+            elif role == ReplicaRole.CONSUMER:
+                txt = 'Consumer (%s)' % (inst.serverid)
+            else:
+                txt = '?'
+            # Index what was logged since, once for all the ops
+            inst.ds_access_log.csn_index()
+            roles.append((inst, txt, []))
+
+        # Find the CSN of all the operations in one pass over the access log
+        csns = _getCSNsAndTimes(replica, ops)
+
         # Loop through each operation checking all the access logs
         for op in ops:
-            csnstr, csntime = _getCSNandTime(replica, op)
-            if csnstr is None and csntime is None:
+            csnstr, csntime = csns.get(op, (None, None))
+            if csnstr is None or csntime is None:
                 # Didn't find a csn, move on
                 continue
 
             conv_time = []
             longest_time = 0
-            for inst in all_replicas:
-                replObj = inst.replicas.get(suffix)
-                if replObj is None:
-                    inst.log.warning('(%s) not setup for replication of (%s)' %
-                                   (inst.serverid, suffix))
-                    continue
+            for (inst, txt, inst_times) in roles:
                 ctime = _getCSNTime(inst, csnstr)
                 if ctime:
-                    role = replObj.get_role()
-                    if role == ReplicaRole.MASTER:
-                        txt = ' Master (%s)' % (inst.serverid)
-                    elif role == ReplicaRole.HUB:
-                        txt = ' Hub (%s)' % (inst.serverid)
-                    elif role == ReplicaRole.CONSUMER:
-                        txt = ' Consumer (%s)' % (inst.serverid)
-                    else:
-                        txt = '?'
                     ctime = ctime - csntime
-                    conv_time.append(str(ctime) + txt)
+                    conv_time.append((ctime, txt))
+                    inst_times.append(ctime)
                     if ctime > longest_time:
                         longest_time = ctime
 
-            smart_sort(conv_time)
+            conv_time.sort()
             print('\n    Operation: %s\n    %s' % (op, '-' * 40))
             print('\n      Convergence times:')
-            for line in conv_time:
-                parts = line.split(' ', 1)
-                print('        %8s secs - %s' % (parts[0], parts[1]))
-            print('\n      Longest Convergence Time: ' +
-                  str(longest_time))
+            for (ctime, txt) in conv_time:
+                print('        %8.3f secs - %s' % (ctime, txt))
+            print('\n      Longest Convergence Time: %.3f' % longest_time)
             if longest_time > highest_time:
                 highest_time = longest_time
             total_time += longest_time
 
         print('\n    Summary for "{}"'.format(replica.serverid))
         print('    ----------------------------------------')
-        print('      Highest convergence time: {} seconds'.format(highest_time))
-        print('      Average longest convergence time: {} seconds\n'.format(int(total_time / len(ops))))
+        print('      Highest convergence time: {:.3f} seconds'.format(highest_time))
+        print('      Average longest convergence time: {:.3f} seconds\n'.format(total_time / len(ops)))
+        print('      Convergence times per replica (seconds):')
+        print('        %-30s %6s %8s %8s %8s %8s' % ('Replica', 'Ops', 'p50', 'p95', 'p99', 'Max'))
+        for (inst, txt, inst_times) in roles:
+            inst_times.sort()
+            if not inst_times:
+                print('        %-30s %6d' % (txt, 0))
+                continue
+            print('        %-30s %6d %8.3f %8.3f %8.3f %8.3f' % (
+                  txt, len(inst_times), _percentile(inst_times, 50), _percentile(inst_times, 95),
+                  _percentile(inst_times, 99), inst_times[-1]))
+        print('')
 
         return highest_time
 
@@ -10,17 +10,20 @@
    You will access this from:
    schema = Schema(instance)
 """
+import copy
 import glob
 import ldap
 import ldif
 import re
+import threading
+import weakref
 from itertools import count
 from json import dumps as dump_json
 from operator import itemgetter
 from ldap.schema.models import AttributeType, ObjectClass, MatchingRule
 from lib389._constants import *
 from lib389._constants import DN_SCHEMA
-from lib389.utils import ds_is_newer
+from lib389.utils import ds_is_newer, ensure_str
 from lib389._mapped_object import DSLdapObject
 from lib389.tasks import SchemaReloadTask, SyntaxValidateTask
 
@@ -67,6 +70,121 @@ ATTR_SYNTAXES = {"1.3.6.1.4.1.1466.115.121.1.5": "Binary",
 
 X_ORIGIN_REGEX = r'\'(.*?)\''
 
+SCHEMA_MODELS = (AttributeType, ObjectClass, MatchingRule)
+SCHEMA_SNAPSHOT_ATTRS = ['nsSchemaCSN'] + [model.schema_attribute for model in SCHEMA_MODELS]
+
+# instance -> the last SchemaSnapshot read from it
+_schema_snapshots = weakref.WeakKeyDictionary()
+# instance -> the last schema reload task, the reload may not change the CSN
+_schema_reloads = weakref.WeakKeyDictionary()
+_schema_snapshots_lock = threading.Lock()
+
+
+class SchemaSnapshot(object):
+    """The schema of an instance, parsed once and indexed. It is read by
+    Schema.get_snapshot(), and is valid as long as the nsSchemaCSN of the
+    server does not change. The schema objects it holds are shared, so
+    they must not be modified.
+
+    :param csn: The nsSchemaCSN of the schema
+    :type csn: str
+    :param values: A dict of the schema attribute name -> the list of its
+                   values, for attributeTypes, objectClasses and matchingRules
+    :type values: dict
+    """
+
+    def __init__(self, csn, values):
+        self.csn = csn
+        # model -> list of (raw definition, object), sorted by names
+        self._objects = {}
+        # model -> lowercase name or alias -> list of (raw definition, object)
+        self._names = {}
+        # model -> oid -> list of objects
+        self._oids = {}
+        for model in SCHEMA_MODELS:
+            objects = sorted(((raw, model(raw)) for raw in values.get(model.schema_attribute, [])),
+                             key=lambda item: item[1].names)
+            self._objects[model] = objects
+            names = self._names[model] = {}
+            oids = self._oids[model] = {}
+            for (raw, obj) in objects:
+                for name in obj.names:
+                    names.setdefault(name.lower(), []).append((raw, obj))
+                oids.setdefault(obj.oid, []).append(obj)
+        # lowercase attribute name -> objectclasses that may or must contain it
+        self._may = {}
+        self._must = {}
+        for (raw, oc) in self._objects[ObjectClass]:
+            for name in oc.may:
+                self._may.setdefault(name.lower(), []).append(oc)
+            for name in oc.must:
+                self._must.setdefault(name.lower(), []).append(oc)
+
+    def items(self, object_model):
+        """Get the (raw definition, object) of all the objects of a model, sorted by names
+
+        :param object_model: AttributeType, ObjectClass or MatchingRule
+        :returns: list of tuples
+        """
+        return self._objects[object_model]
+
+    def get_objects(self, object_model):
+        """Get all the objects of a model, sorted by names
+
+        :param object_model: AttributeType, ObjectClass or MatchingRule
+        :returns: list of ldap.schema.models objects
+        """
+        return [obj for (raw, obj) in self._objects[object_model]]
+
+    def get(self, name, object_model):
+        """Get an object by one of its names, case insensitively
+
+        :param name: A name or alias
+        :type name: str
+        :param object_model: AttributeType, ObjectClass or MatchingRule
+        :returns: The object, or None if no object or several objects have this name
+        """
+        item = self._get_item(name, object_model)
+        return item[1] if item is not None else None
+
+    def get_raw(self, name, object_model):
+        """Get the definition of an object by one of its names, as the server returns it
+
+        :returns: str or None
+        """
+        item = self._get_item(name, object_model)
+        return item[0] if item is not None else None
+
+    def _get_item(self, name, object_model):
+        items = self._names[object_model].get(name.lower(), [])
+        if len(items) != 1:
+            return None
+        return items[0]
+
+    def get_by_oid(self, oid, object_model):
+        """Get the objects with an OID
+
+        :param oid: The OID
+        :type oid: str
+        :param object_model: AttributeType, ObjectClass or MatchingRule
+        :returns: list of ldap.schema.models objects
+        """
+        return self._oids[object_model].get(oid, [])
+
+    def may_contain(self, attributetypename):
+        """Get the objectclasses that may contain an attribute name
+
+        :returns: list of ObjectClass, sorted by names
+        """
+        return self._may.get(attributetypename.lower(), [])
+
+    def must_contain(self, attributetypename):
+        """Get the objectclasses that must contain an attribute name
+
+        :returns: list of ObjectClass, sorted by names
+        """
+        return self._must.get(attributetypename.lower(), [])
+
 
 class Schema(DSLdapObject):
     """An object that represents the schema entry
@@ -116,71 +234,125 @@ class Schema(DSLdapObject):
             result = ATTR_SYNTAXES
         return result
 
+    @staticmethod
+    def _schema_object_to_json(obj, object_model):
+        """Convert the definition of a schema object to a dict"""
+
+        obj_i = vars(object_model(obj))
+        if len(obj_i["names"]) == 1:
+            obj_i['name'] = obj_i['names'][0].lower()
+            obj_i['aliases'] = None
+        elif len(obj_i["names"]) > 1:
+            obj_i['name'] = obj_i['names'][0].lower()
+            obj_i['aliases'] = obj_i['names'][1:]
+        else:
+            obj_i['name'] = ""
+
+        # Temporary workaround for X-ORIGIN in ObjectClass objects.
+        # It should be removed after https://github.com/python-ldap/python-ldap/pull/247 is merged
+        if " X-ORIGIN " in obj and obj_i['names'] == vars(object_model(obj))['names']:
+            remainder = obj.split(" X-ORIGIN ")[1]
+            if remainder[:1] == "(":
+                # Have multiple values
+                end = remainder.find(')')
+                vals = remainder[1:end]
+                vals = re.findall(X_ORIGIN_REGEX, vals)
+                # For now use the first value, but this should be a set (another bug in python-ldap)
+                obj_i['x_origin'] = vals[0]
+            else:
+                # Single X-ORIGIN value
+                obj_i['x_origin'] = obj.split(" X-ORIGIN ")[1].split("'")[1]
+        return obj_i
+
+    @staticmethod
+    def _json_tuples(obj_i):
+        # Ensure that the string values are in list so we can use React filter component with it
+        for key, value in obj_i.items():
+            if isinstance(value, str):
+                obj_i[key] = (value, )
+        return obj_i
+
+    def _invalidate_snapshot(self, reload_task=None):
+        with _schema_snapshots_lock:
+            _schema_snapshots.pop(self._instance, None)
+            if reload_task is not None:
+                _schema_reloads[self._instance] = reload_task
+
+    def get_snapshot(self, refresh=False):
+        """Get the parsed and indexed schema of the instance. The last
+        snapshot is kept for the instance, and is reused for as long as the
+        nsSchemaCSN of the server does not change, so checking it costs a
+        single search of one attribute.
+
+        :param refresh: Read the schema again even if it did not change
+        :type refresh: bool
+        :returns: SchemaSnapshot
+        """
+
+        with _schema_snapshots_lock:
+            snapshot = _schema_snapshots.get(self._instance)
+            reload_task = _schema_reloads.get(self._instance)
+        if reload_task is not None:
+            # Don't keep what is read while a reload is running
+            if not reload_task.is_complete():
+                snapshot = None
+            else:
+                with _schema_snapshots_lock:
+                    if _schema_reloads.get(self._instance) is reload_task:
+                        del _schema_reloads[self._instance]
+                reload_task = None
+        if snapshot is not None and not refresh and snapshot.csn == self.get_schema_csn():
+            return snapshot
+
+        entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                            attrlist=SCHEMA_SNAPSHOT_ATTRS,
+                                            serverctrls=self._server_controls,
+                                            clientctrls=self._client_controls,
+                                            escapehatch='i am sure')[0]
+        values = {}
+        for model in SCHEMA_MODELS:
+            values[model.schema_attribute] = [ensure_str(v) for v in entry.getValues(model.schema_attribute)]
+        csn = entry.getValue('nsSchemaCSN')
+        snapshot = SchemaSnapshot(ensure_str(csn) if csn is not None else None, values)
+        # Without a CSN, there is no way to know when the schema changes
+        if snapshot.csn is not None and reload_task is None:
+            with _schema_snapshots_lock:
+                _schema_snapshots[self._instance] = snapshot
+        return snapshot
+
     def _get_schema_objects(self, object_model, json=False):
         """Get all the schema objects for a specific model: Attribute, Objectclass,
         or Matchingreule.
         """
-        attr_name = self._get_attr_name_by_model(object_model)
-        results = self.get_attr_vals_utf8(attr_name)
+        self._get_attr_name_by_model(object_model)
+        items = self.get_snapshot().items(object_model)
 
         if json:
-            object_insts = []
-            for obj in results:
-                obj_i = vars(object_model(obj))
-                if len(obj_i["names"]) == 1:
-                    obj_i['name'] = obj_i['names'][0].lower()
-                    obj_i['aliases'] = None
-                elif len(obj_i["names"]) > 1:
-                    obj_i['name'] = obj_i['names'][0].lower()
-                    obj_i['aliases'] = obj_i['names'][1:]
-                else:
-                    obj_i['name'] = ""
-
-                # Temporary workaround for X-ORIGIN in ObjectClass objects.
-                # It should be removed after https://github.com/python-ldap/python-ldap/pull/247 is merged
-                if " X-ORIGIN " in obj and obj_i['names'] == vars(object_model(obj))['names']:
-                    remainder = obj.split(" X-ORIGIN ")[1]
-                    if remainder[:1] == "(":
-                        # Have multiple values
-                        end = remainder.find(')')
-                        vals = remainder[1:end]
-                        vals = re.findall(X_ORIGIN_REGEX, vals)
-                        # For now use the first value, but this should be a set (another bug in python-ldap)
-                        obj_i['x_origin'] = vals[0]
-                    else:
-                        # Single X-ORIGIN value
-                        obj_i['x_origin'] = obj.split(" X-ORIGIN ")[1].split("'")[1]
-                object_insts.append(obj_i)
-
+            object_insts = [self._schema_object_to_json(raw, object_model) for (raw, obj) in items]
             object_insts = sorted(object_insts, key=itemgetter('name'))
-            # Ensure that the string values are in list so we can use React filter component with it
             for obj_i in object_insts:
-                for key, value in obj_i.items():
-                    if isinstance(value, str):
-                        obj_i[key] = (value, )
+                self._json_tuples(obj_i)
 
             return {'type': 'list', 'items': object_insts}
         else:
-            object_insts = [object_model(obj_i) for obj_i in results]
-            return sorted(object_insts, key=lambda x: x.names, reverse=False)
+            # The snapshot is shared, hand out copies that can be modified
+            return [copy.copy(obj) for (raw, obj) in items]
 
     def _get_schema_object(self, name, object_model, json=False):
-        objects = self._get_schema_objects(object_model, json=json)
-        if json:
-            schema_object = [obj_i for obj_i in objects["items"] if name.lower() in
-                             list(map(str.lower, obj_i["names"]))]
-        else:
-            schema_object = [obj_i for obj_i in objects if name.lower() in
-                             list(map(str.lower, obj_i.names))]
+        self._get_attr_name_by_model(object_model)
+        snapshot = self.get_snapshot()
+        schema_object = snapshot.get(name, object_model)
 
-        if len(schema_object) != 1:
+        if schema_object is None:
             # This is an error.
             if json:
                 raise ValueError('Could not find: %s' % name)
             else:
                 return None
 
-        return schema_object[0]
+        if json:
+            return self._json_tuples(self._schema_object_to_json(snapshot.get_raw(name, object_model), object_model))
+        return copy.copy(schema_object)
 
     def _add_schema_object(self, parameters, object_model):
         attr_name = self._get_attr_name_by_model(object_model)
@@ -212,13 +384,19 @@ class Schema(DSLdapObject):
         parameters_none = {k.lower(): v for k, v in parameters.items() if v is None}
         for k, v in parameters_none.items():
             setattr(schema_object, k, OBJECT_MODEL_PARAMS[object_model][k])
-        return self.add(attr_name, str(schema_object))
+        try:
+            return self.add(attr_name, str(schema_object))
+        finally:
+            self._invalidate_snapshot()
 
     def _remove_schema_object(self, name, object_model):
         attr_name = self._get_attr_name_by_model(object_model)
         schema_object = self._get_schema_object(name, object_model)
 
-        return self.remove(attr_name, str(schema_object))
+        try:
+            return self.remove(attr_name, str(schema_object))
+        finally:
+            self._invalidate_snapshot()
 
     def _edit_schema_object(self, name, parameters, object_model):
         attr_name = self._get_attr_name_by_model(object_model)
@@ -251,8 +429,11 @@ class Schema(DSLdapObject):
         if schema_object_str == schema_object_str_old:
             raise ValueError('ObjectClass is already in the required state. Nothing to change')
 
-        self.remove(attr_name, schema_object_str_old)
-        return self.add(attr_name, schema_object_str)
+        try:
+            self.remove(attr_name, schema_object_str_old)
+            return self.add(attr_name, schema_object_str)
+        finally:
+            self._invalidate_snapshot()
 
     def reload(self, schema_dir=None):
         """Reload the schema"""
@@ -264,6 +445,8 @@ class Schema(DSLdapObject):
             task_properties['schemadir'] = schema_dir
 
         task.create(properties=task_properties)
+        # The reload may not change the schema CSN
+        self._invalidate_snapshot(task)
 
         return task
 
@@ -461,11 +644,11 @@ class Schema(DSLdapObject):
          [<ldap.schema.models.ObjectClass instance>, ...] )
         """
 
-        # First, get the attribute that matches name. We need to consider
-        # alternate names. There is no way to search this, so we have to
-        # filter our set of all attribute types.
+        # First, get the attribute that matches name, or one of its aliases.
         attributetype = self._get_schema_object(attributetypename, AttributeType, json=json)
-        objectclasses = self.get_objectclasses()
+        if attributetype is None:
+            return None
+        snapshot = self.get_snapshot()
 
         # Get the primary name of this attribute
         if json:
@@ -476,13 +659,11 @@ class Schema(DSLdapObject):
         # Build a set if they have may.
         may = []
         for attributetypename in attributetypenames:
-            may.extend([oc for oc in objectclasses if attributetypename.lower() in
-                        list(map(str.lower, oc.may))])
+            may.extend([copy.copy(oc) for oc in snapshot.may_contain(attributetypename)])
         # Build a set if they have must.
         must = []
         for attributetypename in attributetypenames:
-            must.extend([oc for oc in objectclasses if attributetypename.lower() in
-                         list(map(str.lower, oc.must))])
+            must.extend([copy.copy(oc) for oc in snapshot.must_contain(attributetypename)])
 
         if json:
             # convert Objectclass class to dict, then sort each list
@@ -9,9 +9,11 @@
 import time
 import os.path
 import ldap
+from ldap.controls.psearch import PersistentSearchControl
 from datetime import datetime
 from lib389 import Entry
 from lib389._mapped_object import DSLdapObject
+from lib389.rootdse import RootDSE
 from lib389.utils import ensure_str
 from lib389.exceptions import Error
 from lib389._constants import *
@@ -20,6 +22,200 @@ from lib389.properties import (
         TASK_TOMB_STRIP
         )
 
+# The attributes of a task entry that tell its state
+TASK_STATE_ATTRS = ['nsTaskExitCode', 'nsTaskLog', 'nsTaskStatus',
+                    'nsTaskCurrentItem', 'nsTaskTotalItems']
+# Tasks are polled with an interval that starts at TASK_POLL_MIN seconds
+# and doubles up to TASK_POLL_MAX seconds.
+TASK_POLL_MIN = 0.05
+TASK_POLL_MAX = 2
+
+
+def backoff_intervals(start=TASK_POLL_MIN, limit=TASK_POLL_MAX):
+    """Generate the sleep intervals of an exponential backoff
+
+    :param start: The first interval in seconds
+    :type start: float
+    :param limit: The longest interval in seconds
+    :type limit: float
+    """
+    interval = start
+    while True:
+        yield interval
+        interval = min(interval * 2, limit)
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _TaskWatcher(object):
+    """Wait for the completion of tasks, of one or several instances.
+
+    When the server supports it, a persistent search on cn=tasks reports the
+    changes of the task entries, and the changed tasks are read again as soon
+    as they change. All the tasks are also read with a backoff interval, which
+    covers the servers without persistent search and the changes it does not
+    report.
+    """
+
+    def __init__(self, tasks, progress=None, use_psearch=True):
+        self._pending = list(tasks)
+        self._progress = progress
+        self._last_progress = {}
+        # id(instance) -> (instance, msgid of the persistent search)
+        self._searches = {}
+        if use_psearch:
+            for task in self._pending:
+                if id(task._instance) not in self._searches:
+                    self._start_psearch(task._instance)
+
+    def _start_psearch(self, inst):
+        msgid = None
+        try:
+            if RootDSE(inst).supports_ctrl_psearch():
+                ctrl = PersistentSearchControl(criticality=True, changesOnly=True, returnECs=False)
+                msgid = inst.search_ext(DN_TASKS, ldap.SCOPE_SUBTREE, '(objectClass=*)',
+                                        attrlist=['1.1'], serverctrls=[ctrl])
+        except ldap.LDAPError as e:
+            inst.log.debug("Can not watch the tasks with a persistent search: %s" % e)
+        self._searches[id(inst)] = (inst, msgid)
+
+    def _wait_for_changes(self, timeout):
+        """Wait up to timeout seconds for task entries to change
+
+        :returns: The set of the DNs of the changed entries, in lower case
+        """
+        changed = set()
+        searches = [(key, inst, msgid) for key, (inst, msgid) in self._searches.items() if msgid is not None]
+        if not searches:
+            time.sleep(timeout)
+            return changed
+        deadline = time.monotonic() + timeout
+        while not changed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, inst, msgid in searches:
+                # Share the wait between the instances, then drain what is left
+                wait = remaining / len(searches)
+                while True:
+                    try:
+                        rtype, rdata, _, _ = inst.result4(msgid, all=0, timeout=wait)
+                    except ldap.TIMEOUT:
+                        break
+                    except ldap.LDAPError as e:
+                        # The search ended, rely on the polls only
+                        inst.log.debug("The persistent search on the tasks ended: %s" % e)
+                        self._searches[key] = (inst, None)
+                        break
+                    if rtype is None:
+                        break
+                    if rtype == ldap.RES_SEARCH_RESULT:
+                        self._searches[key] = (inst, None)
+                        break
+                    for item in rdata or []:
+                        if item[0]:
+                            changed.add(item[0].lower())
+                    wait = 0
+        return changed
+
+    def _check(self, task):
+        """Read the task, report its progress, and return True if it is complete"""
+        complete = task.is_complete()
+        if self._progress is not None:
+            progress = (task._current_item, task._total_items)
+            if self._last_progress.get(id(task)) != progress:
+                self._last_progress[id(task)] = progress
+                self._progress(task, *progress)
+        return complete
+
+    def completed(self, timeout=None):
+        """Generate the tasks as they complete
+
+        :raises: TimeoutError - if the tasks are not all complete after timeout seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        intervals = backoff_intervals()
+        next_poll = time.monotonic()
+        changed = set()
+        while self._pending:
+            now = time.monotonic()
+            if now >= next_poll:
+                candidates = list(self._pending)
+                next_poll = now + next(intervals)
+            else:
+                candidates = [task for task in self._pending if task.dn.lower() in changed]
+            for task in candidates:
+                if self._check(task):
+                    self._pending.remove(task)
+                    yield task
+            if not self._pending:
+                break
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                raise TimeoutError("%d task(s) did not complete in %s seconds" % (len(self._pending), timeout))
+            wake = next_poll if deadline is None else min(next_poll, deadline)
+            changed = self._wait_for_changes(max(wake - now, 0))
+
+    def close(self):
+        """Stop the persistent searches"""
+        for inst, msgid in self._searches.values():
+            if msgid is not None:
+                try:
+                    inst.abandon(msgid)
+                except ldap.LDAPError:
+                    pass
+        self._searches = {}
+
+
+def as_completed(tasks, timeout=None, progress=None):
+    """Generate tasks as they complete, in the order they complete
+
+    :param tasks: The tasks to wait for
+    :type tasks: list of Task
+    :param timeout: How long to wait in seconds, None to wait forever
+    :type timeout: float
+    :param progress: A function with parameters (task, current item, total item)
+                     called when the progress of a task changes. The items are
+                     None when the task does not report them.
+    :type progress: function
+    :raises: TimeoutError - if the tasks are not all complete after timeout seconds
+    """
+    watcher = _TaskWatcher(tasks, progress)
+    try:
+        for task in watcher.completed(timeout):
+            yield task
+    finally:
+        watcher.close()
+
+
+def wait_all(tasks, timeout=None, progress=None):
+    """Wait until tasks are complete
+
+    :param tasks: The tasks to wait for
+    :type tasks: list of Task
+    :param timeout: How long to wait in seconds, None to wait forever
+    :type timeout: float
+    :param progress: A function with parameters (task, current item, total item)
+                     called when the progress of a task changes
+    :type progress: function
+    :returns: The list of the exit codes of the tasks, in the order of tasks.
+              It is None for the tasks that did not complete in time, or
+              that removed their entry.
+    """
+    done = set()
+    try:
+        for task in as_completed(tasks, timeout, progress):
+            done.add(id(task))
+    except TimeoutError as e:
+        if len(tasks) > 0:
+            tasks[0]._log.debug(str(e))
+    return [_to_int(task._exit_code) if id(task) in done else None for task in tasks]
+
 
 class Task(DSLdapObject):
     """A single instance of a task entry
@@ -38,23 +234,48 @@ class Task(DSLdapObject):
         self._protected = False
         self._exit_code = None
         self._task_log = ""
+        self._task_status = None
+        self._current_item = None
+        self._total_items = None
 
     def status(self):
         """Return the decoded status of the task
         """
         return self.get_attr_val_utf8('nsTaskStatus')
 
+    def _read_state(self):
+        """Read the state of the task with a single search
+
+        :returns: False if the task entry does not exist anymore
+        """
+        try:
+            entry = self._instance.search_ext_s(self._dn, ldap.SCOPE_BASE, self._object_filter,
+                                                attrlist=TASK_STATE_ATTRS,
+                                                serverctrls=self._server_controls,
+                                                clientctrls=self._client_controls,
+                                                escapehatch='i am sure')[0]
+        except ldap.NO_SUCH_OBJECT:
+            return False
+        values = {}
+        for attr in TASK_STATE_ATTRS:
+            value = entry.getValue(attr)
+            values[attr] = ensure_str(value) if value is not None else None
+        self._exit_code = values['nsTaskExitCode']
+        self._task_log = values['nsTaskLog']
+        self._task_status = values['nsTaskStatus']
+        self._current_item = _to_int(values['nsTaskCurrentItem'])
+        self._total_items = _to_int(values['nsTaskTotalItems'])
+        return True
+
     def is_complete(self):
         """Return True if task is complete, else False."""
 
-        self._exit_code = self.get_attr_val_utf8("nsTaskExitCode")
-        self._task_log = self.get_attr_val_utf8("nsTaskLog")
-        if not self.exists():
+        if not self._read_state():
             self._log.debug("complete: task has self cleaned ...")
             # The task cleaned it self up.
             return True
         elif self._exit_code is not None:
-            self._log.debug("complete status: %s -> %s" % (self._exit_code, self.status()))
+            self._log.debug("complete status: %s -> %s" % (self._exit_code, self._task_status))
             return True
         return False
 
@@ -77,18 +298,28 @@ class Task(DSLdapObject):
                 return None
         return None
 
-    def wait(self, timeout=120):
-        """Wait until task is complete."""
+    def get_progress(self):
+        """Return the progress of the task
+
+        :returns: tuple(current item, total items), the items are None
+                  if the task does not report them
+        """
+        self.is_complete()
+        return (self._current_item, self._total_items)
+
+    def wait(self, timeout=240, progress=None):
+        """Wait until task is complete.
+
+        :param timeout: How long to wait in seconds, None to wait forever
+        :type timeout: float
+        :param progress: A function with parameters (task, current item, total items)
+                         called when the progress of the task changes
+        :type progress: function
+        """
 
-        count = 0
         if timeout is None:
             self._log.debug("No timeout is set, this may take a long time ...")
-
-        while timeout is None or count < timeout:
-            if self.is_complete():
-                break
-            count = count + 1
-            time.sleep(2)
+        wait_all([self], timeout, progress)
 
     def create(self, rdn=None, properties={}, basedn=None):
         """Create a Task entry
@@ -421,17 +652,14 @@ class Tasks(object):
         done = False
         exitCode = 0
         dn = entry.dn
-        while not done:
-            entry = self.conn.getEntry(dn, attrlist=attrlist)
-            self.log.debug("task entry %r", entry)
-
-            if entry.nsTaskExitCode:
-                exitCode = int(entry.nsTaskExitCode)
-                done = True
-            if dowait:
-                time.sleep(1)
-            else:
-                break
+        if dowait:
+            Task(self.conn, dn).wait(timeout=None)
+        entry = self.conn.getEntry(dn, attrlist=attrlist)
+        self.log.debug("task entry %r", entry)
+
+        if entry.nsTaskExitCode:
+            exitCode = int(entry.nsTaskExitCode)
+            done = True
         return (done, exitCode)
 
     def importLDIF(self, suffix=None, benamebase=None, input_file=None,
@@ -0,0 +1,61 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+from lib389._attr_cache import AttrCache
+
+DN = 'cn=config'
+FILT = '(objectClass=*)'
+
+
+def test_attr_cache_inactive():
+    """Assert that nothing is cached until the cache is enabled"""
+    cache = AttrCache()
+    cache.put(DN, 'cn', FILT, [b'config'])
+    assert cache.get(DN, 'cn', FILT) is None
+    with cache.active():
+        cache.put(DN, 'cn', FILT, [b'config'])
+        assert cache.get('CN=Config', 'CN', FILT) == [b'config']
+    # Leaving the block clears the values
+    with cache.active():
+        assert cache.get(DN, 'cn', FILT) is None
+
+
+def test_attr_cache_bypass_and_invalidate():
+    """Assert that bypass and invalidate send the next read to the server"""
+    cache = AttrCache()
+    with cache.active():
+        cache.put(DN, 'cn', FILT, [b'config'])
+        cache.put('cn=child,' + DN, 'cn', FILT, [b'child'])
+        with cache.bypass():
+            assert cache.get(DN, 'cn', FILT) is None
+        assert cache.get(DN, 'cn', FILT) == [b'config']
+        cache.invalidate(DN, subtree=True)
+        assert cache.get(DN, 'cn', FILT) is None
+        assert cache.get('cn=child,' + DN, 'cn', FILT) is None
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['invalidations'] == 2
+
+
+def test_attr_cache_lru_and_ttl():
+    """Assert that the cache is bounded and values expire"""
+    cache = AttrCache(maxsize=2)
+    with cache.active():
+        cache.put(DN, 'a', FILT, [b'1'])
+        cache.put(DN, 'b', FILT, [b'2'])
+        cache.get(DN, 'a', FILT)
+        cache.put(DN, 'c', FILT, [b'3'])
+        assert cache.get(DN, 'b', FILT) is None
+        assert cache.get(DN, 'a', FILT) == [b'1']
+    ttl = cache.ttl
+    with cache.active(ttl=-1):
+        cache.put(DN, 'a', FILT, [b'1'])
+        assert cache.get(DN, 'a', FILT) is None
+    # The ttl only applies to the with block
+    assert cache.ttl == ttl
@@ -0,0 +1,103 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import base64
+import pytest
+from lib389.replica import ChangelogLDIF
+
+MOD = "replace: description\ndescription: changed\n-\n"
+ADD = "objectClass: top\nobjectClass: person\ncn: user\nsn: user\n"
+
+
+def _b64(value):
+    """Encode and fold a value like the server does"""
+    encoded = base64.b64encode(value.encode()).decode()
+    lines = [encoded[:74]] + [' ' + encoded[i:i + 75] for i in range(74, len(encoded), 75)]
+    return '\n'.join(lines)
+
+
+def _changelog(path):
+    records = [
+        "dn: cn=changelog\nclpurgeruv: {replicageneration} 5f000000000000010000\n"
+        "clmaxruv: {replica 1} 5f000001000000010000 5f000e10000000010000 5f000e10\n",
+    ]
+    # One change per 10 minutes, alternately from replicas 1 and 2
+    for i in range(8):
+        csn = "%08x0000%04x0000" % (0x5f000000 + i * 600, 1 + i % 2)
+        if i % 4 == 3:
+            records.append(f"changetype: delete\nreplgen: 5f000000000000010000\ncsn: {csn}\n"
+                           f"nsuniqueid: {i}\ndn: cn=user{i},dc=example,dc=com\n")
+        else:
+            change = ADD if i % 4 == 0 else MOD
+            changetype = 'add' if i % 4 == 0 else 'modify'
+            records.append(f"changetype: {changetype}\nreplgen: 5f000000000000010000\ncsn: {csn}\n"
+                           f"nsuniqueid: {i}\ndn: cn=user{i},dc=example,dc=com\nchange:: {_b64(change)}\n")
+    with open(path, 'w') as f:
+        f.write('\n'.join(records))
+
+
+@pytest.fixture
+def changelog(tmp_path):
+    path = str(tmp_path / 'changelog.ldif')
+    _changelog(path)
+    return path
+
+
+def test_changelog_records(changelog):
+    """The records are read one by one, with their change decoded"""
+    records = list(ChangelogLDIF(changelog).records())
+    assert len(records) == 9
+    assert records[0]['csn'] is None
+    assert records[0]['attrs']['clmaxruv'] == ['{replica 1} 5f000001000000010000 5f000e10000000010000 5f000e10']
+    assert [r['changetype'] for r in records[1:5]] == ['add', 'modify', 'modify', 'delete']
+    assert records[1]['changes'] == ADD
+    assert records[2]['changes'] == MOD
+    assert records[2]['dn'] == 'cn=user1,dc=example,dc=com'
+    assert records[2]['rid'] == 2
+    assert records[4]['changes'] is None
+
+
+def test_changelog_filters(changelog):
+    """The changes can be filtered by CSN range and replica ID"""
+    # The second half hour
+    cl = ChangelogLDIF(changelog, min_csn=ChangelogLDIF.csn_from_time(0x5f000000 + 1800),
+                       max_csn=ChangelogLDIF.csn_from_time(0x5f000000 + 3600))
+    records = [r for r in cl.records() if r['csn'] is not None]
+    assert [r['attrs']['nsuniqueid'][0] for r in records] == ['3', '4', '5']
+
+    cl = ChangelogLDIF(changelog, rids=[1])
+    records = [r for r in cl.records() if r['csn'] is not None]
+    assert [r['rid'] for r in records] == [1, 1, 1, 1]
+
+
+def test_changelog_output(changelog, tmp_path):
+    """The changelog can be written as is, decoded, or as its CSNs only"""
+    output = str(tmp_path / 'output.ldif')
+
+    ChangelogLDIF(changelog, output, rids=[2]).process()
+    with open(output) as f:
+        content = f.read()
+    assert content.startswith('# LDIF File: {}\n'.format(output))
+    assert content.count('csn: ') == 4
+    assert 'clmaxruv' in content
+
+    ChangelogLDIF(changelog, output).decode()
+    with open(output) as f:
+        content = f.read()
+    assert content.count('change::\n' + MOD + '\n') == 4
+    assert content.count('change::\n' + ADD + '\n') == 2
+    assert 'dn: cn=user3,dc=example,dc=com\n\n' in content
+
+    ChangelogLDIF(changelog, output).grep_csn()
+    with open(output) as f:
+        lines = f.read().splitlines()
+    assert lines[1] == 'clpurgeruv: {replicageneration} 5f000000000000010000 (2020-07-04 04:05:20)'
+    assert lines[2:6] == ['clmaxruv: {replica 1} 5f000001000000010000 5f000e10000000010000 5f000e10 (2020-07-04 04:05:21',
+                          '; 2020-07-04 05:05:20', '; 2020-07-04 05:05:20', ')']
+    assert len([line for line in lines if line.startswith('csn: ')]) == 8
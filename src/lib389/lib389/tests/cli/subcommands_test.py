@@ -0,0 +1,69 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+
+import argparse
+import importlib
+import pytest
+
+from lib389.cli_base import LazySubcommands
+from lib389 import cli_conf, cli_ctl, cli_idm
+
+
+@pytest.mark.parametrize('package', [cli_conf, cli_ctl, cli_idm])
+def test_subcommands_declared(package):
+    """The declared subcommands must be the ones that each module adds"""
+    for subcommand in package.SUBCOMMANDS:
+        module, names = subcommand[:2]
+        create = subcommand[2] if len(subcommand) > 2 else 'create_parser'
+        parser = argparse.ArgumentParser()
+        subparsers = parser.add_subparsers()
+        getattr(importlib.import_module(f'{package.__name__}.{module}'), create)(subparsers)
+        assert list(subparsers.choices) == names
+
+
+def _lazy_parser(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('instance')
+    subparsers = parser.add_subparsers()
+    loaded = LazySubcommands(subparsers, 'lib389.cli_conf', cli_conf.SUBCOMMANDS).load(argv)
+    return parser, subparsers, loaded
+
+
+def test_subcommands_lazy():
+    """Only the module of the subcommand used is loaded, but every subcommand
+    is still a valid choice
+    """
+    argv = ['localhost', 'repl-agmt', 'list', '--suffix', 'dc=example,dc=com']
+    parser, subparsers, loaded = _lazy_parser(argv)
+    assert loaded == ['replication']
+    assert list(subparsers.choices) == [name for _, names, *_ in cli_conf.SUBCOMMANDS for name in names]
+    args = parser.parse_args(argv)
+    assert args.func.__module__ == 'lib389.cli_conf.replication'
+
+    # The instance name is a subcommand name too
+    argv = ['backup', 'backend', 'suffix', 'list']
+    parser, subparsers, loaded = _lazy_parser(argv)
+    assert loaded == ['backend', 'backup']
+    assert parser.parse_args(argv).func.__module__ == 'lib389.cli_conf.backend'
+
+
+@pytest.mark.parametrize('argv', [['localhost'], ['localhost', 'backend', '--help']])
+def test_subcommands_load_all(argv):
+    """Without a subcommand, or for help, everything is loaded"""
+    parser, subparsers, loaded = _lazy_parser(argv)
+    assert loaded == [subcommand[0] for subcommand in cli_conf.SUBCOMMANDS]
+
+
+def test_subcommands_argcomplete(monkeypatch):
+    """argcomplete gets the parsers of the line being completed"""
+    line = 'dsconf localhost schema attributetypes '
+    monkeypatch.setenv('_ARGCOMPLETE', '1')
+    monkeypatch.setenv('COMP_LINE', line)
+    monkeypatch.setenv('COMP_POINT', str(len(line)))
+    parser, subparsers, loaded = _lazy_parser(None)
+    assert loaded == ['schema']
@@ -0,0 +1,126 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import threading
+import time
+import ldap
+import pytest
+from lib389._conn_pool import ConnectionPool
+
+DN_DM = 'cn=Directory Manager'
+
+
+class FakeConnection(object):
+    def __init__(self, key):
+        self.key = key
+        self.closed = False
+        self.alive = True
+
+    def whoami_s(self):
+        if not self.alive:
+            raise ldap.SERVER_DOWN({'desc': "Can't contact LDAP server"})
+        return 'dn: ' + DN_DM
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool(ConnectionPool):
+    """A pool that does not need a server"""
+
+    def __init__(self, **kwargs):
+        super(FakePool, self).__init__(None, **kwargs)
+        self.connections = []
+
+    def _connect(self, host, port, protocol, binddn, bindpw):
+        conn = FakeConnection((host, port, protocol, binddn))
+        self.connections.append(conn)
+        self.opened += 1
+        return conn
+
+
+def test_conn_pool_reuse():
+    """Assert that connections are reused per host, port, protocol and bind DN"""
+    pool = FakePool()
+    with pool.connection('c1.example.com', 389, 'LDAP', DN_DM, 'password') as conn:
+        first = conn
+    with pool.connection('C1.example.com', '389', 'ldap', DN_DM, 'password') as conn:
+        assert conn is first
+    with pool.connection('c1.example.com', 636, 'ldaps', DN_DM, 'password') as conn:
+        assert conn is not first
+    with pool.connection('c1.example.com', 389, 'ldap', 'cn=other', 'password') as conn:
+        assert conn is not first
+    # A different password never gets the connection bound with the old one
+    with pool.connection('c1.example.com', 389, 'ldap', DN_DM, 'new password') as conn:
+        assert conn is not first
+    assert first.closed
+    assert pool.stats()['opened'] == 4
+    assert pool.stats()['reused'] == 1
+
+    pool.close()
+    assert all(conn.closed for conn in pool.connections)
+    assert pool.stats()['idle'] == 0
+
+
+def test_conn_pool_health():
+    """Assert that broken and idle connections are not handed out"""
+    pool = FakePool(idle_timeout=60, check_interval=0)
+    with pool.connection('c1.example.com', 389, 'ldap', DN_DM, 'password') as conn:
+        first = conn
+    first.alive = False
+    with pool.connection('c1.example.com', 389, 'ldap', DN_DM, 'password') as conn:
+        assert conn is not first
+        second = conn
+    assert first.closed
+
+    # A connection that failed during the block is dropped
+    with pytest.raises(ldap.SERVER_DOWN):
+        with pool.connection('c1.example.com', 389, 'ldap', DN_DM, 'password') as conn:
+            assert conn is second
+            raise ldap.SERVER_DOWN({'desc': "Can't contact LDAP server"})
+    assert second.closed
+
+    # But a failed operation does not break the connection
+    with pytest.raises(ldap.NO_SUCH_OBJECT):
+        with pool.connection('c1.example.com', 389, 'ldap', DN_DM, 'password') as conn:
+            third = conn
+            raise ldap.NO_SUCH_OBJECT()
+    assert not third.closed
+
+    # Idle connections expire
+    pool.idle_timeout = 0
+    time.sleep(0.01)
+    with pool.connection('c1.example.com', 389, 'ldap', DN_DM, 'password') as conn:
+        assert conn is not third
+    assert third.closed
+
+
+def test_conn_pool_limit():
+    """Assert that no more than size connections per key are in use at once"""
+    pool = FakePool(size=2)
+    in_use = []
+    peak = []
+    lock = threading.Lock()
+
+    def borrow():
+        with pool.connection('c1.example.com', 389, 'ldap', DN_DM, 'password') as conn:
+            with lock:
+                in_use.append(conn)
+                peak.append(len(in_use))
+            time.sleep(0.05)
+            with lock:
+                in_use.remove(conn)
+
+    threads = [threading.Thread(target=borrow) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) == 2
+    assert pool.stats()['opened'] == 2
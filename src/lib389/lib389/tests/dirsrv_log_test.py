@@ -7,13 +7,17 @@
 # --- END COPYRIGHT BLOCK ---
 #
 from lib389._constants import *
-from lib389.utils import ensure_bytes, ensure_str
+from lib389.utils import ensure_str
 from lib389 import DirSrv, Entry
 import pytest
 import time
 import shutil
 import datetime
+import gzip
+import logging
+import os
 from dateutil.tz import tzoffset
+from lib389.dirsrv_log import DirsrvAccessLog, CSNIndex, TIMESTAMP_MISSING
 
 INSTANCE_PORT = 54321
 INSTANCE_SERVERID = 'standalone'
@@ -55,7 +59,7 @@ def test_access_log_rotation(topology):
 
     # Artificially rotate the log.
     lpath = topology.standalone.ds_access_log._get_log_path()
-    shutil.copyfile(lpath, lpath + ensure_bytes('.20160515-104822'))
+    shutil.copyfile(lpath, lpath + '.20160515-104822')
     # check we have the right number of lines.
     access_lines = topology.standalone.ds_access_log.readlines_archive()
     assert(len(access_lines) > 0)
@@ -74,7 +78,7 @@ def test_access_log(topology):
         topology.standalone.ds_access_log.parse_line('[27/Apr/2016:12:49:49.726093186 +1000] conn=1 fd=64 slot=64 connection from ::1 to ::1') ==
         {
             'slot': '64', 'remote': '::1', 'action': 'CONNECT', 'timestamp': '[27/Apr/2016:12:49:49.726093186 +1000]', 'fd': '64', 'conn': '1', 'local': '::1',
-            'datetime': datetime.datetime(2016, 4, 27, 12, 0, 0, 726093, tzinfo=tzoffset(None, 36000))
+            'datetime': datetime.datetime(2016, 4, 27, 12, 49, 49, 726093, tzinfo=tzoffset(None, 36000))
         }
     )
     assert(
@@ -82,21 +86,21 @@ def test_access_log(topology):
         {
             'rem': 'base="cn=config" scope=0 filter="(objectClass=*)" attrs="nsslapd-instancedir nsslapd-errorlog nsslapd-accesslog nsslapd-auditlog nsslapd-certdir nsslapd-schemadir nsslapd-bakdir nsslapd-ldifdir"',  # noqa
             'action': 'SRCH', 'timestamp': '[27/Apr/2016:12:49:49.727235997 +1000]', 'conn': '1', 'op': '2',
-            'datetime': datetime.datetime(2016, 4, 27, 12, 0, 0, 727235, tzinfo=tzoffset(None, 36000))
+            'datetime': datetime.datetime(2016, 4, 27, 12, 49, 49, 727235, tzinfo=tzoffset(None, 36000))
         }
     )
     assert(
         topology.standalone.ds_access_log.parse_line('[27/Apr/2016:12:49:49.736297002 +1000] conn=1 op=4 fd=64 closed - U1') ==
         {
             'status': 'U1', 'fd': '64', 'action': 'DISCONNECT', 'timestamp': '[27/Apr/2016:12:49:49.736297002 +1000]', 'conn': '1', 'op': '4',
-            'datetime': datetime.datetime(2016, 4, 27, 12, 0, 0, 736297, tzinfo=tzoffset(None, 36000))
+            'datetime': datetime.datetime(2016, 4, 27, 12, 49, 49, 736297, tzinfo=tzoffset(None, 36000))
         }
     )
     assert(
         topology.standalone.ds_access_log.parse_line('[27/Apr/2016:12:49:49.736297002 -1000] conn=1 op=4 fd=64 closed - U1') ==
         {
             'status': 'U1', 'fd': '64', 'action': 'DISCONNECT', 'timestamp': '[27/Apr/2016:12:49:49.736297002 -1000]', 'conn': '1', 'op': '4',
-            'datetime': datetime.datetime(2016, 4, 27, 12, 0, 0, 736297, tzinfo=tzoffset(None, -36000))
+            'datetime': datetime.datetime(2016, 4, 27, 12, 49, 49, 736297, tzinfo=tzoffset(None, -36000))
         }
     )
 
@@ -113,11 +117,164 @@ def test_error_log(topology):
         topology.standalone.ds_error_log.parse_line('[27/Apr/2016:13:46:35.775670167 +1000] slapd started.  Listening on All Interfaces port 54321 for LDAP requests') ==  # noqa
         {
             'timestamp': '[27/Apr/2016:13:46:35.775670167 +1000]', 'message': 'slapd started.  Listening on All Interfaces port 54321 for LDAP requests',
-            'datetime': datetime.datetime(2016, 4, 27, 13, 0, 0, 775670, tzinfo=tzoffset(None, 36000))
+            'datetime': datetime.datetime(2016, 4, 27, 13, 46, 35, 775670, tzinfo=tzoffset(None, 36000))
         }
     )
 
 
+ROTATED_ACCESS_LOG = """[14/Sep/2020:10:00:00.100000000 +0000] conn=1 op=0 BIND dn="cn=dm" method=128 version=3
+[14/Sep/2020:10:00:00.200000000 +0000] conn=1 op=0 RESULT err=0 tag=97 nentries=0 wtime=0.000 optime=0.001 etime=0.001 dn="cn=dm"
+[14/Sep/2020:10:00:01.000000000 +0000] conn=1 op=1 SRCH base="dc=example,dc=com" scope=2 filter="(description=old)" attrs=ALL
+"""
+
+ACCESS_LOG = """[14/Sep/2020:10:00:02.000000000 +0000] conn=1 op=1 RESULT err=0 tag=101 nentries=3 wtime=0.000 optime=2.5 etime=2.500 notes=A details="Fully Unindexed Filter"
+[14/Sep/2020:10:00:03.000000000 +0000] conn=1 op=2 SRCH base="dc=example,dc=com" scope=2 filter="(foo=bar)" attrs="cn"
+[14/Sep/2020:10:00:03.000000000 +0000] conn=1 op=2 SORT cn
+[14/Sep/2020:10:00:03.100000000 +0000] conn=1 op=2 RESULT err=0 tag=101 nentries=0 wtime=0.000 optime=0.05 etime=0.050 notes=U,F
+[14/Sep/2020:10:00:03.100000000 +0000] conn=1 op=3 MOD dn="uid=a,dc=example,dc=com"
+[14/Sep/2020:10:00:03.200000000 +0000] conn=1 op=3 RESULT err=0 tag=103 nentries=0 wtime=0.000 optime=0.0 etime=0.000 csn=5f000000000000010000
+[14/Sep/2020:10:00:04.000000000 +0000] conn=1 op=4 fd=64 closed - U1
+"""
+
+
+class FakePaths(object):
+    def __init__(self, access_log):
+        self.access_log = access_log
+
+
+class FakeInstance(object):
+    def __init__(self, access_log):
+        self.verbose = False
+        self.log = logging.getLogger(__name__)
+        self.ds_paths = FakePaths(access_log)
+
+
+def test_access_log_analyze(tmpdir):
+    """Check the single pass analysis of the current and rotated logs"""
+    lpath = os.path.join(str(tmpdir), 'access')
+    with gzip.open(lpath + '.20200914-100000.gz', 'wt') as f:
+        f.write(ROTATED_ACCESS_LOG)
+    with open(lpath, 'w') as f:
+        f.write(ACCESS_LOG)
+    access_log = DirsrvAccessLog(FakeInstance(lpath))
+
+    # The search request is in the rotated log, its result in the current one
+    ops = list(access_log.iter_operations(archive=True))
+    assert [(o['action'], o['op']) for o in ops] == [('BIND', '0'), ('SRCH', '1'), ('SRCH', '2'), ('MOD', '3')]
+    assert ops[1]['filter'] == '(description=old)'
+    assert ops[1]['etime'] == 2.5
+    assert ops[1]['nentries'] == 3
+    assert ops[2]['notes'] == ['U', 'F']
+    assert ops[3]['csn'] == '5f000000000000010000'
+
+    stats = access_log.analyze(archive=True, top=1)
+    assert stats['operations'] == 4
+    assert [o['filter'] for o in stats['slow_searches']] == ['(description=old)']
+    assert stats['etime_histogram']['SRCH'] == [0, 0, 1, 0, 1, 0, 0]
+    assert stats['notes']['A']['count'] == 1
+    assert stats['notes']['A']['actions'] == {'SRCH': 1}
+
+    # The lint only looks at the current log
+    reports = list(access_log._lint_notes())
+    assert [r['dsle'] for r in reports] == ['DSLOGNOTES0002']
+    assert '(foo=bar)' in reports[0]['detail']
+
+
+def test_parse_timestamp():
+    """Check the timestamp parser, including the months it used to swap"""
+    access_log = DirsrvAccessLog(FakeInstance(None))
+    for month, num in [('Aug', 8), ('Sep', 9), ('Oct', 10), ('Nov', 11)]:
+        assert access_log.parse_timestamp(f'[14/{month}/2020:10:11:12.123456789 +0000]') == \
+            datetime.datetime(2020, num, 14, 10, 11, 12, 123456, tzinfo=tzoffset(None, 0))
+    # Without the high resolution timestamps, and without the bracket
+    assert access_log.parse_timestamp('[14/Sep/2020:10:11:12 -0430]') == \
+        datetime.datetime(2020, 9, 14, 10, 11, 12, tzinfo=tzoffset(None, -16200))
+    assert access_log.parse_timestamp('14/Sep/2020:10:11:12.5 +0000') == \
+        datetime.datetime(2020, 9, 14, 10, 11, 12, 500000, tzinfo=tzoffset(None, 0))
+
+    ns = access_log.parse_timestamps(['[27/Apr/2016:12:49:49.726093186 +1000] conn=1 op=0 UNBIND',
+                                      '  continued',
+                                      '[27/Apr/2016:02:49:50 +0000] conn=1 op=1 UNBIND'])
+    assert list(ns) == [1461725389726093186, TIMESTAMP_MISSING, 1461725390000000000]
+
+
+def test_access_log_scan_archive(tmpdir):
+    """Check the parallel scan of plain and compressed rotated logs"""
+    lpath = os.path.join(str(tmpdir), 'access')
+    with gzip.open(lpath + '.20200914-100000.gz', 'wt') as f:
+        f.write(ROTATED_ACCESS_LOG)
+    with open(lpath, 'w') as f:
+        f.write(ACCESS_LOG)
+    access_log = DirsrvAccessLog(FakeInstance(lpath))
+    expected = (ROTATED_ACCESS_LOG + ACCESS_LOG).splitlines(True)
+
+    # Byte ranges much smaller than a line must still see every line once
+    for jobs in [1, 2]:
+        assert list(access_log.scan_archive(jobs=jobs, chunk_size=7)) == expected
+        assert access_log.match_archive('.* RESULT ') == [l for l in expected if ' RESULT ' in l]
+
+    # The rotated log ends before the window starts, so it is skipped
+    with gzip.open(lpath + '.20200914-100000.gz', 'wt') as f:
+        f.write('[14/Jan/2020:07:00:00.000000000 +0000] conn=1 op=0 UNBIND\n')
+    with open(lpath + '.20200914-110000', 'w') as f:
+        f.write('[14/Jan/2020:08:00:00.000000000 +0000] conn=1 op=1 UNBIND\n')
+    with open(lpath, 'w') as f:
+        f.write('[14/Jan/2020:10:00:00.000000000 +0000] conn=2 op=0 UNBIND\n'
+                '[14/Jan/2020:11:00:00.000000000 +0000] conn=3 op=0 UNBIND\n')
+    start = access_log.parse_timestamp('[14/Jan/2020:09:00:00.000000000 +0000]')
+    assert [t[0] for t in access_log._plan_archive_scan(start, None, 1024)] == [lpath]
+    end = access_log.parse_timestamp('[14/Jan/2020:10:30:00.000000000 +0000]')
+    assert access_log.match_archive('.*UNBIND', start=start, end=end) == \
+        ['[14/Jan/2020:10:00:00.000000000 +0000] conn=2 op=0 UNBIND\n']
+
+
+def test_access_log_csn_index(tmpdir):
+    """Check the CSN index is cached, extended as the log grows, and rebuilt
+    once the log is rotated
+    """
+    lpath = os.path.join(str(tmpdir), 'access')
+    cache_path = os.path.join(str(tmpdir), 'csn-index.json')
+    with open(lpath, 'w') as f:
+        f.write(ACCESS_LOG)
+    access_log = DirsrvAccessLog(FakeInstance(lpath))
+
+    index = access_log.csn_index(cache_path)
+    assert len(index) == 1
+    assert index.get('5f000000000000010000') == (1600077603200000000, '1', '3', 0)
+    assert index.get_time('5f000000000000010000') == 1600077603.2
+    assert index.get_time('5f000001000000010000') is None
+
+    # A new index starts from the cache, and only reads the new lines
+    with open(lpath, 'a') as f:
+        f.write('[14/Sep/2020:10:00:05.000000000 +0000] conn=2 op=1 RESULT err=0 tag=105 nentries=0 '
+                'wtime=0.000 optime=0.0 etime=0.000 csn=5f000001000000010000\n'
+                '[14/Sep/2020:10:00:06.000000000 +0000] conn=2 op=2 RESULT err=0 tag=103 nentries=0 '
+                'wtime=0.000 optime=0.0 etime=0.000 csn=5f000000000000010000\n'
+                '[14/Sep/2020:10:00:07.000000000 +0000] conn=2 op=3 RESULT err=0 tag=103 csn=5f000002')
+    index = CSNIndex(access_log, cache_path)
+    assert index.offset == len(ACCESS_LOG)
+    assert index.update() == 1
+    assert index.get_time('5f000001000000010000') == 1600077605.0
+    # The first RESULT is kept, and the line still being written is not indexed
+    assert index.get_time('5f000000000000010000') == 1600077603.2
+    assert '5f000002' not in index
+
+    # The rotated log is replaced by a new one
+    os.rename(lpath, lpath + '.20200914-100000')
+    with open(lpath, 'w') as f:
+        f.write('[14/Sep/2020:11:00:00.000000000 +0000] conn=1 op=1 RESULT err=0 tag=105 nentries=0 '
+                'wtime=0.000 optime=0.0 etime=0.000 csn=5f000003000000010000\n')
+    index = access_log.csn_index(cache_path)
+    assert list(index.csns) == ['5f000003000000010000']
+
+    # The lines written since are only indexed on a refresh
+    with open(lpath, 'a') as f:
+        f.write('[14/Sep/2020:11:00:01.000000000 +0000] conn=1 op=2 RESULT err=0 tag=105 nentries=0 '
+                'wtime=0.000 optime=0.0 etime=0.000 csn=5f000004000000010000\n')
+    assert '5f000004000000010000' not in access_log.csn_index(cache_path, refresh=False)
+    assert '5f000004000000010000' in access_log.csn_index(cache_path)
+
+
 if __name__ == "__main__":
     CURRENT_FILE = os.path.realpath(__file__)
     pytest.main("-s -vv %s" % CURRENT_FILE)
@@ -128,3 +128,35 @@ def test_delete_multivalue(topo):
     dse_ldif.delete(DN_CONFIG, fake_attr)
     assert not dse_ldif.get(DN_CONFIG, fake_attr)
 
+
+
+def test_batch(topo):
+    """Check that the changes of a batch are written at once, in place, and
+    are undone if the batch fails
+    """
+
+    dse_ldif = DSEldif(topo.standalone)
+    fake_attr = "fakeAttr"
+    fake_attr_values = ["fake{}".format(i) for i in range(100)]
+    with open(dse_ldif.path) as f:
+        original = f.read()
+
+    log.info("Add {} values of {} in a batch".format(len(fake_attr_values), fake_attr))
+    with dse_ldif.batch():
+        for value in fake_attr_values:
+            dse_ldif.add(DN_CONFIG, fake_attr, value)
+        dse_ldif.replace(DN_CONFIG, "nsslapd-port", dse_ldif.get(DN_CONFIG, "nsslapd-port", single=True))
+        assert DSEldif(topo.standalone).get(DN_CONFIG, fake_attr) is None
+    assert DSEldif(topo.standalone).get(DN_CONFIG.upper(), fake_attr.lower()) == fake_attr_values
+
+    log.info("A failed batch is not written")
+    with pytest.raises(ZeroDivisionError):
+        with dse_ldif.batch():
+            dse_ldif.delete(DN_CONFIG, fake_attr)
+            1 / 0
+    assert dse_ldif.get(DN_CONFIG, fake_attr) == fake_attr_values
+
+    log.info("Clean up, the other lines are unchanged")
+    dse_ldif.delete(DN_CONFIG, fake_attr)
+    with open(dse_ldif.path) as f:
+        assert f.read() == original
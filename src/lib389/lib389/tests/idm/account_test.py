@@ -14,6 +14,8 @@ import pytest
 import ldap
 
 from lib389.idm.user import UserAccounts, nsUserAccounts
+from lib389.idm.account import Accounts, AccountState
+from lib389.idm.role import ManagedRoles
 from lib389.topologies import topology_st as topology
 from lib389._constants import DEFAULT_SUFFIX
 
@@ -80,3 +82,46 @@ def test_account_change_pw(topology):
     # Assert we can bind as the new PW
     c = testuser.bind('test_password')
     c.unbind_s()
+
+
+def test_account_status_bulk(topology):
+    """The bulk status of the accounts of a subtree is the same as the
+    status of each account
+    """
+    users = nsUserAccounts(topology.standalone, DEFAULT_SUFFIX)
+    testusers = [users.create_test_user(uid=uid) for uid in range(1010, 1015)]
+    testusers[0].lock()
+
+    accounts = Accounts(topology.standalone, DEFAULT_SUFFIX)
+    statuses = {account.dn.lower(): status for (account, status) in accounts.iter_status(page_size=2)}
+    for testuser in testusers:
+        assert statuses[testuser.dn.lower()]["state"] == testuser.status()["state"]
+    assert statuses[testusers[0].dn.lower()]["state"] == AccountState.DIRECTLY_LOCKED
+    assert statuses[testusers[1].dn.lower()]["state"] == AccountState.ACTIVATED
+
+    for testuser in testusers:
+        testuser.delete()
+
+
+def test_account_status_bulk_role(topology):
+    """The bulk status of an account locked through a disabled role is the
+    same as its own status, with the role DN in lowercase
+    """
+    roles = ManagedRoles(topology.standalone, DEFAULT_SUFFIX)
+    role = roles.create(properties={'cn': 'Locked Accounts'})
+    users = nsUserAccounts(topology.standalone, DEFAULT_SUFFIX)
+    testuser = users.create_test_user(uid=1020)
+    testuser.add('nsRoleDN', role.dn)
+    role.lock()
+
+    accounts = Accounts(topology.standalone, DEFAULT_SUFFIX)
+    statuses = {account.dn.lower(): status for (account, status) in accounts.iter_status()}
+    status = testuser.status()
+    assert status["state"] == AccountState.INDIRECTLY_LOCKED
+    assert status["role_dn"] == role.dn.lower()
+    assert statuses[testuser.dn.lower()]["state"] == status["state"]
+    assert statuses[testuser.dn.lower()]["role_dn"] == status["role_dn"]
+
+    role.unlock()
+    testuser.delete()
+    role.delete()
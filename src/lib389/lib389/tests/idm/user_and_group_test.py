@@ -85,6 +85,36 @@ def test_users_and_groups(topology):
     log.info('Test PASSED')
 
 
+def test_group_members_bulk(topology):
+    """
+    Ensure that members are added, removed and synced in bulk, and that
+    only the difference is applied.
+    """
+    groups = Groups(topology.standalone, DEFAULT_SUFFIX)
+    user_dns = ['uid=bulkuser%d,ou=People,%s' % (i, DEFAULT_SUFFIX) for i in range(10)]
+    group = groups.create(properties={'cn': 'bulkgroup'})
+
+    # A member that is already there, or given twice, is added only once
+    group.add_member(user_dns[0])
+    added = group.add_members(user_dns[:6] + [user_dns[1].upper()], chunk=2)
+    assert added == user_dns[1:6]
+    assert len(group.list_members()) == 6
+
+    removed = group.remove_members([user_dns[5], user_dns[9]], chunk=2)
+    assert removed == [user_dns[5]]
+    assert not group.is_member(user_dns[5])
+
+    (added, removed) = group.sync_members(set(user_dns[3:]), chunk=3)
+    assert sorted(added) == sorted(user_dns[5:])
+    assert sorted(removed) == sorted(user_dns[:3])
+    assert sorted(group.list_members()) == sorted(user_dns[3:])
+    assert group.is_member(user_dns[9])
+    assert not group.is_member(user_dns[0])
+    assert group.sync_members(user_dns[3:]) == ([], [])
+
+    group.delete()
+
+
 if __name__ == '__main__':
     # Run isolated
     # -s for DEBUG mode
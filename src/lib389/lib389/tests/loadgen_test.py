@@ -0,0 +1,78 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import csv
+import json
+import ldap
+from lib389.loadgen import LatencyHistogram, LoadResult, LoadGenerator, SearchLoad, ModifyLoad
+from lib389.topologies import topology_st
+from lib389._constants import DEFAULT_SUFFIX
+
+
+def test_latency_histogram():
+    """The percentiles are precise within 10%, and histograms can be merged"""
+    first = LatencyHistogram()
+    second = LatencyHistogram()
+    for usec in range(1, 1001):
+        (first if usec % 2 else second).record(usec / 1000000.0)
+    first.merge(second)
+    assert first.count == 1000
+    assert first.max == 1000
+    assert abs(first.percentile(50) - 500) <= 50
+    assert abs(first.percentile(99) - 990) <= 99
+    assert first.percentile(100) == 1000
+    assert first.mean() == 500.5
+    assert LatencyHistogram().percentile(99) == 0
+
+
+def test_load_result_output(tmp_path):
+    """The results of the workers are merged, and written as JSON and CSV"""
+    result = LoadResult()
+    for worker in range(2):
+        partial = LoadResult()
+        partial.duration = 2 + worker
+        for i in range(100):
+            partial.record('search', 0.001, i / 50.0)
+        partial.record_error('search', ldap.NO_SUCH_OBJECT())
+        partial.record_error('bind', 'TIMEOUT')
+        result.merge(partial)
+
+    summary = result.summary()
+    assert result.duration == 3
+    assert summary['search']['count'] == 200
+    assert summary['search']['error_types'] == {'NO_SUCH_OBJECT': 2}
+    assert summary['bind']['count'] == 0
+    assert summary['total']['errors'] == 4
+    assert [point['search'] for point in result.throughput()] == [100, 100]
+
+    path = str(tmp_path / 'load.json')
+    result.write_json(path)
+    with open(path) as f:
+        assert json.load(f)['summary']['search']['p50_ms'] == 1.0
+    path = str(tmp_path / 'load.csv')
+    timeline_path = str(tmp_path / 'timeline.csv')
+    result.write_csv(path, timeline_path=timeline_path)
+    with open(path) as f:
+        rows = list(csv.reader(f))
+    assert [row[0] for row in rows] == ['operation', 'bind', 'search', 'total']
+    with open(timeline_path) as f:
+        assert list(csv.reader(f))[0] == ['time', 'bind', 'search']
+
+
+def test_load_generator(topology_st):
+    """A mix of searches and modifies runs from two workers"""
+    gen = LoadGenerator(topology_st.standalone, [
+        SearchLoad(DEFAULT_SUFFIX, '(ou={0})', low=1, high=10, weight=3),
+        ModifyLoad('ou=groups,' + DEFAULT_SUFFIX, name='modify'),
+    ], workers=2, connections=2)
+    summary = gen.run(duration=2).summary()
+    assert summary['search']['count'] > 0
+    assert summary['search']['errors'] == 0
+    assert summary['modify']['count'] > 0
+    assert summary['total']['p99_ms'] <= summary['total']['max_ms']
@@ -7,9 +7,11 @@
 # --- END COPYRIGHT BLOCK ---
 #
 
+import ldap
+import pytest
 from lib389.topologies import topology_st
 from lib389._mapped_object import DSLdapObject
-from lib389.idm.group import Group
+from lib389.idm.group import Group, Groups
 from lib389._constants import DEFAULT_SUFFIX
 
 
@@ -21,3 +23,92 @@ def test_exists(topology_st):
     assert not group.exists()
     group.create(properties={'cn': 'MyTestGroup', 'ou': 'groups'})
     assert group.exists()
+
+
+def test_list_attrlist_snapshot(topology_st):
+    """
+    Assert that objects listed with an attrlist answer reads from their snapshot,
+    and that a write through the object invalidates it.
+    """
+    groups = Groups(topology_st.standalone, DEFAULT_SUFFIX)
+    groups.create(properties={'cn': 'MySnapshotGroup', 'description': 'before'})
+    group = [g for g in groups.list(attrlist=['cn', 'description'])
+             if g.get_attr_val_utf8('cn') == 'MySnapshotGroup'][0]
+    assert group._entry_snapshot is not None
+    assert group.get_attr_val_utf8('description') == 'before'
+    # Not named in the attrlist, so this must go to the server.
+    assert not group._snapshot_covers('member')
+    group.replace('description', 'after')
+    assert group._entry_snapshot is None
+    assert group.get_attr_val_utf8('description') == 'after'
+    group.delete()
+
+
+def test_present_missing_entry(topology_st):
+    """
+    Assert that present() raises NO_SUCH_OBJECT for a deleted entry, even
+    when the attribute is in the snapshot of the object.
+    """
+    groups = Groups(topology_st.standalone, DEFAULT_SUFFIX)
+    groups.create(properties={'cn': 'MyPresentGroup', 'description': 'present'})
+    group = [g for g in groups.list(attrlist=['cn', 'description'])
+             if g.get_attr_val_utf8('cn') == 'MyPresentGroup'][0]
+    assert group.present('description', 'present')
+    Group(topology_st.standalone, group.dn).delete()
+    with pytest.raises(ldap.NO_SUCH_OBJECT):
+        group.present('description')
+
+
+def test_create_many(topology_st):
+    """
+    Assert that create_many adds all the entries, reports the errors of
+    each entry, and only reads the entries back when asked to.
+    """
+    groups = Groups(topology_st.standalone, DEFAULT_SUFFIX)
+    names = ['MyBulkGroup%d' % i for i in range(200)]
+    results = groups.create_many([{'cn': name} for name in names], window=16)
+    assert [r.obj.dn for r in results] == ['cn=%s,ou=Groups,%s' % (name, DEFAULT_SUFFIX) for name in names]
+    assert all(r.ok and r.entry is None for r in results)
+
+    # The existing entry fails, the others are created over two connections
+    results = groups.create_many([{'cn': 'MyBulkGroup0'}, ('cn=MyBulkGroupRdn', {'description': 'rdn'})],
+                                 connections=2, post_read=['cn', 'description'])
+    assert isinstance(results[0].error, ldap.ALREADY_EXISTS)
+    assert results[1].ok
+    assert results[1].entry.getValue('description') == b'rdn'
+
+    results = groups.apply_many([(r.obj, [(ldap.MOD_REPLACE, 'description', 'bulk')]) for r in results[1:]] +
+                                [('cn=MyMissingGroup,ou=Groups,' + DEFAULT_SUFFIX, [(ldap.MOD_REPLACE, 'description', 'bulk')])],
+                                post_read=['description'])
+    assert results[0].ok
+    assert results[0].entry.getValue('description') == b'bulk'
+    assert isinstance(results[1].error, ldap.NO_SUCH_OBJECT)
+    assert groups.get('MyBulkGroupRdn').get_attr_val_utf8('description') == 'bulk'
+
+    for group in groups.list():
+        if group.rdn.startswith('MyBulkGroup'):
+            group.delete()
+
+
+def test_iter_list_paged(topology_st):
+    """
+    Assert that iter_list and iter_filter return the same entries as list and
+    filter, a page at a time, and sorted when asked to.
+    """
+    groups = Groups(topology_st.standalone, DEFAULT_SUFFIX)
+    names = ['MyPagedGroup%02d' % i for i in range(25)]
+    groups.create_many([{'cn': name} for name in reversed(names)])
+
+    listed = sorted(g.dn for g in groups.list())
+    assert sorted(g.dn for g in groups.iter_list(page_size=4)) == listed
+
+    paged = groups.iter_filter('(cn=MyPagedGroup*)', page_size=4, sort='cn')
+    assert [g.get_attr_val_utf8('cn') for g in paged] == names
+
+    # Stopping early releases the paged search
+    for group in groups.iter_list(attrlist=['cn'], page_size=2):
+        break
+    assert len(list(groups.iter_filter('(cn=MyMissingGroup*)'))) == 0
+
+    for group in list(groups.iter_filter('(cn=MyPagedGroup*)')):
+        group.delete()
@@ -34,3 +34,26 @@ def test_path_exception():
     except IOError:
         assert(True)
 
+
+def test_path_online_memoized():
+    # Online values are read once per entry, and re-read after a refresh
+    from lib389._constants import DIRSRV_STATE_ONLINE
+    from lib389._entry import Entry
+
+    class FakeInstance(object):
+        state = DIRSRV_STATE_ONLINE
+        searches = 0
+
+        def getEntry(self, dn, attrlist=None):
+            self.searches += 1
+            return Entry((dn, {'nsslapd-accesslog': [b'/var/log/access'],
+                               'nsslapd-errorlog': [b'/var/log/errors']}))
+
+    inst = FakeInstance()
+    p = Paths(instance=inst, local=False)
+    assert p.access_log == '/var/log/access'
+    assert p.error_log == '/var/log/errors'
+    assert inst.searches == 1
+    p.refresh('cn=config')
+    assert p.access_log == '/var/log/access'
+    assert inst.searches == 2
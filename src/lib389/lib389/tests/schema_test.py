@@ -12,6 +12,7 @@ import logging
 import pytest
 import os
 from lib389._constants import *
+from ldap.schema.models import AttributeType, ObjectClass
 from lib389.schema import Schema
 from lib389.topologies import topology_st as topo
 
@@ -51,6 +52,55 @@ def test_schema(topo):
         ('account', )
 
 
+def test_schema_snapshot(topo):
+    """The parsed schema is reused until the schema changes
+
+    :id: 6a1f0b8e-3c2d-4e5f-9a7b-8c9d0e1f2a3b
+    :setup: Standalone Instance
+    :steps:
+        1. Get the schema snapshot twice
+        2. Compare the indexes with a scan of all the objectclasses
+        3. Add an attribute type and get the snapshot again
+        4. Modify an object returned by a query
+    :expectedresults:
+        1. The same snapshot is returned
+        2. They agree
+        3. A new snapshot is read, with the new attribute
+        4. The snapshot is not modified
+    """
+    schema = Schema(topo.standalone)
+    snapshot = schema.get_snapshot()
+    assert snapshot.csn == schema.get_schema_csn()
+    assert schema.get_snapshot() is snapshot
+    assert schema.get_snapshot(refresh=True) is not snapshot
+    snapshot = schema.get_snapshot()
+
+    objectclasses = snapshot.get_objects(ObjectClass)
+    for name in ('uid', 'USERID', 'cn', 'objectClass'):
+        assert snapshot.may_contain(name) == [oc for oc in objectclasses
+                                              if name.lower() in map(str.lower, oc.may)]
+        assert snapshot.must_contain(name) == [oc for oc in objectclasses
+                                               if name.lower() in map(str.lower, oc.must)]
+    uid = snapshot.get('userid', AttributeType)
+    assert uid is snapshot.get('UID', AttributeType)
+    assert snapshot.get_by_oid(uid.oid, AttributeType) == [uid]
+    assert snapshot.get('nonexistent', AttributeType) is None
+
+    schema.add_attributetype({'names': ('snapshotattr', ), 'oid': '8.9.10.11.12.13.18',
+                              'syntax': '1.3.6.1.4.1.1466.115.121.1.15'})
+    new_snapshot = schema.get_snapshot()
+    assert new_snapshot is not snapshot
+    assert new_snapshot.csn == schema.get_schema_csn()
+    assert new_snapshot.get('snapshotattr', AttributeType) is not None
+    assert snapshot.get('snapshotattr', AttributeType) is None
+
+    account = schema.query_objectclass('account')
+    account.may = ()
+    assert schema.query_objectclass('account').may != ()
+    schema.remove_attributetype('snapshotattr')
+    assert schema.query_attributetype('snapshotattr') is None
+
+
 def test_schema_reload(topo):
     """Run a schema reload task
 
@@ -0,0 +1,138 @@
+# --- BEGIN COPYRIGHT BLOCK ---
+# Copyright (C) 2020 Red Hat, Inc.
+# All rights reserved.
+#
+# License: GPL (version 3 or any later version).
+# See LICENSE for details.
+# --- END COPYRIGHT BLOCK ---
+#
+
+import logging
+import threading
+import time
+import ldap
+import pytest
+from lib389 import Entry
+from lib389.tasks import Task, as_completed, wait_all, backoff_intervals
+from lib389._constants import DIRSRV_STATE_ONLINE, DN_TASKS
+
+log = logging.getLogger(__name__)
+
+PSEARCH_OID = b'2.16.840.1.113730.3.4.3'
+MSGID = 7
+
+
+class FakeInstance(object):
+    """An instance serving the task entries from a dict, and reporting their
+    changes through a persistent search when psearch is True
+    """
+
+    def __init__(self, psearch=True):
+        self.verbose = False
+        self.log = log
+        self.state = DIRSRV_STATE_ONLINE
+        self.psearch = psearch
+        self.entries = {}
+        self.changes = []
+        self.searches = 0
+        self.abandoned = []
+        self._cond = threading.Condition()
+
+    def set(self, dn, **attrs):
+        with self._cond:
+            entry = self.entries.setdefault(dn, {})
+            entry.update({attr: [str(value).encode()] for attr, value in attrs.items()})
+            self.changes.append(dn)
+            self._cond.notify_all()
+
+    def search_ext_s(self, base, scope, filterstr, attrlist=None, **kwargs):
+        if base == '':
+            controls = [PSEARCH_OID] if self.psearch else []
+            return [Entry(('', {'supportedControl': controls}))]
+        with self._cond:
+            self.searches += 1
+            if base not in self.entries:
+                raise ldap.NO_SUCH_OBJECT()
+            return [Entry((base, dict(self.entries[base])))]
+
+    def search_ext(self, base, scope, filterstr, attrlist=None, serverctrls=None, **kwargs):
+        assert base == DN_TASKS
+        return MSGID
+
+    def result4(self, msgid, all=1, timeout=None):
+        with self._cond:
+            if not self.changes:
+                self._cond.wait(timeout)
+            if not self.changes:
+                raise ldap.TIMEOUT()
+            dn = self.changes.pop(0)
+        return (ldap.RES_SEARCH_ENTRY, [(dn, {})], msgid, [])
+
+    def abandon(self, msgid):
+        self.abandoned.append(msgid)
+
+
+def _run_tasks(inst, tasks, step=0.02):
+    """Complete task i after 2 * (i + 1) steps, updating its progress at each step"""
+    for t in tasks:
+        inst.set(t.dn, nsTaskCurrentItem=0, nsTaskTotalItems=10)
+
+    def runner():
+        for count in range(1, 2 * len(tasks) + 1):
+            time.sleep(step)
+            for (i, t) in enumerate(tasks):
+                if count <= 2 * (i + 1):
+                    inst.set(t.dn, nsTaskCurrentItem=count)
+                if count == 2 * (i + 1):
+                    inst.set(t.dn, nsTaskExitCode=i)
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    return thread
+
+
+def test_backoff_intervals():
+    """The polling interval doubles up to the limit"""
+    intervals = backoff_intervals(0.1, 1)
+    assert [next(intervals) for i in range(6)] == [0.1, 0.2, 0.4, 0.8, 1, 1]
+
+
+@pytest.mark.parametrize('psearch', [True, False])
+def test_tasks_as_completed(psearch):
+    """Tasks are generated in the order they complete, with their progress,
+    with or without a persistent search
+    """
+    inst = FakeInstance(psearch)
+    tasks = [Task(inst, 'cn=task{},{}'.format(i, DN_TASKS)) for i in range(4)]
+    progress = []
+    thread = _run_tasks(inst, list(reversed(tasks)))
+    try:
+        completed = list(as_completed(tasks, timeout=10,
+                                      progress=lambda task, current, total: progress.append((task, current, total))))
+    finally:
+        thread.join()
+    assert completed == list(reversed(tasks))
+    assert wait_all(tasks, timeout=1) == [3, 2, 1, 0]
+    # Every task reported its start and its end
+    for task in tasks:
+        assert (task, 0, 10) in progress or (task, 1, 10) in progress
+    assert (tasks[0], 8, 10) in progress
+    assert inst.abandoned == ([MSGID, MSGID] if psearch else [])
+
+
+def test_task_wait_timeout():
+    """A task that does not complete returns None, an entry that is removed
+    counts as complete
+    """
+    inst = FakeInstance()
+    task = Task(inst, 'cn=task,{}'.format(DN_TASKS))
+    inst.set(task.dn, nsTaskStatus='running')
+    start = time.monotonic()
+    assert wait_all([task], timeout=0.3) == [None]
+    assert time.monotonic() - start < 2
+    with pytest.raises(TimeoutError):
+        list(as_completed([task], timeout=0.1))
+
+    del inst.entries[task.dn]
+    assert task.is_complete()
+    task.wait(timeout=1)